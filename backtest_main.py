@@ -7,46 +7,113 @@ Usage:
     python backtest_main.py                          # active 예측 평가
     python backtest_main.py --test                   # 테스트 모드 (DB 업데이트 건너뜀)
     python backtest_main.py --reevaluate 2026-02-26  # 특정 날짜 재평가 (hit/missed → 재계산)
+    python backtest_main.py --sweep                  # 판정 기준 스윕 (이번 평가 대상 + 저장된 전체 이력)
+    python backtest_main.py --replay [--from 2026-03-01] [--to 2026-03-31]
+                                                     # 저장된 예측/스냅샷으로 오프라인 재현 (네트워크 없음)
 """
-import json
 import sys
-from datetime import datetime, timedelta
+import time
+from pathlib import Path
+
+import numpy as np
 
 from config.settings import *  # noqa: F401,F403 — 환경변수 로드
 from modules.backtest import (
-    get_active_predictions,
-    fetch_stock_returns,
-    fetch_index_return,
-    fetch_daily_returns,
-    fetch_daily_index_return,
-    evaluate_prediction,
-    update_prediction_status,
+    PriceLoader,
+    group_codes,
+    load_group_returns,
     calculate_accuracy_report,
 )
+from modules.backtest_frame import (
+    attach_returns,
+    build_frames,
+    due_mask,
+    evaluate_frame,
+    sweep,
+)
 from modules.utils import KST
 
+DATA_DIR = Path(__file__).parent / "frontend" / "public" / "data"
 
-def get_reevaluate_date() -> str:
-    """--reevaluate YYYY-MM-DD 인자 파싱"""
+
+def get_arg_value(name: str) -> str:
+    """--name VALUE 인자 파싱"""
     args = sys.argv[1:]
     for i, arg in enumerate(args):
-        if arg == "--reevaluate" and i + 1 < len(args):
+        if arg == name and i + 1 < len(args):
             return args[i + 1]
     return ""
 
 
-def get_predictions_for_reevaluate(client, target_date: str):
-    """특정 날짜의 hit/missed 예측을 조회하여 재평가 대상으로 반환"""
-    response = client.table("theme_predictions").select("*").eq(
-        "prediction_date", target_date
-    ).in_(
-        "status", ["hit", "missed"]
-    ).execute()
-    return response.data or []
+def get_reevaluate_date() -> str:
+    """--reevaluate YYYY-MM-DD 인자 파싱"""
+    return get_arg_value("--reevaluate")
+
+
+def print_sweep(preds, legs, label: str) -> None:
+    """판정 기준(수익률 임계값 × 과반수 규칙) 조합별 적중률 출력"""
+    table = sweep(preds, legs)
+    print(f"\n  [스윕] {label} {len(preds)}건")
+    for row in table.itertuples(index=False):
+        print(f"    +{row.threshold:.1f}% / {row.rule:<8} {row.hit}/{row.total} ({row.accuracy}%), expired {row.expired}")
+
+
+def print_report(report: dict) -> None:
+    """정확도 리포트 출력 (전체 + 차원별)"""
+    print(f"  전체: {report['hit']}/{report['total']} ({report['accuracy']}%)")
+    for conf, data in report.get("by_confidence", {}).items():
+        print(f"  신뢰도 {conf}: {data['hit']}/{data['total']} ({data['accuracy']}%)")
+    for cat, data in report.get("by_category", {}).items():
+        print(f"  카테고리 {cat}: {data['hit']}/{data['total']} ({data['accuracy']}%)")
+    for day, data in report.get("by_weekday", {}).items():
+        print(f"  요일 {day}: {data['hit']}/{data['total']} ({data['accuracy']}%)")
+    for regime, data in report.get("by_regime", {}).items():
+        print(f"  KOSPI {regime}: {data['hit']}/{data['total']} ({data['accuracy']}%)")
+
+
+def run_replay(sweep_mode: bool) -> None:
+    """저장된 forecast-history/history 스냅샷으로 백테스트 + 모의투자 재현 (Supabase/KIS 미사용)"""
+    from modules.replay import run_replay as replay_saved_data
+
+    start, end = get_arg_value("--from") or None, get_arg_value("--to") or None
+    print("=" * 50)
+    print(f"📊 저장 데이터 재현 백테스트 ({start or '처음'} ~ {end or '끝'})")
+    print("=" * 50)
+
+    started = time.perf_counter()
+    result = replay_saved_data(DATA_DIR, start, end)
+    preds, legs, statuses = result["preds"], result["legs"], result["statuses"]
+    print(f"\n  예측 {len(preds)}건, 그룹 {len(result['pred_groups'])}개, "
+          f"로컬 종가 종목 {result['store_codes']}개, 기준 시각 {result['as_of']:%Y-%m-%d %H:%M}")
+
+    counts = {status: int((statuses == status).sum()) for status in ("hit", "missed", "expired", "active")}
+    print(f"  결과: hit={counts['hit']}, missed={counts['missed']}, "
+          f"expired={counts['expired']}, active={counts['active']}")
+
+    print("\n[정확도 리포트]")
+    print_report(result["report"])
+    if sweep_mode:
+        decided = statuses != "active"
+        print_sweep(preds[decided], legs, "재현 평가 대상")
+
+    print("\n[모의투자 재현]")
+    for day in result["paper_trading"]:
+        summary = day["summary"]
+        print(f"  {day['trade_date']} ({day['morning_timestamp'][11:16]} 매수) {summary['total_stocks']}종목: "
+              f"종가 {summary['total_profit_rate']:+.2f}%, 최고 {summary['high_total_profit_rate']:+.2f}%")
+    if not result["paper_trading"]:
+        print("  재현 가능한 거래일이 없습니다 (장중 스냅샷 + 종가 필요)")
+
+    print(f"\n✅ 재현 완료 ({time.perf_counter() - started:.1f}초)")
 
 
 def main():
     test_mode = "--test" in sys.argv
+    sweep_mode = "--sweep" in sys.argv
+    if "--replay" in sys.argv:
+        run_replay(sweep_mode)
+        return
+
     reevaluate_date = get_reevaluate_date()
 
     if test_mode:
@@ -59,12 +126,11 @@ def main():
         print("📊 예측 백테스팅 시작")
     print("=" * 50)
 
-    # Supabase 연결
+    # Supabase 연결 (PREDICTION_STORE_SQLITE 지정 시 로컬 SQLite)
     try:
-        from modules.supabase_client import get_supabase_manager
-        manager = get_supabase_manager()
-        client = manager._get_client()
-        if not client:
+        from modules.prediction_store import get_prediction_store
+        store = get_prediction_store()
+        if not store:
             print("  ✗ Supabase 연결 불가")
             sys.exit(1)
     except Exception as e:
@@ -73,8 +139,8 @@ def main():
 
     # KIS API 연결
     try:
-        from modules.kis_client import KISClient
-        kis_client = KISClient()
+        from modules.kis_client import get_kis_client
+        kis_client = get_kis_client()
     except Exception as e:
         print(f"  ✗ KIS API 초기화 실패: {e}")
         sys.exit(1)
@@ -82,10 +148,10 @@ def main():
     # Step 1: 예측 조회
     print("\n[1/4] 예측 조회...")
     if reevaluate_date:
-        predictions = get_predictions_for_reevaluate(client, reevaluate_date)
+        predictions = store.evaluated_on(reevaluate_date)
         print(f"  ✓ {len(predictions)}건의 재평가 대상 조회 ({reevaluate_date})")
     else:
-        predictions = get_active_predictions(client)
+        predictions = store.active_predictions()
         print(f"  ✓ {len(predictions)}건의 active 예측 조회")
 
     if not predictions:
@@ -96,45 +162,12 @@ def main():
     # Step 2: (prediction_date, category) 그룹별 종목코드 수집 + 수익률 조회
     print("\n[2/4] 주식 수익률 조회...")
 
-    # 달력일 매핑: 영업일 → 달력일
-    category_cal_days = {"short_term": 12, "long_term": 45}
-
-    # (pred_date, category) 그룹별 종목코드 수집
-    pred_groups = {}  # key: (pred_date_str, category) -> set of codes
-    for pred in predictions:
-        category = pred.get("category", "today")
-        pred_date = pred.get("prediction_date", "")
-        if not pred_date:
-            continue
+    # 예측 1행/대장주 1행 프레임 (leader_stocks는 여기서 한 번만 디코딩)
+    preds, legs = build_frames(predictions)
+    pred_groups = group_codes(preds, legs)  # key: (pred_date_str, category) -> set of codes
 
-        key = (pred_date, category)
-        if key not in pred_groups:
-            pred_groups[key] = set()
-
-        leader_stocks = pred.get("leader_stocks", "[]")
-        if isinstance(leader_stocks, str):
-            try:
-                leader_stocks = json.loads(leader_stocks)
-            except json.JSONDecodeError:
-                leader_stocks = []
-        for s in leader_stocks:
-            code = s.get("code", "")
-            if code:
-                pred_groups[key].add(code)
-
-    # 그룹별 수익률 + 지수 수익률 조회
-    returns_by_group = {}   # key: (pred_date_str, category) -> {code: return_pct}
-    index_by_group = {}     # key: (pred_date_str, category) -> float
-    for (pred_date, category), codes in pred_groups.items():
-        if category == "today":
-            returns_by_group[(pred_date, category)] = fetch_daily_returns(kis_client, list(codes), pred_date)
-            index_by_group[(pred_date, category)] = fetch_daily_index_return(kis_client, pred_date)
-        else:
-            cal_days = category_cal_days.get(category, 12)
-            dt = datetime.strptime(pred_date, "%Y-%m-%d")
-            end = (dt + timedelta(days=cal_days)).strftime("%Y-%m-%d")
-            returns_by_group[(pred_date, category)] = fetch_stock_returns(kis_client, list(codes), pred_date, end)
-            index_by_group[(pred_date, category)] = fetch_index_return(kis_client, pred_date, end)
+    # 전체 그룹의 (종목, 기간)을 모아 종목당 1회 병렬 조회 + KOSPI 지수 1회 조회
+    returns_by_group, index_by_group = load_group_returns(PriceLoader(kis_client), pred_groups)
 
     all_codes = set()
     for codes in pred_groups.values():
@@ -149,62 +182,60 @@ def main():
         if missing:
             print(f"      ⚠ 수익률 미확보: {', '.join(sorted(missing))}")
 
-    # Step 3: 예측 평가
+    # Step 3: 예측 평가 (전체 예측 일괄 판정)
     print("\n[3/4] 예측 평가...")
+    attach_returns(preds, legs, returns_by_group, index_by_group)
+    due = due_mask(preds, force=bool(reevaluate_date))
+    statuses = np.where(due, evaluate_frame(preds, legs), "active")
     results = {"hit": 0, "missed": 0, "expired": 0, "active": 0}
+    evaluations = []  # (예측 행, status, actual_performance) — 마지막에 일괄 저장
+    legs_by_pred = {i: rows for i, rows in legs.groupby("pred", sort=False)}
 
-    for pred in predictions:
-        category = pred.get("category", "today")
-        pred_date = pred.get("prediction_date", "")
-        key = (pred_date, category)
-        returns = returns_by_group.get(key, {})
-        index_return = index_by_group.get(key, 0.0)
-
-        status = evaluate_prediction(pred, returns, index_return, force=bool(reevaluate_date))
+    for i, pred in enumerate(predictions):
+        status = str(statuses[i])
         results[status] += 1
+        if status not in ("hit", "missed", "expired"):
+            continue
 
-        theme_name = pred.get("theme_name", "N/A")
-
-        if status in ("hit", "missed", "expired"):
-            # 수익률 정보 수집 (로깅 및 저장 공용)
-            leader_stocks = pred.get("leader_stocks", "[]")
-            if isinstance(leader_stocks, str):
-                try:
-                    leader_stocks = json.loads(leader_stocks)
-                except json.JSONDecodeError:
-                    leader_stocks = []
-            perf = {}
-            perf_details = []
-            for s in leader_stocks:
-                code = s.get("code", "")
-                name = s.get("name", code)
-                if code and code in returns:
-                    perf[code] = returns[code]
-                    perf_details.append(f"{name}({code})={returns[code]:+.2f}%")
-                elif code:
+        # 수익률 정보 수집 (로깅 및 저장 공용)
+        perf = {}
+        perf_details = []
+        pred_legs = legs_by_pred.get(i)
+        if pred_legs is not None:
+            for code, name, ret in zip(pred_legs["code"], pred_legs["name"], pred_legs["ret"]):
+                if not np.isnan(ret):
+                    perf[code] = float(ret)
+                    perf_details.append(f"{name}({code})={ret:+.2f}%")
+                else:
                     perf_details.append(f"{name}({code})=N/A")
-            perf["index_return"] = index_return
+        perf["index_return"] = float(preds.at[i, "index_return"])
 
-            print(f"  [{status.upper()}] {theme_name} ({category}) — {', '.join(perf_details)}")
+        print(f"  [{status.upper()}] {preds.at[i, 'theme_name']} ({preds.at[i, 'category']}) — {', '.join(perf_details)}")
 
-            if not test_mode:
-                update_prediction_status(client, pred["id"], status, perf)
+        evaluations.append((pred, status, perf))
 
     print(f"\n  결과: hit={results['hit']}, missed={results['missed']}, "
           f"expired={results['expired']}, active={results['active']}")
+    if evaluations and not test_mode:
+        saved = store.update_statuses(evaluations)
+        print(f"  ✓ 평가 결과 {saved}건 일괄 저장")
+
+    if sweep_mode:
+        print_sweep(preds[due], legs, "이번 평가 대상")
 
     # Step 4: 정확도 리포트
     print("\n[4/4] 정확도 리포트...")
     if not test_mode:
-        report = calculate_accuracy_report(client)
-        print(f"  전체: {report['hit']}/{report['total']} ({report['accuracy']}%)")
-        for conf, data in report.get("by_confidence", {}).items():
-            print(f"  신뢰도 {conf}: {data['hit']}/{data['total']} ({data['accuracy']}%)")
-        for cat, data in report.get("by_category", {}).items():
-            print(f"  카테고리 {cat}: {data['hit']}/{data['total']} ({data['accuracy']}%)")
+        print_report(calculate_accuracy_report(store))
     else:
         print("  ⏭ 정확도 리포트 건너뜀 (테스트 모드)")
 
+    if sweep_mode:
+        # 저장된 actual_performance 수익률로 전체 이력 재판정 (가격 재조회 없음)
+        history_preds, history_legs = build_frames(store.evaluated_predictions())
+        print_sweep(history_preds, history_legs, "저장된 hit/missed 전체 이력")
+
+    print(f"\n  저장소 요청 {store.round_trips}회")
     print("\n" + "=" * 50)
     print("✅ 예측 백테스팅 완료")
     print("=" * 50)
@@ -11,7 +11,6 @@ Usage:
     python collect_investor_data.py          # 전체 실행
     python collect_investor_data.py --test   # 테스트 (텔레그램 미발송, 파일 미저장)
 """
-import json
 import sys
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -19,44 +18,62 @@ from datetime import datetime
 from pathlib import Path
 
 from config.settings import *  # noqa: F401,F403 — 환경변수 로드
+from modules.json_store import read_json
+from modules.latest_sections import update_latest
+from modules.snapshot_log import append_snapshot
 from modules.kis_client import KISClient
 from modules.kis_rank import KISRankAPI
-from modules.telegram import TelegramSender
+from modules.stock_record import StockRegistry
+from modules.telegram import TelegramQueue, TelegramSender
 from modules.utils import KST
 
 ROOT_DIR = Path(__file__).parent
 LATEST_PATH = ROOT_DIR / "frontend" / "public" / "data" / "latest.json"
 FORECAST_PATH = ROOT_DIR / "frontend" / "public" / "data" / "theme-forecast.json"
 
+# 이 스크립트가 갱신하는 latest.json 필드 — 저장 시 잠금 후 최신 파일에 이 필드만 반영
+# (섹션 파일도 이 필드들만 비교·갱신)
+OWNED_KEYS = (
+    "timestamp", "investor_data", "investor_estimated", "investor_updated_at", "investor_intraday",
+    "program_trade", "volume", "trading_value", "fluctuation", "fluctuation_direct",
+)
+# 종목코드별 dict 필드 — 덮어쓰지 않고 병합 (수집 중 다른 스크립트가 추가한 종목 유지)
+MERGED_KEYS = ("history", "criteria_data", "member_data")
+# 이 스크립트가 새로 수집하는 랭킹 섹션 — 현재가/등락률이 최신인 종목의 기준
+PRICE_SECTIONS = ("volume", "trading_value", "fluctuation", "fluctuation_direct")
+
+# 장중 수급 스냅샷 라운드 (KIS 추정 수급 등록 + 1분) — 상주 스케줄러도 이 시각에 실행
+INTRADAY_SCHEDULE = [
+    {"time": "09:31", "round": 1},  # 외국인 09:30 반영
+    {"time": "10:01", "round": 2},  # 기관 10:00 반영
+    {"time": "11:31", "round": 3},  # 외국인+기관 11:30 반영
+    {"time": "13:21", "round": 4},  # 외국인+기관 13:20 반영
+    {"time": "14:31", "round": 5},  # 외국인+기관 14:30 반영
+]
+# 장마감 후 확정 수급 수집 시각
+CLOSING_SCHEDULE = ["15:45", "18:05"]
+
 
 def load_json(path: Path) -> dict:
-    if not path.exists():
-        return {}
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return read_json(path, default={})
 
 
-def extract_all_codes(data: dict) -> list[dict]:
-    """latest.json에서 모든 종목코드+이름 추출 (중복 제거)"""
-    seen = {}
-    sections = ["rising", "falling", "volume", "trading_value"]
-    for section in sections:
-        section_data = data.get(section, {})
-        for market in ["kospi", "kosdaq"]:
-            for stock in section_data.get(market, []):
-                code = stock.get("code", "")
-                if code and code not in seen:
-                    seen[code] = stock.get("name", code)
+def _merge_into_latest(current: dict, latest: dict) -> None:
+    """update_json 콜백: 최신 latest.json에 이 스크립트가 갱신한 필드만 반영"""
+    for key in OWNED_KEYS:
+        if key in latest:
+            current[key] = latest[key]
+    for key in MERGED_KEYS:
+        if latest.get(key):
+            merged = current.get(key) or {}
+            merged.update(latest[key])
+            current[key] = merged
 
-    for section in ["fluctuation", "fluctuation_direct"]:
-        section_data = data.get(section, {})
-        for key in ["kospi_up", "kospi_down", "kosdaq_up", "kosdaq_down"]:
-            for stock in section_data.get(key, []):
-                code = stock.get("code", "")
-                if code and code not in seen:
-                    seen[code] = stock.get("name", code)
 
-    return [{"code": c, "name": n} for c, n in seen.items()]
+def extract_all_codes(data: dict) -> list[dict]:
+    """latest.json에서 모든 종목코드+이름 추출 (중복 제거)"""
+    registry = StockRegistry(data)
+    return [{"code": code, "name": registry.get(code).name} for code in registry]
 
 
 def extract_leader_codes(forecast: dict, theme_analysis: dict = None) -> set[str]:
@@ -84,11 +101,7 @@ def extract_leader_codes(forecast: dict, theme_analysis: dict = None) -> set[str
 
 def extract_top20_stocks(data: dict) -> list[dict]:
     """latest.json에서 거래대금 TOP20 종목 추출 (KOSPI+KOSDAQ 합산 후 거래대금 순 정렬)"""
-    stocks = []
-    tv_data = data.get("trading_value", {})
-    for market in ["kospi", "kosdaq"]:
-        for stock in tv_data.get(market, []):
-            stocks.append(stock)
+    stocks = [s for _, _, s in StockRegistry(data, sections=("trading_value",)).entries()]
     stocks.sort(key=lambda x: x.get("trading_value", 0), reverse=True)
     return stocks[:20]
 
@@ -304,13 +317,6 @@ def main():
 
         # 장중 수급 스냅샷 누적 (추정 데이터일 때만)
         if is_estimated:
-            INTRADAY_SCHEDULE = [
-                {"time": "09:31", "round": 1},  # 외국인 09:30 반영
-                {"time": "10:01", "round": 2},  # 기관 10:00 반영
-                {"time": "11:31", "round": 3},  # 외국인+기관 11:30 반영
-                {"time": "13:21", "round": 4},  # 외국인+기관 13:20 반영
-                {"time": "14:31", "round": 5},  # 외국인+기관 14:30 반영
-            ]
             today_str = now.strftime("%Y-%m-%d")
             time_str = now.strftime("%H:%M")
 
@@ -331,34 +337,17 @@ def main():
                 existing_rounds = {s["round"] for s in intraday.get("snapshots", [])}
                 if current_round not in existing_rounds:
                     # price_map 구축 (랭킹 데이터에서 현재가/등락률 추출)
-                    price_map = {}
-                    # 1차: 현재 수집된 랭킹 데이터
-                    for section_data in [volume_data, trading_value_data]:
-                        for mkt in ["kospi", "kosdaq"]:
-                            for s in section_data.get(mkt, []):
-                                code = s.get("code")
-                                if code and code not in price_map:
-                                    price_map[code] = (s.get("current_price", 0), s.get("change_rate", 0.0))
-                    for section_data in [fluctuation_data, fluctuation_direct_data]:
-                        for k in ["kospi_up", "kospi_down", "kosdaq_up", "kosdaq_down"]:
-                            for s in section_data.get(k, []):
-                                code = s.get("code")
-                                if code and code not in price_map:
-                                    price_map[code] = (s.get("current_price", 0), s.get("change_rate", 0.0))
-                    # 2차 fallback: latest.json의 기존 랭킹 데이터
-                    if not price_map:
-                        for section_data in [latest.get("volume", {}), latest.get("trading_value", {})]:
-                            for mkt in ["kospi", "kosdaq"]:
-                                for s in section_data.get(mkt, []):
-                                    code = s.get("code")
-                                    if code and code not in price_map:
-                                        price_map[code] = (s.get("current_price", 0), s.get("change_rate", 0.0))
-                        for section_data in [latest.get("fluctuation", {}), latest.get("fluctuation_direct", {})]:
-                            for k in ["kospi_up", "kospi_down", "kosdaq_up", "kosdaq_down"]:
-                                for s in section_data.get(k, []):
-                                    code = s.get("code")
-                                    if code and code not in price_map:
-                                        price_map[code] = (s.get("current_price", 0), s.get("change_rate", 0.0))
+                    # 1차: 현재 수집된 랭킹 데이터, 2차 fallback: latest.json의 기존 랭킹 데이터
+                    ranked = StockRegistry({
+                        "volume": volume_data, "trading_value": trading_value_data,
+                        "fluctuation": fluctuation_data, "fluctuation_direct": fluctuation_direct_data,
+                    }, sections=PRICE_SECTIONS)
+                    if not ranked:
+                        ranked = StockRegistry(latest, sections=PRICE_SECTIONS)
+                    price_map = {
+                        code: (s.get("current_price", 0), s.get("change_rate", 0.0))
+                        for code, s in ranked.items()
+                    }
 
                     snapshot_data = {}
                     for code, inv in investor_data.items():
@@ -410,26 +399,14 @@ def main():
 
         # 종목별 현재가/등락률 갱신 — 랭킹 API에 없는 종목만 개별 조회
         # 랭킹 갱신된 섹션에서 이미 가격이 최신인 종목코드 수집
-        refreshed_codes = set()
-        for section_key in ["volume", "trading_value"]:
-            for market_key in ["kospi", "kosdaq"]:
-                for s in latest.get(section_key, {}).get(market_key, []):
-                    if s.get("code"):
-                        refreshed_codes.add(s["code"])
-        for section_key in ["fluctuation", "fluctuation_direct"]:
-            for k in ["kospi_up", "kospi_down", "kosdaq_up", "kosdaq_down"]:
-                for s in latest.get(section_key, {}).get(k, []):
-                    if s.get("code"):
-                        refreshed_codes.add(s["code"])
+        ranked = StockRegistry(latest, sections=PRICE_SECTIONS)
 
         # rising/falling에서 미갱신 종목 수집 (참조 보존)
-        stale_stocks = []  # (종목코드, 종목 dict 참조) 리스트
-        for section_key in ["rising", "falling"]:
-            for market_key in ["kospi", "kosdaq"]:
-                for s in latest.get(section_key, {}).get(market_key, []):
-                    code = s.get("code", "")
-                    if code and code not in refreshed_codes:
-                        stale_stocks.append((code, s))
+        stale_stocks = [  # (종목코드, 종목 dict 참조) 리스트
+            (s["code"], s)
+            for _, _, s in StockRegistry(latest, sections=("rising", "falling")).entries()
+            if s["code"] not in ranked
+        ]
 
         if stale_stocks:
             print(f"\n[종목 현재가 갱신] 랭킹 미포함 {len(stale_stocks)}개 종목 조회")
@@ -471,19 +448,7 @@ def main():
         # 신규 진입 종목 데이터 보충 (history + criteria + member)
         # 랭킹 갱신으로 새로 나타난 종목은 history 등이 없으므로 보충
         existing_history = latest.get("history") or {}
-        new_codes = set()
-        for section_key in ["volume", "trading_value"]:
-            for market in ["kospi", "kosdaq"]:
-                for stock in latest.get(section_key, {}).get(market, []):
-                    code = stock.get("code", "")
-                    if code and code not in existing_history:
-                        new_codes.add(code)
-        for section_key in ["fluctuation", "fluctuation_direct"]:
-            for key in ["kospi_up", "kospi_down", "kosdaq_up", "kosdaq_down"]:
-                for stock in latest.get(section_key, {}).get(key, []):
-                    code = stock.get("code", "")
-                    if code and code not in existing_history:
-                        new_codes.add(code)
+        new_codes = [code for code in ranked if code not in existing_history]
 
         if new_codes:
             print(f"\n[신규 종목 데이터 보충] {len(new_codes)}개")
@@ -501,19 +466,7 @@ def main():
                 # criteria 평가 (history 기반)
                 from modules.stock_criteria import evaluate_all_stocks
                 existing_criteria = latest.get("criteria_data") or {}
-                new_stock_map = {}
-                for section_key in ["volume", "trading_value"]:
-                    for market in ["kospi", "kosdaq"]:
-                        for stock in latest.get(section_key, {}).get(market, []):
-                            code = stock.get("code", "")
-                            if code in new_codes and code not in new_stock_map:
-                                new_stock_map[code] = stock
-                for section_key in ["fluctuation", "fluctuation_direct"]:
-                    for key in ["kospi_up", "kospi_down", "kosdaq_up", "kosdaq_down"]:
-                        for stock in latest.get(section_key, {}).get(key, []):
-                            code = stock.get("code", "")
-                            if code in new_codes and code not in new_stock_map:
-                                new_stock_map[code] = stock
+                new_stock_map = {code: ranked.stock(code) for code in new_codes}
                 new_criteria = evaluate_all_stocks(
                     all_stocks=list(new_stock_map.values()),
                     history_data=existing_history,
@@ -547,8 +500,12 @@ def main():
         except Exception as e:
             print(f"  ⚠ 거래원 수집 실패 (기존 데이터로 계속): {e}")
 
-        with open(LATEST_PATH, "w", encoding="utf-8") as f:
-            json.dump(latest, f, ensure_ascii=False, indent=2)
+        saved = update_latest(
+            LATEST_PATH.parent,
+            lambda current: _merge_into_latest(current, latest),
+            keys=OWNED_KEYS + MERGED_KEYS,
+        )
+        append_snapshot(LATEST_PATH.parent, saved)
         print(f"\n  latest.json 갱신 완료")
     else:
         print(f"\n  [테스트] latest.json 갱신 건너뜀")
@@ -563,16 +520,19 @@ def main():
     print(f"\n[텔레그램] 대장주 수급 {len(leader_investor)}개 종목")
 
     telegram = TelegramSender()
+    outbox = None if test_mode else TelegramQueue(telegram)
+    mode = "plain" if test_mode else "html"  # 테스트 모드 미리보기는 태그 없이
 
     if not leader_investor:
         print("  수급 데이터 있는 대장주 없음 — 전송 건너뜀")
     else:
-        msg = telegram.format_investor_data(leader_investor, leader_info, is_estimated, member_data)
+        msg = telegram.format_investor_data(
+            leader_investor, leader_info, is_estimated, member_data, mode=mode,
+        )
         if test_mode:
             print(f"\n--- 텔레그램 메시지 미리보기 (대장주) ---\n{msg}\n---")
         else:
-            ok = telegram.send_message(msg)
-            print(f"  전송 {'성공' if ok else '실패'}")
+            outbox.put(msg, "대장주 수급")
 
     # 7. 거래대금 TOP20 수급 텔레그램 전송
     top20_stocks = extract_top20_stocks(latest)
@@ -583,13 +543,18 @@ def main():
     print(f"\n[텔레그램] 거래대금 TOP20 수급 {len(top20_with_data)}개 종목 (대장주 제외)")
 
     if top20_with_data:
-        top20_msg = telegram.format_top20_investor_data(investor_data, top20_with_data, is_estimated, member_data)
+        top20_msg = telegram.format_top20_investor_data(
+            investor_data, top20_with_data, is_estimated, member_data, mode=mode,
+        )
 
         if test_mode:
             print(f"\n--- 텔레그램 메시지 미리보기 (거래대금 TOP20) ---\n{top20_msg}\n---")
         else:
-            ok2 = telegram.send_message(top20_msg)
-            print(f"  전송 {'성공' if ok2 else '실패'}")
+            outbox.put(top20_msg, "거래대금 TOP20 수급")
+
+    if outbox:
+        for result in outbox.close():
+            print(f"  {result['label']} 전송 {'성공' if result['ok'] else '실패'}")
 
     print("\n수급 수집 완료")
 
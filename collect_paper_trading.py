@@ -14,12 +14,18 @@ from __future__ import annotations
 import json
 import argparse
 import subprocess
-import time
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from modules.kis_client import KISClient
+from modules.kis_client import KISClient, get_kis_client
+from modules import json_backend
+from modules.history_index import IndexManager
+from modules.snapshot_log import read_snapshot_log, snapshot_entry
+from modules.stock_record import decode_ranking_snapshot
+from modules.json_store import atomic_write_json, file_lock
+from modules.minute_bars import MinuteBarCache
 
 # 프로젝트 경로
 ROOT_DIR = Path(__file__).parent
@@ -31,17 +37,36 @@ LATEST_PATH = DATA_DIR / "latest.json"
 # 보관 기간 (일)
 RETENTION_DAYS = 30
 
+# 종목별 시세/분봉 동시 조회 수
+STOCK_WORKERS = 5
+
 
 def load_latest_json() -> dict:
     """latest.json 로드"""
     if not LATEST_PATH.exists():
         raise FileNotFoundError(f"latest.json이 없습니다: {LATEST_PATH}")
 
-    with open(LATEST_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return json_backend.load(LATEST_PATH)
 
 
 def get_all_latest_snapshots(today_str: str) -> list[dict]:
+    """오늘 모든 latest.json 스냅샷 (시간순 정렬)
+
+    스냅샷 로그(data/snapshot-log/)를 한 번에 읽고, 로그가 없으면 git 히스토리에서 추출한다.
+    각 항목은 snapshot_log 로그 항목 형식: {timestamp, leaders, prices: {code: [price, market]}}
+    """
+    snapshots = read_snapshot_log(DATA_DIR, today_str)
+    if snapshots:
+        print(f"[스냅샷] 스냅샷 로그 {len(snapshots)}개 (시간순)")
+        for s in snapshots:
+            print(f"  - {s['timestamp']}")
+        return snapshots
+
+    print("[스냅샷] 스냅샷 로그 없음 (fallback: git 히스토리)")
+    return get_git_snapshots(today_str)
+
+
+def get_git_snapshots(today_str: str) -> list[dict]:
     """git 히스토리에서 오늘 모든 latest.json 버전 추출 (시간순 정렬)"""
     relative_path = "frontend/public/data/latest.json"
 
@@ -71,13 +96,10 @@ def get_all_latest_snapshots(today_str: str) -> list[dict]:
                 )
                 if show_result.returncode != 0:
                     continue
-                data = json.loads(show_result.stdout)
-                timestamp = data.get("timestamp", "")
-                if timestamp:
-                    snapshots.append({
-                        "timestamp": timestamp,
-                        "data": data,
-                    })
+                # 순위 섹션 + theme_analysis만 디코딩 (news/history 등은 건너뜀)
+                entry = snapshot_entry(decode_ranking_snapshot(show_result.stdout))
+                if entry["timestamp"]:
+                    snapshots.append(entry)
             except (json.JSONDecodeError, subprocess.TimeoutExpired):
                 continue
 
@@ -103,54 +125,20 @@ def get_all_latest_snapshots(today_str: str) -> list[dict]:
         return []
 
 
-def extract_leader_stocks(data: dict) -> list[dict]:
-    """theme_analysis에서 대장주 추출"""
-    theme_analysis = data.get("theme_analysis")
-    if not theme_analysis:
-        print("[경고] theme_analysis가 없습니다.")
-        return []
-
-    stocks = []
-    seen_codes = set()
-
-    for theme in theme_analysis.get("themes", []):
-        theme_name = theme.get("theme_name", "")
-        for stock in theme.get("leader_stocks", []):
-            code = stock.get("code", "")
-            name = stock.get("name", "")
-            if code and code not in seen_codes:
-                seen_codes.add(code)
-                stocks.append({
-                    "code": code,
-                    "name": name,
-                    "theme": theme_name,
-                })
+def extract_leader_stocks(snapshot: dict) -> list[dict]:
+    """스냅샷 로그 항목에서 대장주 추출"""
+    if not snapshot.get("leaders"):
+        print("[경고] 대장주가 없습니다 (theme_analysis 없음).")
+    return snapshot.get("leaders", [])
 
-    return stocks
 
-
-def find_morning_price(data: dict, code: str) -> tuple[Optional[int], Optional[str]]:
-    """latest.json의 모든 섹션에서 종목의 오전 current_price + 시장 찾기.
+def find_morning_price(snapshot: dict, code: str) -> tuple[Optional[int], Optional[str]]:
+    """스냅샷 로그 항목에서 종목의 오전 current_price + 시장 찾기.
+    rising → falling → volume → trading_value → fluctuation 순으로 첫 등장 기준.
     Returns: (price, market) — market은 "KOSPI" 또는 "KOSDAQ"
     """
-    sections = ["rising", "falling", "volume", "trading_value"]
-    for section in sections:
-        section_data = data.get(section, {})
-        for market in ["kospi", "kosdaq"]:
-            for stock in section_data.get(market, []):
-                if stock.get("code") == code:
-                    return stock.get("current_price"), market.upper()
-
-    # fluctuation 섹션도 검색
-    for section in ["fluctuation", "fluctuation_direct"]:
-        section_data = data.get(section, {})
-        for key in ["kospi_up", "kospi_down", "kosdaq_up", "kosdaq_down"]:
-            for stock in section_data.get(key, []):
-                if stock.get("code") == code:
-                    mkt = "KOSPI" if "kospi" in key else "KOSDAQ"
-                    return stock.get("current_price"), mkt
-
-    return None, None
+    price, market = snapshot["prices"].get(code, (None, None))
+    return price, market
 
 
 def get_stock_prices(client: KISClient, code: str) -> Optional[dict]:
@@ -177,94 +165,94 @@ def get_stock_prices(client: KISClient, code: str) -> Optional[dict]:
         return None
 
 
-def find_high_price_time(client: KISClient, code: str, high_price: int) -> Optional[str]:
-    """분봉 데이터에서 최고가 달성 시간 찾기"""
-    path = "/uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice"
-    tr_id = "FHKST03010200"
-    cursor = "153000"
-
-    for _ in range(15):
-        params = {
-            "FID_ETC_CLS_CODE": "",
-            "FID_COND_MRKT_DIV_CODE": "J",
-            "FID_INPUT_ISCD": code,
-            "FID_INPUT_HOUR_1": cursor,
-            "FID_PW_DATA_INCU_YN": "N",
-        }
-        try:
-            result = client.request("GET", path, tr_id, params=params)
-            items = result.get("output2", [])
-            if not items:
-                break
-            for item in items:
-                candle_high = int(item.get("stck_hgpr", "0"))
-                if candle_high >= high_price:
-                    t = item.get("stck_cntg_hour", "")
-                    if t:
-                        return f"{t[:2]}:{t[2:4]}"
-            cursor = items[-1].get("stck_cntg_hour", "")
-            if not cursor or cursor <= "090000":
-                break
-            time.sleep(0.1)
-        except Exception:
-            break
-
-    return None
-
-
-def find_high_price_after(client: KISClient, code: str, after_time: str) -> Optional[dict]:
-    """매수 시점 이후의 최고가 + 달성 시간 조회
-
-    분봉 데이터를 15:30부터 역순으로 탐색하여
-    after_time 이후 캔들 중 최고가를 찾습니다.
-
-    Args:
-        client: KIS API 클라이언트
-        code: 종목코드
-        after_time: 매수 시점 "HH:MM" (예: "09:22")
+def evaluate_stock(
+    client: KISClient,
+    bars_cache: MinuteBarCache,
+    stock: dict,
+    morning: dict,
+    buy_time_str: str,
+) -> tuple[Optional[dict], list[str]]:
+    """종목 1개의 매수가/종가/최고가 수익률 계산
 
     Returns:
-        {"high_price": int, "high_time": "HH:MM"} or None
+        (결과 dict 또는 None, 출력 메시지 목록) — 병렬 실행 후 종목 순서대로 출력
     """
-    path = "/uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice"
-    tr_id = "FHKST03010200"
-    cursor = "153000"
-    after_hhmmss = after_time.replace(":", "") + "00"
-
-    best_price = 0
-    best_time = None
-
-    for _ in range(15):
-        params = {
-            "FID_ETC_CLS_CODE": "",
-            "FID_COND_MRKT_DIV_CODE": "J",
-            "FID_INPUT_ISCD": code,
-            "FID_INPUT_HOUR_1": cursor,
-            "FID_PW_DATA_INCU_YN": "N",
-        }
-        try:
-            result = client.request("GET", path, tr_id, params=params)
-            items = result.get("output2", [])
-            if not items:
-                break
-            for item in items:
-                t = item.get("stck_cntg_hour", "")
-                if t <= after_hhmmss:
-                    continue
-                candle_high = int(item.get("stck_hgpr", "0"))
-                if candle_high > best_price:
-                    best_price = candle_high
-                    best_time = f"{t[:2]}:{t[2:4]}"
-            cursor = items[-1].get("stck_cntg_hour", "")
-            if not cursor or cursor <= "090000":
-                break
-            time.sleep(0.1)
-        except Exception:
-            break
-
-    if best_price > 0 and best_time:
-        return {"high_price": best_price, "high_time": best_time}
-    return None
+    code = stock["code"]
+    name = stock["name"]
+    theme = stock["theme"]
+    lines: list[str] = []
+
+    # 오전 매수가 (첫 번째 스냅샷 기준)
+    buy_price, market = find_morning_price(morning, code)
+    if buy_price is None:
+        return None, [f"{name}({code}) - 오전 가격 없음, 건너뜀"]
+
+    prices = get_stock_prices(client, code)
+    if prices is None:
+        return None, [f"{name}({code}) - 가격 조회 실패, 건너뜀"]
+
+    close_price = prices["close_price"]
+    high_price = prices["high_price"]
+    high_price_adjusted = False
+
+    # 최고가 달성 시간 조회 (당일 분봉 1회 조회 후 메모리에서 탐색)
+    bars = bars_cache.get(code)
+    high_time = bars.high_time(high_price)
+
+    # 매수 시점 이후 최고가 검증
+    post_buy_searched = False
+    if high_time and buy_time_str and high_time <= buy_time_str:
+        # 최고가가 매수 시점 이전/동일 분 → 매수 후 최고가 재탐색
+        post_buy_searched = True
+        lines.append(f"  ↳ 최고가({high_time}) ≤ 매수({buy_time_str}) → 매수 후 최고가 탐색")
+        adjusted = bars.high_after(buy_time_str)
+        if adjusted:
+            high_price = adjusted["high_price"]
+            high_time = adjusted["high_time"]
+            lines.append(f"  ↳ 매수 후 최고가: {high_price:,}원 ({high_time})")
+        else:
+            # 분봉 탐색 실패 → 종가 적용
+            high_price = close_price
+            high_time = "15:30"
+            high_price_adjusted = True
+            lines.append(f"  ↳ 분봉 탐색 실패 → 종가({close_price:,}원) 적용")
+
+    # 최종 안전장치: 매수가 > 고가 (데이터 소스 차이) 보정
+    # 매수 후 재탐색 완료 시에는 적용하지 않음 (갭하락 종목은 매수 후 최고가 < 매수가가 정상)
+    if not post_buy_searched and high_price < buy_price:
+        lines.append(f"  ↳ 고가({high_price:,}) < 매수({buy_price:,}) → 매수가를 고가로 적용")
+        high_price = buy_price
+        if buy_time_str:
+            high_time = buy_time_str
+        high_price_adjusted = False
+
+    # 종가 기준 수익률
+    profit_amount = close_price - buy_price
+    profit_rate = round((profit_amount / buy_price) * 100, 2) if buy_price > 0 else 0
+
+    # 최고가 기준 수익률
+    high_profit_amount = high_price - buy_price
+    high_profit_rate = round((high_profit_amount / buy_price) * 100, 2) if buy_price > 0 else 0
+
+    result = {
+        "code": code,
+        "name": name,
+        "theme": theme,
+        **({"market": market} if market else {}),
+        "buy_price": buy_price,
+        "close_price": close_price,
+        "profit_rate": profit_rate,
+        "profit_amount": profit_amount,
+        "high_price": high_price,
+        "high_time": high_time,
+        "high_profit_rate": high_profit_rate,
+        "high_profit_amount": high_profit_amount,
+        **({"high_price_adjusted": True} if high_price_adjusted else {}),
+    }
+
+    sign = "+" if profit_rate >= 0 else ""
+    lines.insert(0, f"{name}({code}): {buy_price:,} -> {close_price:,} ({sign}{profit_rate}%) [최고 {high_price:,}]")
+    return result, lines
 
 
 def collect_paper_trading_data(
@@ -290,12 +278,11 @@ def collect_paper_trading_data(
 
     if snapshots:
         # 첫 번째(가장 이른) 스냅샷을 기본 매수가로 사용
-        data = snapshots[0]["data"]
-        morning_timestamp = snapshots[0]["timestamp"]
+        morning = snapshots[0]
     else:
         # fallback: 현재 latest.json
-        data = load_latest_json()
-        morning_timestamp = data.get("timestamp", "")
+        morning = snapshot_entry(load_latest_json())
+    morning_timestamp = morning["timestamp"]
 
     # 대장주 추출
     if stocks_override:
@@ -312,17 +299,17 @@ def collect_paper_trading_data(
         all_leader_stocks = {}  # code -> {code, name, theme} (첫 등장 기준)
 
         for snap in snapshots:
-            leaders = extract_leader_stocks(snap["data"])
+            leaders = snap["leaders"]
             per_snapshot_leaders.append(leaders)
             for leader in leaders:
                 if leader["code"] not in all_leader_stocks:
                     all_leader_stocks[leader["code"]] = leader
 
         # 기본 대장주 = 첫 스냅샷
-        leader_stocks = per_snapshot_leaders[0] if per_snapshot_leaders else extract_leader_stocks(data)
+        leader_stocks = per_snapshot_leaders[0] if per_snapshot_leaders else extract_leader_stocks(morning)
         # fallback: 스냅샷 없으면 현재 데이터에서 추출
         if not all_leader_stocks:
-            leader_stocks = extract_leader_stocks(data)
+            leader_stocks = extract_leader_stocks(morning)
             all_leader_stocks = {s["code"]: s for s in leader_stocks}
 
     all_codes = list(all_leader_stocks.keys())
@@ -339,7 +326,7 @@ def collect_paper_trading_data(
     for i, snap in enumerate(snapshots):
         snap_prices = {}
         for code in all_codes:
-            price, _ = find_morning_price(snap["data"], code)
+            price, _ = find_morning_price(snap, code)
             if price is not None:
                 snap_prices[code] = price
         leaders = per_snapshot_leaders[i] if i < len(per_snapshot_leaders) else []
@@ -354,92 +341,25 @@ def collect_paper_trading_data(
         print(f"\n[스냅샷] 대장주 가격 스냅샷 {len(price_snapshots)}개 생성")
 
     # KIS 클라이언트 초기화
-    client = KISClient()
+    client = get_kis_client()
 
-    # 모든 고유 종목에 대해 KIS API 호출
+    # 모든 고유 종목에 대해 KIS API 병렬 호출 (요청 간격은 KISClient rate limiter가 공유)
     all_stock_list = list(all_leader_stocks.values())
-    results = []
-    for i, stock in enumerate(all_stock_list):
-        code = stock["code"]
-        name = stock["name"]
-        theme = stock["theme"]
-
-        # 오전 매수가 (첫 번째 스냅샷 기준)
-        buy_price, market = find_morning_price(data, code)
-        if buy_price is None:
-            print(f"  [{i+1}/{len(all_stock_list)}] {name}({code}) - 오전 가격 없음, 건너뜀")
-            continue
-
-        # 종가 조회 (API 호출 간격)
-        if i > 0:
-            time.sleep(0.3)
-
-        prices = get_stock_prices(client, code)
-        if prices is None:
-            print(f"  [{i+1}/{len(all_stock_list)}] {name}({code}) - 가격 조회 실패, 건너뜀")
-            continue
-
-        close_price = prices["close_price"]
-        high_price = prices["high_price"]
-        high_price_adjusted = False
+    bars_cache = MinuteBarCache(client)
+    buy_time_str = morning_timestamp.split(" ")[1][:5] if " " in morning_timestamp else ""
+    with ThreadPoolExecutor(max_workers=STOCK_WORKERS) as pool:
+        evaluated = list(pool.map(
+            lambda stock: evaluate_stock(client, bars_cache, stock, morning, buy_time_str),
+            all_stock_list,
+        ))
 
-        # 최고가 달성 시간 조회
-        high_time = find_high_price_time(client, code, high_price)
-
-        # 매수 시점 이후 최고가 검증
-        buy_time_str = morning_timestamp.split(" ")[1][:5] if " " in morning_timestamp else ""
-        post_buy_searched = False
-        if high_time and buy_time_str and high_time <= buy_time_str:
-            # 최고가가 매수 시점 이전/동일 분 → 매수 후 최고가 재탐색
-            post_buy_searched = True
-            print(f"    ↳ 최고가({high_time}) ≤ 매수({buy_time_str}) → 매수 후 최고가 탐색")
-            adjusted = find_high_price_after(client, code, buy_time_str)
-            if adjusted:
-                high_price = adjusted["high_price"]
-                high_time = adjusted["high_time"]
-                print(f"    ↳ 매수 후 최고가: {high_price:,}원 ({high_time})")
-            else:
-                # 분봉 탐색 실패 → 종가 적용
-                high_price = close_price
-                high_time = "15:30"
-                high_price_adjusted = True
-                print(f"    ↳ 분봉 탐색 실패 → 종가({close_price:,}원) 적용")
-
-        # 최종 안전장치: 매수가 > 고가 (데이터 소스 차이) 보정
-        # 매수 후 재탐색 완료 시에는 적용하지 않음 (갭하락 종목은 매수 후 최고가 < 매수가가 정상)
-        if not post_buy_searched and high_price < buy_price:
-            print(f"    ↳ 고가({high_price:,}) < 매수({buy_price:,}) → 매수가를 고가로 적용")
-            high_price = buy_price
-            if buy_time_str:
-                high_time = buy_time_str
-            high_price_adjusted = False
-
-        # 종가 기준 수익률
-        profit_amount = close_price - buy_price
-        profit_rate = round((profit_amount / buy_price) * 100, 2) if buy_price > 0 else 0
-
-        # 최고가 기준 수익률
-        high_profit_amount = high_price - buy_price
-        high_profit_rate = round((high_profit_amount / buy_price) * 100, 2) if buy_price > 0 else 0
-
-        results.append({
-            "code": code,
-            "name": name,
-            "theme": theme,
-            **({"market": market} if market else {}),
-            "buy_price": buy_price,
-            "close_price": close_price,
-            "profit_rate": profit_rate,
-            "profit_amount": profit_amount,
-            "high_price": high_price,
-            "high_time": high_time,
-            "high_profit_rate": high_profit_rate,
-            "high_profit_amount": high_profit_amount,
-            **({"high_price_adjusted": True} if high_price_adjusted else {}),
-        })
-
-        sign = "+" if profit_rate >= 0 else ""
-        print(f"  [{i+1}/{len(all_stock_list)}] {name}({code}): {buy_price:,} -> {close_price:,} ({sign}{profit_rate}%) [최고 {high_price:,}]")
+    results = []
+    for i, (result, lines) in enumerate(evaluated):
+        print(f"  [{i+1}/{len(all_stock_list)}] {lines[0]}")
+        for line in lines[1:]:
+            print(f"  {line}")
+        if result is not None:
+            results.append(result)
 
     if not results:
         print("[결과] 수집된 종목이 없습니다.")
@@ -506,85 +426,49 @@ def save_paper_trading_data(result_data: dict):
 
     # 일별 파일 저장
     file_path = PAPER_TRADING_DIR / f"{trade_date}.json"
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(result_data, f, ensure_ascii=False, indent=2)
+    atomic_write_json(file_path, result_data)
     print(f"\n[저장] {file_path}")
 
-    # 인덱스 갱신
+    # 인덱스 갱신 + 30일 이전 파일 정리
     update_index(result_data)
 
-    # 30일 이전 파일 정리
-    cleanup_old_files()
-
-
-def update_index(result_data: dict):
-    """인덱스 파일 갱신"""
-    # 기존 인덱스 로드
-    if INDEX_PATH.exists():
-        with open(INDEX_PATH, "r", encoding="utf-8") as f:
-            index = json.load(f)
-    else:
-        index = {"updated_at": "", "entries": []}
 
+def _index_entry(result_data: dict) -> dict:
+    """결과 데이터 → 인덱스 항목"""
     trade_date = result_data["trade_date"]
     summary = result_data["summary"]
-
-    new_entry = {
+    return {
         "date": trade_date,
         "filename": f"{trade_date}.json",
         "total_profit_rate": summary["total_profit_rate"],
         "stock_count": summary["total_stocks"],
     }
 
-    # 같은 날짜 항목 업데이트 또는 추가
-    entries = index.get("entries", [])
-    found = False
-    for i, entry in enumerate(entries):
-        if entry["date"] == trade_date:
-            entries[i] = new_entry
-            found = True
-            break
-    if not found:
-        entries.append(new_entry)
-
-    # 날짜 내림차순 정렬
-    entries.sort(key=lambda e: e["date"], reverse=True)
-
-    index["updated_at"] = result_data["collected_at"]
-    index["entries"] = entries
-
-    with open(INDEX_PATH, "w", encoding="utf-8") as f:
-        json.dump(index, f, ensure_ascii=False, indent=2)
-    print(f"[저장] {INDEX_PATH}")
 
+def _index_entry_from_file(file_path: Path) -> Optional[dict]:
+    """인덱스 재구성용: 일별 파일에서 항목 복원"""
+    try:
+        return _index_entry(json_backend.load(file_path))
+    except (json.JSONDecodeError, OSError, KeyError):
+        return None
 
-def cleanup_old_files():
-    """30일 이전 파일 정리"""
-    cutoff = datetime.now() - timedelta(days=RETENTION_DAYS)
-    cutoff_str = cutoff.strftime("%Y-%m-%d")
 
-    removed = 0
-    for file in PAPER_TRADING_DIR.glob("*.json"):
-        if file.stem < cutoff_str:
-            file.unlink()
-            removed += 1
+def _index_manager() -> IndexManager:
+    return IndexManager(PAPER_TRADING_DIR, INDEX_PATH, _index_entry_from_file, retention_days=RETENTION_DAYS)
 
-    if removed:
-        print(f"[정리] {removed}개 오래된 파일 삭제")
 
-    # 인덱스에서도 제거
-    if INDEX_PATH.exists():
-        with open(INDEX_PATH, "r", encoding="utf-8") as f:
-            index = json.load(f)
+def update_index(result_data: dict):
+    """인덱스 갱신 (같은 날짜는 교체) + 보관 기간이 지난 파일 정리"""
+    with file_lock(INDEX_PATH):
+        index = _index_manager()
+        index.add(_index_entry(result_data))
 
-        entries = index.get("entries", [])
-        original_count = len(entries)
-        entries = [e for e in entries if e["date"] >= cutoff_str]
+        removed = index.evict_expired()
+        if removed:
+            print(f"[정리] {removed}개 오래된 파일 삭제")
 
-        if len(entries) < original_count:
-            index["entries"] = entries
-            with open(INDEX_PATH, "w", encoding="utf-8") as f:
-                json.dump(index, f, ensure_ascii=False, indent=2)
+        index.save(updated_at=result_data["collected_at"])
+    print(f"[저장] {INDEX_PATH}")
 
 
 def main():
@@ -36,6 +36,10 @@ GEMINI_API_KEY_3 = os.getenv("GEMINI_API_KEY_03")
 GEMINI_API_KEY_4 = os.getenv("GEMINI_API_KEY_04")
 GEMINI_API_KEY_5 = os.getenv("GEMINI_API_KEY_05")
 
+# Gemini 프롬프트 컨텍스트 토큰 예산 (초과분은 관련도 낮은 항목부터 제외, 0이면 무제한)
+ANALYSIS_CONTEXT_TOKEN_BUDGET = int(os.getenv("ANALYSIS_CONTEXT_TOKEN_BUDGET", "8000"))
+FORECAST_CONTEXT_TOKEN_BUDGET = int(os.getenv("FORECAST_CONTEXT_TOKEN_BUDGET", "6000"))
+
 # Supabase 설정 (API 키 중앙 관리용)
 # https://supabase.com/dashboard 에서 프로젝트 설정 확인
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -1,6 +1,7 @@
 import { useState, useCallback, useMemo } from "react"
 import type { HistoryIndex, HistoryEntry, GroupedHistory } from "@/types/history"
 import type { StockData } from "@/types/stock"
+import { loadSnapshot } from "@/lib/snapshot"
 
 const INDEX_URL = import.meta.env.BASE_URL + "data/history-index.json"
 
@@ -53,12 +54,7 @@ export function useHistoryData(): UseHistoryDataReturn {
     setError(null)
 
     try {
-      const url = import.meta.env.BASE_URL + entry.path + "?t=" + Date.now()
-      const response = await fetch(url)
-      if (!response.ok) {
-        throw new Error(`히스토리 파일을 찾을 수 없습니다 (${response.status})`)
-      }
-      const jsonData = await response.json()
+      const jsonData = await loadSnapshot<StockData>(import.meta.env.BASE_URL + entry.path)
       setSelectedData(jsonData)
       setSelectedEntry(entry)
     } catch (err) {
@@ -1,5 +1,7 @@
 import { useState, useEffect, useCallback, useRef } from "react"
 import type { StockData } from "@/types/stock"
+import { fetchManifest, loadSections } from "@/lib/latest-sections"
+import type { SectionCache } from "@/lib/latest-sections"
 
 const DATA_URL = import.meta.env.BASE_URL + "data/latest.json"
 const GITHUB_TOKEN = import.meta.env.VITE_GITHUB_TOKEN || ""
@@ -27,22 +29,32 @@ export function useStockData(): UseStockDataReturn {
   const refreshTimerRef = useRef<ReturnType<typeof setInterval> | null>(null)
   const abortRef = useRef<AbortController | null>(null)
   const dataRef = useRef<StockData | null>(null)
+  const sectionCacheRef = useRef<SectionCache>(new Map())
 
   // dataRef를 data와 동기화
   useEffect(() => {
     dataRef.current = data
   }, [data])
 
+  // 섹션 manifest가 있으면 해시가 바뀐 섹션만, 없으면 latest.json 전체를 받는다
+  const loadLatest = useCallback(async (): Promise<StockData> => {
+    const manifest = await fetchManifest().catch(() => null)
+    if (manifest) {
+      return loadSections<StockData>(manifest, sectionCacheRef.current)
+    }
+    const response = await fetch(DATA_URL + "?t=" + Date.now(), { cache: "no-store" })
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+    return response.json()
+  }, [])
+
   const fetchData = useCallback(async () => {
     setLoading(true)
     setError(null)
 
     try {
-      const response = await fetch(DATA_URL + "?t=" + Date.now(), { cache: "no-store" })
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`)
-      }
-      const jsonData = await response.json()
+      const jsonData = await loadLatest()
       setData(jsonData)
     } catch (err) {
       console.error("Failed to fetch stock data:", err)
@@ -53,7 +65,7 @@ export function useStockData(): UseStockDataReturn {
     } finally {
       setLoading(false)
     }
-  }, [])
+  }, [loadLatest])
 
   const cancelRefresh = useCallback(() => {
     if (abortRef.current) {
@@ -138,6 +150,16 @@ export function useStockData(): UseStockDataReturn {
             }
 
             try {
+              // manifest(수백 바이트)로 timestamp 변경 감지 후 바뀐 섹션만 로드
+              const manifest = await fetchManifest(abort.signal)
+              if (manifest) {
+                if (manifest.timestamp && manifest.timestamp !== currentTimestamp) {
+                  cleanup()
+                  loadSections<StockData>(manifest, sectionCacheRef.current, abort.signal).then(resolve, reject)
+                }
+                return
+              }
+
               const res = await fetch(DATA_URL + "?t=" + Date.now(), {
                 cache: "no-store",
                 signal: abort.signal,
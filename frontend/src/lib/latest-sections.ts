@@ -0,0 +1,64 @@
+// latest.json 섹션 분할 로더 (modules/latest_sections.py sections-v1과 동일 규칙)
+// - data/latest/manifest.json: 섹션별 hash
+// - data/latest/<섹션>.json: 최상위 키 하나 (meta는 스칼라 필드 묶음)
+// 해시가 그대로인 섹션은 메모리 캐시를 재사용하고, 바뀐 섹션만 ?h=<hash>로 받는다.
+
+export const SECTIONS_FORMAT = "sections-v1"
+const META_SECTION = "meta"
+
+const SECTIONS_URL = import.meta.env.BASE_URL + "data/latest/"
+
+export interface SectionManifest {
+  format: string
+  timestamp: string
+  updated_at: string
+  sections: Record<string, { hash: string; bytes: number; updated_at: string }>
+}
+
+export type SectionCache = Map<string, { hash: string; value: unknown }>
+
+export async function fetchManifest(signal?: AbortSignal): Promise<SectionManifest | null> {
+  const response = await fetch(SECTIONS_URL + "manifest.json?t=" + Date.now(), {
+    cache: "no-store",
+    signal,
+  })
+  if (!response.ok) return null
+  const manifest = (await response.json()) as SectionManifest
+  return manifest.format === SECTIONS_FORMAT ? manifest : null
+}
+
+// manifest 기준으로 섹션을 모아 latest 데이터 조립 (변경된 섹션만 네트워크 요청)
+export async function loadSections<T>(
+  manifest: SectionManifest,
+  cache: SectionCache,
+  signal?: AbortSignal,
+): Promise<T> {
+  const entries = Object.entries(manifest.sections)
+  await Promise.all(
+    entries
+      .filter(([name, info]) => cache.get(name)?.hash !== info.hash)
+      .map(async ([name, info]) => {
+        // 해시가 URL에 포함되므로 브라우저 캐시를 그대로 사용해도 안전
+        const response = await fetch(`${SECTIONS_URL}${name}.json?h=${info.hash}`, { signal })
+        if (!response.ok) {
+          throw new Error(`섹션 로드 실패: ${name} (${response.status})`)
+        }
+        cache.set(name, { hash: info.hash, value: await response.json() })
+      }),
+  )
+
+  for (const name of cache.keys()) {
+    if (!(name in manifest.sections)) cache.delete(name)
+  }
+
+  const data: Record<string, unknown> = {}
+  for (const [name] of entries) {
+    const value = cache.get(name)?.value
+    if (name === META_SECTION) {
+      Object.assign(data, value)
+    } else {
+      data[name] = value
+    }
+  }
+  return data as T
+}
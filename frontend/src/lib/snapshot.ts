@@ -0,0 +1,193 @@
+// 히스토리 스냅샷 compact-v2 포맷 복원 (modules/snapshot_format.py와 동일 규칙, compact-v1도 읽음)
+// - 순위 목록 종목 레코드의 짧은 키 → 원래 키
+// - 순위 목록의 종목 참조(코드 또는 {"@": 코드, 달라진 필드, "-": 없는 필드}) → _stocks[코드] 레코드
+// - news._articles 테이블 + 인덱스 참조 → 종목별 기사 배열
+// - 생략된 originallink / history[code].code 복원
+// delta-v1 (같은 날 직전 스냅샷 대비 JSON Patch)은 loadSnapshot이 base 체인을 따라 복원
+
+export const SNAPSHOT_FORMAT = "compact-v2"
+const LEGACY_FORMATS = ["compact-v1"]
+export const DELTA_FORMAT = "delta-v1"
+
+// Python MAX_DELTA_CHAIN(6)보다 넉넉하게 — 손상된 체인의 무한 루프 방지용
+const MAX_CHAIN_HOPS = 24
+
+const STOCK_LIST_SECTIONS = [
+  "rising",
+  "falling",
+  "volume",
+  "trading_value",
+  "fluctuation",
+  "fluctuation_direct",
+] as const
+
+// 키 별칭 (Python STOCK_KEY_ALIASES와 동일하게 유지)
+const STOCK_KEY_ALIASES: Record<string, string> = {
+  current_price: "cp",
+  change_rate: "cr",
+  change_price: "cg",
+  volume: "v",
+  volume_rate: "vr",
+  trading_value: "tv",
+  market: "m",
+  is_etf: "e",
+  direction: "d",
+  consecutive_up_days: "ud",
+  consecutive_down_days: "dd",
+}
+
+const STOCK_KEY_EXPAND: Record<string, string> = Object.fromEntries(
+  Object.entries(STOCK_KEY_ALIASES).map(([full, alias]) => [alias, full]),
+)
+
+type JsonObject = Record<string, unknown>
+
+function isObject(value: unknown): value is JsonObject {
+  return typeof value === "object" && value !== null && !Array.isArray(value)
+}
+
+function expandRecord(record: JsonObject): JsonObject {
+  const out: JsonObject = {}
+  for (const [key, value] of Object.entries(record)) {
+    out[STOCK_KEY_EXPAND[key] ?? key] = value
+  }
+  return out
+}
+
+function expandStockRef(ref: unknown, stocks: Record<string, JsonObject>): unknown {
+  if (typeof ref === "string") return expandRecord(stocks[ref])
+  if (!isObject(ref)) return ref
+  if (!("@" in ref)) return expandRecord(ref)
+  const missing = new Set((ref["-"] as string[] | undefined) ?? [])
+  const record: JsonObject = {}
+  for (const [key, value] of Object.entries(stocks[ref["@"] as string])) {
+    if (!missing.has(key)) record[key] = value
+  }
+  for (const [key, value] of Object.entries(ref)) {
+    if (key !== "@" && key !== "-") record[key] = value
+  }
+  return expandRecord(record)
+}
+
+export function expandSnapshot<T>(data: unknown): T {
+  if (
+    !isObject(data) ||
+    (data._format !== SNAPSHOT_FORMAT && !LEGACY_FORMATS.includes(String(data._format)))
+  ) {
+    return data as T
+  }
+
+  const expanded: JsonObject = { ...data }
+  delete expanded._format
+  delete expanded._stocks
+
+  const stocks = (isObject(data._stocks) ? data._stocks : {}) as Record<string, JsonObject>
+  for (const section of STOCK_LIST_SECTIONS) {
+    const markets = data[section]
+    if (!isObject(markets)) continue
+    const restored: JsonObject = {}
+    for (const [market, records] of Object.entries(markets)) {
+      restored[market] = Array.isArray(records)
+        ? records.map((r) => expandStockRef(r, stocks))
+        : records
+    }
+    expanded[section] = restored
+  }
+
+  const history = data.history
+  if (isObject(history)) {
+    const restored: JsonObject = {}
+    for (const [code, h] of Object.entries(history)) {
+      restored[code] = isObject(h) && !("code" in h) ? { code, ...h } : h
+    }
+    expanded.history = restored
+  }
+
+  const news = data.news
+  if (isObject(news) && Array.isArray(news._articles)) {
+    const articles = (news._articles as JsonObject[]).map((item) => {
+      const restored = { ...item }
+      if (!("originallink" in restored)) {
+        restored.originallink = restored.link
+      } else if (restored.originallink === null) {
+        delete restored.originallink
+      }
+      return restored
+    })
+    const restored: JsonObject = {}
+    for (const [code, entry] of Object.entries(news)) {
+      if (code === "_articles") continue
+      restored[code] =
+        isObject(entry) && Array.isArray(entry.news)
+          ? { ...entry, news: (entry.news as number[]).map((i) => ({ ...articles[i] })) }
+          : entry
+    }
+    expanded.news = restored
+  }
+
+  return expanded as T
+}
+
+interface PatchOp {
+  op: "add" | "remove" | "replace"
+  path: string
+  value?: unknown
+}
+
+function unescapePointer(token: string): string {
+  return token.replace(/~1/g, "/").replace(/~0/g, "~")
+}
+
+export function applyPatch(doc: unknown, ops: PatchOp[]): unknown {
+  for (const op of ops) {
+    if (op.path === "") {
+      doc = op.op === "remove" ? null : structuredClone(op.value)
+      continue
+    }
+    const tokens = op.path.split("/").slice(1).map(unescapePointer)
+    let parent = doc as Record<string, unknown> | unknown[]
+    for (const token of tokens.slice(0, -1)) {
+      parent = (Array.isArray(parent) ? parent[Number(token)] : parent[token]) as typeof parent
+    }
+    const last = tokens[tokens.length - 1]
+    if (Array.isArray(parent)) {
+      const idx = last === "-" ? parent.length : Number(last)
+      if (op.op === "add") parent.splice(idx, 0, op.value)
+      else if (op.op === "remove") parent.splice(idx, 1)
+      else parent[idx] = op.value
+    } else if (op.op === "remove") {
+      delete parent[last]
+    } else {
+      parent[last] = op.value
+    }
+  }
+  return doc
+}
+
+async function fetchJson(url: string): Promise<JsonObject> {
+  const response = await fetch(url + "?t=" + Date.now())
+  if (!response.ok) {
+    throw new Error(`히스토리 파일을 찾을 수 없습니다 (${response.status})`)
+  }
+  return response.json()
+}
+
+// 히스토리 스냅샷 로드: delta-v1이면 같은 디렉토리의 base를 따라가 keyframe 복원 후 패치 적용
+export async function loadSnapshot<T>(url: string): Promise<T> {
+  const dir = url.slice(0, url.lastIndexOf("/") + 1)
+  let raw = await fetchJson(url)
+  const chain: PatchOp[][] = []
+  while (raw._format === DELTA_FORMAT) {
+    if (chain.length >= MAX_CHAIN_HOPS) {
+      throw new Error(`델타 체인이 너무 깁니다: ${url}`)
+    }
+    chain.push(raw.ops as PatchOp[])
+    raw = await fetchJson(dir + String(raw.base))
+  }
+
+  let doc: unknown = expandSnapshot<unknown>(raw)
+  for (const ops of chain.reverse()) {
+    doc = applyPatch(doc, ops)
+  }
+  return doc as T
+}
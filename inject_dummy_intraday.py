@@ -2,22 +2,27 @@
 장중 수급 더미 데이터를 latest.json에 주입하는 테스트 스크립트.
 사용 후 되돌리려면: python inject_dummy_intraday.py --remove
 """
-import json
 import random
 import sys
 from pathlib import Path
 
-LATEST_PATH = Path(__file__).parent / "frontend" / "public" / "data" / "latest.json"
+from modules.json_store import read_json
+from modules.latest_sections import update_latest
+
+DATA_DIR = Path(__file__).parent / "frontend" / "public" / "data"
+LATEST_PATH = DATA_DIR / "latest.json"
+
+
+def _remove_intraday(data: dict) -> None:
+    data.pop("investor_intraday", None)
+
 
 def main():
-    with open(LATEST_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_json(LATEST_PATH, default={})
 
     if "--remove" in sys.argv:
         if "investor_intraday" in data:
-            del data["investor_intraday"]
-            with open(LATEST_PATH, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            update_latest(DATA_DIR, _remove_intraday, keys=["investor_intraday"])
             print("investor_intraday 제거 완료")
         else:
             print("investor_intraday 없음 — 이미 깨끗한 상태")
@@ -61,13 +66,11 @@ def main():
     from datetime import datetime
     today = datetime.now().strftime("%Y-%m-%d")
 
-    data["investor_intraday"] = {
+    intraday = {
         "date": today,
         "snapshots": snapshots,
     }
-
-    with open(LATEST_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    update_latest(DATA_DIR, lambda current: current.update(investor_intraday=intraday), keys=["investor_intraday"])
 
     print(f"더미 investor_intraday 주입 완료")
     print(f"  날짜: {today}")
@@ -8,19 +8,22 @@ import json
 import os
 import time
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, List, Any
 
-from modules.kis_client import KISClient
+from modules.kis_client import get_kis_client
 from modules.kis_rank import KISRankAPI
 from modules.stock_filter import StockFilter
 from modules.stock_history import StockHistoryAPI
 from modules.naver_news import NaverNewsAPI
-from modules.telegram import TelegramSender
-from modules.data_exporter import export_for_frontend
+from modules.telegram import TelegramQueue, TelegramSender
+from modules.data_exporter import export_for_frontend, load_theme_index
+from modules.snapshot_format import load_snapshot
 from modules.exchange_rate import ExchangeRateAPI
 from modules.gemini_analyzer import analyze_themes
 from modules.fundamental import FundamentalCollector
 from modules.stock_criteria import evaluate_all_stocks
+from modules.stock_record import StockRegistry, unique_stocks
 from modules.utils import KST
 
 
@@ -33,40 +36,15 @@ def collect_all_stocks(
     fluctuation_direct_data: Dict = None,
 ) -> List[Dict[str, Any]]:
     """상승/하락 종목 + 추가 데이터 소스에서 중복 제거된 전체 종목 리스트 추출"""
-    seen_codes = set()
-    all_stocks = []
-
-    stock_lists = [
-        rising_stocks.get("kospi", []),
-        rising_stocks.get("kosdaq", []),
-        falling_stocks.get("kospi", []),
-        falling_stocks.get("kosdaq", []),
-    ]
-
-    # 추가 데이터 소스
-    if volume_data:
-        stock_lists.extend([volume_data.get("kospi", []), volume_data.get("kosdaq", [])])
-    if trading_value_data:
-        stock_lists.extend([trading_value_data.get("kospi", []), trading_value_data.get("kosdaq", [])])
-    if fluctuation_data:
-        stock_lists.extend([
-            fluctuation_data.get("kospi_up", []), fluctuation_data.get("kospi_down", []),
-            fluctuation_data.get("kosdaq_up", []), fluctuation_data.get("kosdaq_down", []),
-        ])
-    if fluctuation_direct_data:
-        stock_lists.extend([
-            fluctuation_direct_data.get("kospi_up", []), fluctuation_direct_data.get("kospi_down", []),
-            fluctuation_direct_data.get("kosdaq_up", []), fluctuation_direct_data.get("kosdaq_down", []),
-        ])
-
-    for stocks in stock_lists:
-        for stock in stocks:
-            code = stock.get("code", "")
-            if code and code not in seen_codes:
-                seen_codes.add(code)
-                all_stocks.append(stock)
-
-    return all_stocks
+    registry = StockRegistry({
+        "rising": rising_stocks,
+        "falling": falling_stocks,
+        "volume": volume_data,
+        "trading_value": trading_value_data,
+        "fluctuation": fluctuation_data,
+        "fluctuation_direct": fluctuation_direct_data,
+    })
+    return registry.stocks()
 
 
 def _get_gemini_target_stocks(stock_context: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -74,42 +52,15 @@ def _get_gemini_target_stocks(stock_context: Dict[str, Any]) -> List[Dict[str, A
 
     거래대금+상승률 교차 종목, 상승률 TOP, 등락률 TOP 등에서 추출.
     """
-    seen_codes = set()
-    targets = []
-
-    # 거래대금 TOP (코스피/코스닥)
-    for market in ("kospi", "kosdaq"):
-        for s in stock_context.get("trading_value", {}).get(market, [])[:20]:
-            code = s.get("code", "")
-            if code and code not in seen_codes:
-                seen_codes.add(code)
-                targets.append(s)
-
-    # 상승률 TOP
-    for market in ("kospi", "kosdaq"):
-        for s in stock_context.get("rising", {}).get(market, [])[:10]:
-            code = s.get("code", "")
-            if code and code not in seen_codes:
-                seen_codes.add(code)
-                targets.append(s)
-
-    # 등락률 상승 TOP
-    for key in ("kospi_up", "kosdaq_up"):
-        for s in stock_context.get("fluctuation", {}).get(key, [])[:20]:
-            code = s.get("code", "")
-            if code and code not in seen_codes:
-                seen_codes.add(code)
-                targets.append(s)
-
-    # 거래량 TOP
-    for market in ("kospi", "kosdaq"):
-        for s in stock_context.get("volume", {}).get(market, [])[:20]:
-            code = s.get("code", "")
-            if code and code not in seen_codes:
-                seen_codes.add(code)
-                targets.append(s)
-
-    return targets
+    def top(section: str, keys: tuple, n: int) -> list:
+        return [stock_context.get(section, {}).get(key, [])[:n] for key in keys]
+
+    return unique_stocks(
+        top("trading_value", ("kospi", "kosdaq"), 20)    # 거래대금 TOP (코스피/코스닥)
+        + top("rising", ("kospi", "kosdaq"), 10)         # 상승률 TOP
+        + top("fluctuation", ("kospi_up", "kosdaq_up"), 20)  # 등락률 상승 TOP
+        + top("volume", ("kospi", "kosdaq"), 20)         # 거래량 TOP
+    )
 
 
 def main(test_mode: bool = False, skip_news: bool = False, skip_investor: bool = False, skip_ai: bool = False):
@@ -147,7 +98,7 @@ def main(test_mode: bool = False, skip_news: bool = False, skip_investor: bool =
     # 2. KIS API 연결 [필수] — 실패 시 전체 중단
     print("\n[2/13] KIS API 연결 중...")
     try:
-        client = KISClient()
+        client = get_kis_client()
         rank_api = KISRankAPI(client)
         history_api = StockHistoryAPI(client)
         print("  ✓ KIS API 연결 성공")
@@ -622,20 +573,27 @@ def main(test_mode: bool = False, skip_news: bool = False, skip_investor: bool =
             theme_count = len(theme_analysis.get("themes", []))
             print(f"  ℹ 테마 분석: 기존 데이터 보존 ({theme_count}개 테마)")
 
-    # 히스토리에서 테마 분석 폴백 (latest.json에도 없는 경우)
+    # 히스토리에서 테마 분석 폴백 (latest.json에도 없는 경우) — 테마 인덱스의 마지막 항목 사용
     if theme_analysis is None:
         try:
-            hist_dir = os.path.join("frontend", "public", "data", "history")
-            if os.path.isdir(hist_dir):
-                for fname in sorted(os.listdir(hist_dir), reverse=True)[:10]:
-                    fpath = os.path.join(hist_dir, fname)
-                    with open(fpath, "r", encoding="utf-8") as f:
-                        hist = json.load(f)
-                    if hist.get("theme_analysis"):
-                        theme_analysis = hist["theme_analysis"]
-                        theme_count = len(theme_analysis.get("themes", []))
-                        print(f"  ℹ 테마 분석: 히스토리에서 복원 ({fname}, {theme_count}개 테마)")
-                        break
+            data_dir = Path("frontend") / "public" / "data"
+            index_entries = load_theme_index(data_dir)
+            if index_entries:
+                entry = index_entries[-1]
+                fname = entry["filename"]
+                snapshot_path = data_dir / "history" / fname
+                if snapshot_path.exists():
+                    # 원본 스냅샷이 남아 있으면 뉴스 근거까지 포함된 전체 분석 복원
+                    theme_analysis = load_snapshot(snapshot_path).get("theme_analysis")
+                if not theme_analysis:
+                    theme_analysis = {
+                        "analyzed_at": entry.get("analyzed_at", ""),
+                        "analysis_date": entry.get("analysis_date", ""),
+                        "market_summary": entry.get("market_summary", ""),
+                        "themes": entry["themes"],
+                    }
+                theme_count = len(theme_analysis.get("themes", []))
+                print(f"  ℹ 테마 분석: 히스토리에서 복원 ({fname}, {theme_count}개 테마)")
         except Exception:
             pass
 
@@ -664,9 +622,10 @@ def main(test_mode: bool = False, skip_news: bool = False, skip_investor: bool =
     # 11. 텔레그램 발송
     print("\n[13/13] 텔레그램 메시지 준비...")
     telegram = TelegramSender()
+    mode = "plain" if test_mode else "html"  # 테스트 모드는 태그 없는 콘솔용으로 렌더링
 
     # 바리케이트 메시지 (환율 정보 포함)
-    start_barricade = telegram.format_start_barricade(exchange_data)
+    start_barricade = telegram.format_start_barricade(exchange_data, mode=mode)
     end_barricade = telegram.format_end_barricade()
 
     # 거래대금+상승률 메시지
@@ -675,6 +634,7 @@ def main(test_mode: bool = False, skip_news: bool = False, skip_investor: bool =
         tv_rising_stocks["kosdaq"],
         history_data,
         title="📈 거래대금 + 상승률 TOP10",
+        mode=mode,
     )
 
     # 거래대금+하락률 메시지
@@ -683,6 +643,7 @@ def main(test_mode: bool = False, skip_news: bool = False, skip_investor: bool =
         tv_falling_stocks["kosdaq"],
         history_data,
         title="📉 거래대금 + 하락률 TOP10",
+        mode=mode,
     )
 
     # 거래량+상승률 메시지
@@ -690,6 +651,7 @@ def main(test_mode: bool = False, skip_news: bool = False, skip_investor: bool =
         rising_stocks["kospi"],
         rising_stocks["kosdaq"],
         history_data,
+        mode=mode,
     )
 
     # 거래량+하락률 메시지
@@ -697,20 +659,13 @@ def main(test_mode: bool = False, skip_news: bool = False, skip_investor: bool =
         falling_stocks["kospi"],
         falling_stocks["kosdaq"],
         history_data,
+        mode=mode,
     )
 
     # AI 테마 분석 메시지
     theme_messages = []
     if theme_analysis:
-        theme_messages = telegram.format_theme_analysis(theme_analysis)
-
-    def _clean_html(text: str) -> str:
-        """HTML 태그 제거 (콘솔 출력용)"""
-        text = text.replace("<b>", "").replace("</b>", "")
-        text = text.replace('<a href="', "[").replace('">', "] ").replace("</a>", "")
-        text = text.replace("<i>", "").replace("</i>", "")
-        text = text.replace("<code>", "").replace("</code>", "")
-        return text
+        theme_messages = telegram.format_theme_analysis(theme_analysis, mode=mode)
 
     if test_mode:
         print("\n" + "=" * 60)
@@ -721,85 +676,46 @@ def main(test_mode: bool = False, skip_news: bool = False, skip_investor: bool =
         print("\n" + "=" * 60)
         print("📈 거래대금+상승률 메시지:")
         print("=" * 60)
-        print(_clean_html(tv_rising_message))
+        print(tv_rising_message)
 
         print("\n" + "=" * 60)
         print("📉 거래대금+하락률 메시지:")
         print("=" * 60)
-        print(_clean_html(tv_falling_message))
+        print(tv_falling_message)
 
         print("\n" + "=" * 60)
         print("📈 거래량+상승률 메시지:")
         print("=" * 60)
-        print(_clean_html(rising_message))
+        print(rising_message)
 
         print("\n" + "=" * 60)
         print("📉 거래량+하락률 메시지:")
         print("=" * 60)
-        print(_clean_html(falling_message))
+        print(falling_message)
 
         if theme_messages:
             for i, msg in enumerate(theme_messages, 1):
                 print("\n" + "=" * 60)
                 print(f"✨ AI 테마 분석 ({i}/{len(theme_messages)}):")
                 print("=" * 60)
-                print(_clean_html(msg))
+                print(msg)
 
         print("\n" + "=" * 60)
         print("🏁 END 바리케이트:")
         print("=" * 60)
         print(end_barricade)
     else:
-        # 1. START 바리케이트
-        print("  START 바리케이트 발송 중...")
-        if telegram.send_message(start_barricade):
-            print("  ✓ START 바리케이트 발송 완료")
-        else:
-            print("  ✗ START 바리케이트 발송 실패")
-
-        # 2. 거래대금+상승률 메시지
-        print("  거래대금+상승률 메시지 발송 중...")
-        if telegram.send_message(tv_rising_message):
-            print("  ✓ 거래대금+상승률 메시지 발송 완료")
-        else:
-            print("  ✗ 거래대금+상승률 메시지 발송 실패")
-
-        # 3. 거래대금+하락률 메시지
-        print("  거래대금+하락률 메시지 발송 중...")
-        if telegram.send_message(tv_falling_message):
-            print("  ✓ 거래대금+하락률 메시지 발송 완료")
-        else:
-            print("  ✗ 거래대금+하락률 메시지 발송 실패")
-
-        # 4. 거래량+상승률 메시지
-        print("  거래량+상승률 메시지 발송 중...")
-        if telegram.send_message(rising_message):
-            print("  ✓ 거래량+상승률 메시지 발송 완료")
-        else:
-            print("  ✗ 거래량+상승률 메시지 발송 실패")
-
-        # 5. 거래량+하락률 메시지
-        print("  거래량+하락률 메시지 발송 중...")
-        if telegram.send_message(falling_message):
-            print("  ✓ 거래량+하락률 메시지 발송 완료")
-        else:
-            print("  ✗ 거래량+하락률 메시지 발송 실패")
-
-        # 6. AI 테마 분석 메시지
-        if theme_messages:
-            print(f"  AI 테마 분석 발송 중... ({len(theme_messages)}개)")
-            for i, msg in enumerate(theme_messages, 1):
-                if telegram.send_message(msg):
-                    print(f"  ✓ AI 테마 분석 {i}/{len(theme_messages)} 발송 완료")
-                else:
-                    print(f"  ✗ AI 테마 분석 {i}/{len(theme_messages)} 발송 실패")
-
-        # 7. END 바리케이트
-        print("  END 바리케이트 발송 중...")
-        if telegram.send_message(end_barricade):
-            print("  ✓ END 바리케이트 발송 완료")
-        else:
-            print("  ✗ END 바리케이트 발송 실패")
+        # 발송 순서대로 큐에 넣고 백그라운드로 발송 (인접 메시지는 4096자 이내로 묶음)
+        outbox = TelegramQueue(telegram)
+        outbox.put(start_barricade, "START 바리케이트")
+        outbox.put(tv_rising_message, "거래대금+상승률 메시지")
+        outbox.put(tv_falling_message, "거래대금+하락률 메시지")
+        outbox.put(rising_message, "거래량+상승률 메시지")
+        outbox.put(falling_message, "거래량+하락률 메시지")
+        for i, msg in enumerate(theme_messages, 1):
+            outbox.put(msg, f"AI 테마 분석 {i}/{len(theme_messages)}")
+        outbox.put(end_barricade, "END 바리케이트")
+        print(f"  텔레그램 메시지 {len(theme_messages) + 6}개 발송 대기열 등록")
 
     # 정상 완료 시 알림 해제
     try:
@@ -808,6 +724,11 @@ def main(test_mode: bool = False, skip_news: bool = False, skip_investor: bool =
     except Exception:
         pass
 
+    if not test_mode:
+        for result in outbox.close():
+            mark = "✓" if result["ok"] else "✗"
+            print(f"  {mark} {result['label']} 발송 {'완료' if result['ok'] else '실패'}")
+
     print("\n" + "=" * 60)
     print("  완료!")
     print("=" * 60)
@@ -1,22 +1,29 @@
 """예측 백테스팅 모듈
 
-Supabase의 theme_predictions에서 active 예측을 조회하고,
+theme_predictions의 active 예측(modules.prediction_store로 조회)과
 실제 주가 수익률을 비교하여 적중 여부를 판정합니다.
 """
-import json
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List
-
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from modules.backtest_frame import (
+    DEFAULT_MAX_SESSIONS,
+    HIT_THRESHOLD,
+    MAX_SESSIONS,
+    accuracy_report,
+    build_frames,
+    parse_leader_stocks,
+)
 from modules.utils import KST
-from modules.market_hours import KRX_HOLIDAYS_2026
-
+from modules.trading_calendar import get_calendar
 
-def get_active_predictions(client) -> List[Dict]:
-    """Supabase에서 status='active' 예측 조회"""
-    response = client.table("theme_predictions").select("*").eq(
-        "status", "active"
-    ).execute()
-    return response.data or []
+KOSPI_INDEX_CODE = "0001"
+FETCH_WORKERS = 5
+CHUNK_SESSIONS = 90       # 일봉 API는 1회 최대 100건 → 거래일 90일 단위로 분할 (휴장일 데이터 오차 여유)
+DAILY_LOOKBACK_DAYS = 10  # 일간 수익률: 대상일 10일 전까지에서 전 거래일 종가 탐색
+CATEGORY_CAL_DAYS = {"short_term": 12, "long_term": 45}  # 평가 구간: 영업일 → 달력일 매핑
 
 
 def _date_to_kis(date_str: str) -> str:
@@ -24,72 +31,190 @@ def _date_to_kis(date_str: str) -> str:
     return date_str.replace("-", "")
 
 
-def fetch_stock_returns(kis_client, codes: List[str], start: str, end: str) -> Dict:
-    """KIS API로 한국 주식 기간 수익률 조회
+def _shift_kis(date_kis: str, days: int) -> str:
+    return (datetime.strptime(date_kis, "%Y%m%d") + timedelta(days=days)).strftime("%Y%m%d")
 
-    Args:
-        kis_client: KISClient 인스턴스
-        codes: 종목코드 리스트 (예: ["005930", "000660"])
-        start: 시작일 YYYY-MM-DD
-        end: 종료일 YYYY-MM-DD
 
-    Returns:
-        {code: return_pct} 딕셔너리
+def _pct_change(first: float, last: float) -> float:
+    return round(((last - first) / first) * 100, 2)
+
+
+class PriceLoader:
+    """백테스트용 일봉 종가 로더
+
+    모든 예측에서 필요한 (종목, 기간)을 먼저 모은 뒤(require/require_daily),
+    종목마다 필요한 기간 전체를 한 번만 병렬 조회하고(load) 수익률 계산은 메모리에서 처리한다.
+    KOSPI 지수는 전체 기간을 한 번만 조회한다.
     """
-    returns = {}
-    missing_codes = []
 
-    for code in codes:
+    def __init__(self, kis_client, workers: int = FETCH_WORKERS):
+        self.kis_client = kis_client
+        self.workers = workers
+        self._windows: Dict[str, Tuple[str, str]] = {}   # 종목코드 → (시작, 종료) YYYYMMDD
+        self._index_window: Optional[Tuple[str, str]] = None
+        self._series: Dict[str, Optional[Tuple[List[str], List[float]]]] = {}
+        self._index_series: Optional[Tuple[List[str], List[float]]] = None
+
+    @staticmethod
+    def _extend(window: Optional[Tuple[str, str]], start: str, end: str) -> Tuple[str, str]:
+        if window is None:
+            return start, end
+        return min(window[0], start), max(window[1], end)
+
+    def require(self, codes: Iterable[str], start: str, end: str) -> None:
+        """기간 수익률 계산에 필요한 구간 등록 (YYYY-MM-DD)"""
+        start, end = _date_to_kis(start), _date_to_kis(end)
+        for code in codes:
+            self._windows[code] = self._extend(self._windows.get(code), start, end)
+        self._index_window = self._extend(self._index_window, start, end)
+
+    def require_daily(self, codes: Iterable[str], target_date: str) -> None:
+        """일간 수익률 계산에 필요한 구간 등록 (대상일 10일 전 ~ 대상일)"""
+        end = _date_to_kis(target_date)
+        start = _shift_kis(end, -DAILY_LOOKBACK_DAYS)
+        self.require(codes, f"{start[:4]}-{start[4:6]}-{start[6:]}", target_date)
+
+    def _fetch_series(self, fetch, start: str, end: str, price_key: str) -> Optional[Tuple[List[str], List[float]]]:
+        """구간을 거래일 CHUNK_SESSIONS개 단위로 나눠 조회 → (날짜 오름차순, 종가) / 조회 실패 시 None"""
+        calendar = get_calendar()
+        prices: Dict[str, float] = {}
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(end, calendar.add_sessions(chunk_start, CHUNK_SESSIONS - 1).strftime("%Y%m%d"))
+            result = fetch(chunk_start, chunk_end)
+            if result.get("rt_cd") != "0":
+                return None
+            for row in result.get("output2", []):
+                date = row.get("stck_bsop_date", "")
+                try:
+                    price = float(row.get(price_key, 0))
+                except (TypeError, ValueError):
+                    continue
+                if date:
+                    prices[date] = price
+            chunk_start = _shift_kis(chunk_end, 1)
+        dates = sorted(prices)
+        return dates, [prices[d] for d in dates]
+
+    def _fetch_stock(self, code: str) -> Optional[Tuple[List[str], List[float]]]:
+        start, end = self._windows[code]
         try:
-            result = kis_client.get_stock_daily_price(
-                code, start_date=_date_to_kis(start), end_date=_date_to_kis(end)
+            return self._fetch_series(
+                lambda s, e: self.kis_client.get_stock_daily_price(code, start_date=s, end_date=e),
+                start, end, "stck_clpr",
             )
-            if result.get("rt_cd") != "0":
-                missing_codes.append(code)
-                continue
+        except Exception:
+            return None
 
-            output2 = result.get("output2", [])
-            if len(output2) < 2:
+    def _fetch_index(self) -> Optional[Tuple[List[str], List[float]]]:
+        start, end = self._index_window
+        try:
+            return self._fetch_series(
+                lambda s, e: self.kis_client.get_index_daily_price(KOSPI_INDEX_CODE, start_date=s, end_date=e),
+                start, end, "bstp_nmix_prpr",
+            )
+        except Exception:
+            return None
+
+    def load(self) -> None:
+        """등록된 종목(+KOSPI 지수) 일봉 병렬 조회 (이미 조회한 종목은 건너뜀)"""
+        codes = [code for code in self._windows if code not in self._series]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            index_future = pool.submit(self._fetch_index) if self._index_window and self._index_series is None else None
+            for code, series in zip(codes, pool.map(self._fetch_stock, codes)):
+                self._series[code] = series
+            if index_future is not None:
+                self._index_series = index_future.result()
+
+    @staticmethod
+    def _window(series, start: str, end: str) -> Tuple[List[str], List[float]]:
+        if not series:
+            return [], []
+        dates, closes = series
+        lo, hi = bisect_left(dates, start), bisect_right(dates, end)
+        return dates[lo:hi], closes[lo:hi]
+
+    def _period_return(self, series, start: str, end: str) -> Optional[float]:
+        """구간 첫 거래일 종가 → 마지막 거래일 종가 수익률"""
+        _, closes = self._window(series, _date_to_kis(start), _date_to_kis(end))
+        if len(closes) < 2 or closes[0] <= 0:
+            return None
+        return _pct_change(closes[0], closes[-1])
+
+    def _daily_return(self, series, target_date: str) -> Optional[float]:
+        """대상일 종가 / 전 거래일 종가 수익률 (전 거래일은 대상일 10일 전 이내)"""
+        end = _date_to_kis(target_date)
+        dates, closes = self._window(series, _shift_kis(end, -DAILY_LOOKBACK_DAYS), end)
+        if len(closes) < 2 or dates[-1] != end or closes[-2] <= 0:
+            return None
+        return _pct_change(closes[-2], closes[-1])
+
+    def stock_returns(self, codes: List[str], start: str, end: str) -> Dict[str, float]:
+        """{code: 기간 수익률%}"""
+        returns = {}
+        missing_codes = []
+        for code in codes:
+            value = self._period_return(self._series.get(code), start, end)
+            if value is None:
                 missing_codes.append(code)
-                continue
-
-            # output2는 최신순 정렬 → 마지막 항목이 가장 오래된 날
-            last_price = int(output2[0].get("stck_clpr", 0))
-            first_price = int(output2[-1].get("stck_clpr", 0))
-            if first_price > 0:
-                returns[code] = round(((last_price - first_price) / first_price) * 100, 2)
             else:
+                returns[code] = value
+        if missing_codes:
+            print(f"  ⚠ 데이터 미확보 종목 ({len(missing_codes)}건): {', '.join(missing_codes)}")
+        return returns
+
+    def daily_returns(self, codes: List[str], target_date: str) -> Dict[str, float]:
+        """{code: 대상일 일간 수익률%}"""
+        returns = {}
+        missing_codes = []
+        for code in codes:
+            value = self._daily_return(self._series.get(code), target_date)
+            if value is None:
                 missing_codes.append(code)
-        except Exception:
-            missing_codes.append(code)
+            else:
+                returns[code] = value
+        if missing_codes:
+            print(f"  ⚠ 일간수익률 미확보 ({target_date}, {len(missing_codes)}건): {', '.join(missing_codes)}")
+        return returns
+
+    def index_return(self, start: str, end: str) -> float:
+        """KOSPI 기간 수익률% (데이터 없으면 0.0)"""
+        value = self._period_return(self._index_series, start, end)
+        return value if value is not None else 0.0
+
+    def daily_index_return(self, target_date: str) -> float:
+        """KOSPI 대상일 일간 수익률% (데이터 없으면 0.0)"""
+        value = self._daily_return(self._index_series, target_date)
+        if value is None:
+            print(f"  ⚠ KOSPI 지수 {target_date} 데이터 미존재")
+            return 0.0
+        return value
 
-    if missing_codes:
-        print(f"  ⚠ 데이터 미확보 종목 ({len(missing_codes)}건): {', '.join(missing_codes)}")
 
-    return returns
+def fetch_stock_returns(kis_client, codes: List[str], start: str, end: str) -> Dict:
+    """KIS API로 한국 주식 기간 수익률 조회
 
+    Args:
+        kis_client: KISClient 인스턴스
+        codes: 종목코드 리스트 (예: ["005930", "000660"])
+        start: 시작일 YYYY-MM-DD
+        end: 종료일 YYYY-MM-DD
 
-def fetch_index_return(kis_client, start: str, end: str) -> float:
-    """KIS API로 KOSPI 지수 기간 수익률 조회"""
-    try:
-        result = kis_client.get_index_daily_price(
-            "0001", start_date=_date_to_kis(start), end_date=_date_to_kis(end)
-        )
-        if result.get("rt_cd") != "0":
-            return 0.0
+    Returns:
+        {code: return_pct} 딕셔너리
+    """
+    loader = PriceLoader(kis_client)
+    loader.require(codes, start, end)
+    loader.load()
+    return loader.stock_returns(codes, start, end)
 
-        output2 = result.get("output2", [])
-        if len(output2) < 2:
-            return 0.0
 
-        # output2는 최신순 정렬
-        last_val = float(output2[0].get("bstp_nmix_prpr", 0))
-        first_val = float(output2[-1].get("bstp_nmix_prpr", 0))
-        if first_val > 0:
-            return round(((last_val - first_val) / first_val) * 100, 2)
-    except Exception:
-        pass
-    return 0.0
+def fetch_index_return(kis_client, start: str, end: str) -> float:
+    """KIS API로 KOSPI 지수 기간 수익률 조회"""
+    loader = PriceLoader(kis_client)
+    loader.require([], start, end)
+    loader.load()
+    return loader.index_return(start, end)
 
 
 def fetch_daily_returns(kis_client, codes: List[str], target_date: str) -> Dict:
@@ -105,87 +230,67 @@ def fetch_daily_returns(kis_client, codes: List[str], target_date: str) -> Dict:
     Returns:
         {code: return_pct} 딕셔너리
     """
-    dt = datetime.strptime(target_date, "%Y-%m-%d")
-    start = (dt - timedelta(days=10)).strftime("%Y%m%d")
-    end = _date_to_kis(target_date)
-
-    returns = {}
-    missing_codes = []
-    for code in codes:
-        try:
-            result = kis_client.get_stock_daily_price(
-                code, start_date=start, end_date=end
-            )
-            if result.get("rt_cd") != "0":
-                missing_codes.append(code)
-                continue
-
-            output2 = result.get("output2", [])
-            if len(output2) < 2:
-                missing_codes.append(code)
-                continue
+    loader = PriceLoader(kis_client)
+    loader.require_daily(codes, target_date)
+    loader.load()
+    return loader.daily_returns(codes, target_date)
 
-            # output2는 최신순 정렬 → target_date 행 찾기
-            target_idx = None
-            for i, row in enumerate(output2):
-                if row.get("stck_bsop_date") == end:
-                    target_idx = i
-                    break
 
-            if target_idx is None or target_idx + 1 >= len(output2):
-                missing_codes.append(code)
-                continue
+def fetch_daily_index_return(kis_client, target_date: str) -> float:
+    """KIS API로 특정 일자의 KOSPI 일간 수익률 (전일 종가 대비 당일 종가)"""
+    loader = PriceLoader(kis_client)
+    loader.require_daily([], target_date)
+    loader.load()
+    return loader.daily_index_return(target_date)
 
-            cur_price = int(output2[target_idx].get("stck_clpr", 0))
-            prev_price = int(output2[target_idx + 1].get("stck_clpr", 0))
-            if prev_price > 0:
-                returns[code] = round(((cur_price - prev_price) / prev_price) * 100, 2)
-            else:
-                missing_codes.append(code)
-        except Exception:
-            missing_codes.append(code)
 
-    if missing_codes:
-        print(f"  ⚠ 일간수익률 미확보 ({target_date}, {len(missing_codes)}건): {', '.join(missing_codes)}")
+def group_codes(preds, legs) -> Dict[Tuple[str, str], set]:
+    """(prediction_date, category) 그룹별 대장주 종목코드 (build_frames 결과 기준)"""
+    pred_groups = {}
+    for (pred_date, category), rows in preds[preds["prediction_date"] != ""].groupby(
+        ["prediction_date", "category"], sort=False
+    ):
+        pred_groups[(pred_date, category)] = set(legs.loc[legs["pred"].isin(rows.index), "code"])
+    return pred_groups
 
-    return returns
 
+def group_end_date(pred_date: str, category: str) -> str:
+    """기간 평가 종료일 (예측일 + 카테고리별 달력일)"""
+    cal_days = CATEGORY_CAL_DAYS.get(category, 12)
+    dt = datetime.strptime(pred_date, "%Y-%m-%d")
+    return (dt + timedelta(days=cal_days)).strftime("%Y-%m-%d")
 
-def fetch_daily_index_return(kis_client, target_date: str) -> float:
-    """KIS API로 특정 일자의 KOSPI 일간 수익률 (전일 종가 대비 당일 종가)"""
-    dt = datetime.strptime(target_date, "%Y-%m-%d")
-    start = (dt - timedelta(days=10)).strftime("%Y%m%d")
-    end = _date_to_kis(target_date)
-
-    try:
-        result = kis_client.get_index_daily_price(
-            "0001", start_date=start, end_date=end
-        )
-        if result.get("rt_cd") != "0":
-            return 0.0
 
-        output2 = result.get("output2", [])
-        if len(output2) < 2:
-            return 0.0
+def load_group_returns(
+    loader: PriceLoader,
+    pred_groups: Dict[Tuple[str, str], set],
+) -> Tuple[Dict[Tuple[str, str], Dict[str, float]], Dict[Tuple[str, str], float]]:
+    """그룹별 (종목, 기간)을 loader에 등록해 한 번에 조회한 뒤 수익률 계산
 
-        # output2는 최신순 정렬 → target_date 행 찾기
-        target_idx = None
-        for i, row in enumerate(output2):
-            if row.get("stck_bsop_date") == end:
-                target_idx = i
-                break
+    today: 대상일 일간 수익률, 그 외: 예측일 ~ group_end_date 기간 수익률
 
-        if target_idx is None or target_idx + 1 >= len(output2):
-            print(f"  ⚠ KOSPI 지수 {target_date} 데이터 미존재")
-            return 0.0
+    Returns:
+        (returns_by_group {그룹: {code: 수익률%}}, index_by_group {그룹: KOSPI 수익률%})
+    """
+    for (pred_date, category), codes in pred_groups.items():
+        if category == "today":
+            loader.require_daily(codes, pred_date)
+        else:
+            loader.require(codes, pred_date, group_end_date(pred_date, category))
+    loader.load()
 
-        cur_val = float(output2[target_idx].get("bstp_nmix_prpr", 0))
-        prev_val = float(output2[target_idx + 1].get("bstp_nmix_prpr", 0))
-        if prev_val > 0:
-            return round(((cur_val - prev_val) / prev_val) * 100, 2)
-    except Exception:
-        pass
-    return 0.0
+    returns_by_group = {}
+    index_by_group = {}
+    for (pred_date, category), codes in pred_groups.items():
+        key = (pred_date, category)
+        if category == "today":
+            returns_by_group[key] = loader.daily_returns(list(codes), pred_date)
+            index_by_group[key] = loader.daily_index_return(pred_date)
+        else:
+            end = group_end_date(pred_date, category)
+            returns_by_group[key] = loader.stock_returns(list(codes), pred_date, end)
+            index_by_group[key] = loader.index_return(pred_date, end)
+    return returns_by_group, index_by_group
 
 
 def evaluate_prediction(prediction: Dict, returns: Dict, index_return: float, *, force: bool = False) -> str:
@@ -215,25 +320,14 @@ def evaluate_prediction(prediction: Dict, returns: Dict, index_return: float, *,
                 return "active"
         else:
             # short_term/long_term: 영업일 기준 경과일 계산 (주말 + 공휴일 제외)
-            days_elapsed = 0
-            d = pred_date + timedelta(days=1)
-            while d <= now:
-                if d.weekday() < 5 and d.strftime("%Y-%m-%d") not in KRX_HOLIDAYS_2026:
-                    days_elapsed += 1
-                d += timedelta(days=1)
-
-            max_days = {"short_term": 7, "long_term": 30}.get(category, 7)
+            days_elapsed = get_calendar().sessions_between(pred_date, now)
+
+            max_days = MAX_SESSIONS.get(category, DEFAULT_MAX_SESSIONS)
             if days_elapsed < max_days:
                 return "active"
 
     # 대장주 수익률 확인
-    leader_stocks = prediction.get("leader_stocks", "[]")
-    if isinstance(leader_stocks, str):
-        try:
-            leader_stocks = json.loads(leader_stocks)
-        except json.JSONDecodeError:
-            leader_stocks = []
-
+    leader_stocks = parse_leader_stocks(prediction.get("leader_stocks", "[]"))
     stock_codes = [s.get("code", "") for s in leader_stocks if s.get("code")]
     if not stock_codes:
         return "expired"
@@ -243,7 +337,7 @@ def evaluate_prediction(prediction: Dict, returns: Dict, index_return: float, *,
     for code in stock_codes:
         stock_return = returns.get(code)
         if stock_return is not None:
-            evaluated.append(stock_return >= 2.0)
+            evaluated.append(stock_return >= HIT_THRESHOLD)
 
     # 평가 가능 종목이 없으면 expired
     if not evaluated:
@@ -258,52 +352,14 @@ def evaluate_prediction(prediction: Dict, returns: Dict, index_return: float, *,
     return "missed"
 
 
-def update_prediction_status(client, pred_id: int, status: str, performance: Dict):
-    """Supabase status + actual_performance 업데이트"""
-    update_data = {
-        "status": status,
-        "evaluated_at": datetime.now(KST).isoformat(),
-        "actual_performance": json.dumps(performance, ensure_ascii=False),
-    }
-    client.table("theme_predictions").update(update_data).eq("id", pred_id).execute()
-
-
-def calculate_accuracy_report(client) -> Dict:
-    """신뢰도별/카테고리별 적중률 집계"""
-    response = client.table("theme_predictions").select("*").in_(
-        "status", ["hit", "missed"]
-    ).execute()
-
-    data = response.data or []
-    if not data:
-        return {"total": 0, "hit": 0, "accuracy": 0.0, "by_confidence": {}, "by_category": {}}
-
-    total = len(data)
-    hits = sum(1 for d in data if d.get("status") == "hit")
-
-    by_confidence = {}
-    by_category = {}
-
-    for d in data:
-        confidence = d.get("confidence", "N/A")
-        category = d.get("category", "N/A")
-        is_hit = d.get("status") == "hit"
-
-        for group, key in [(by_confidence, confidence), (by_category, category)]:
-            if key not in group:
-                group[key] = {"total": 0, "hit": 0}
-            group[key]["total"] += 1
-            if is_hit:
-                group[key]["hit"] += 1
-
-    for group in [by_confidence, by_category]:
-        for v in group.values():
-            v["accuracy"] = round(v["hit"] / v["total"] * 100, 1) if v["total"] else 0.0
-
-    return {
-        "total": total,
-        "hit": hits,
-        "accuracy": round(hits / total * 100, 1) if total else 0.0,
-        "by_confidence": by_confidence,
-        "by_category": by_category,
-    }
+def calculate_accuracy_report(store) -> Dict:
+    """신뢰도/카테고리/테마/요일/시장 국면별 적중률 집계 (hit/missed 전체 이력)
+
+    Args:
+        store: PredictionStore (modules.prediction_store)
+    """
+    rows = store.evaluated_predictions(
+        "id,prediction_date,category,theme_name,confidence,status,actual_performance"
+    )
+    preds, _ = build_frames(rows)
+    return accuracy_report(preds, preds["status"])
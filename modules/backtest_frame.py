@@ -0,0 +1,241 @@
+"""예측 백테스팅 — 컬럼 기반 평가/집계
+
+예측 목록을 예측 1행 프레임(preds)과 대장주 1행 프레임(legs)으로 한 번 변환한 뒤,
+적중 판정·정확도 집계·파라미터 스윕을 행 단위 반복 없이 계산한다.
+
+- preds: id, prediction_date, category, theme_name, confidence, status, index_return, weekday, regime
+- legs:  pred(preds 행 번호), code, name, ret(수익률 %, 미확보 NaN)
+
+판정 규칙은 evaluate_prediction과 같다: 수익률이 확인된 대장주 중 rule(기본 과반수)이
+threshold(기본 +2%) 이상이면 hit, 확인된 종목이 없으면 expired.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.trading_calendar import get_calendar
+from modules.utils import KST
+
+logger = logging.getLogger(__name__)
+
+HIT_THRESHOLD = 2.0
+MAX_SESSIONS = {"short_term": 7, "long_term": 30}
+DEFAULT_MAX_SESSIONS = 7
+REGIME_BAND = 0.5  # KOSPI 수익률 ±0.5% 이내는 보합
+WEEKDAYS = ["월", "화", "수", "목", "금", "토", "일"]
+DIMENSIONS = ("confidence", "category", "theme_name", "weekday", "regime")
+
+
+def required_hits(evaluated: np.ndarray, rule: str = "majority") -> np.ndarray:
+    """평가 종목 수 → hit에 필요한 종목 수
+
+    majority: 과반수 (1개면 1, 2개면 1, 3개면 2) / any: 1개 / all: 전부
+    """
+    evaluated = np.asarray(evaluated)
+    if rule == "majority":
+        return np.maximum(1, (evaluated + 1) // 2)
+    if rule == "any":
+        return np.ones_like(evaluated)
+    if rule == "all":
+        return np.maximum(1, evaluated)
+    raise ValueError(f"알 수 없는 판정 규칙: {rule}")
+
+
+def parse_leader_stocks(value: Any) -> List[Dict[str, Any]]:
+    """leader_stocks 컬럼(JSON 문자열 또는 리스트) → 리스트"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+def _parse_performance(value: Any) -> Dict[str, Any]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return {}
+    return value if isinstance(value, dict) else {}
+
+
+def build_frames(predictions: Sequence[Dict[str, Any]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """예측 목록 → (preds, legs) — leader_stocks는 여기서 한 번만 디코딩
+
+    actual_performance가 있으면(평가 완료 행) 종목 수익률과 index_return을 채운다.
+    """
+    pred_rows = []
+    leg_rows = []
+    for i, pred in enumerate(predictions):
+        performance = _parse_performance(pred.get("actual_performance"))
+        index_return = performance.get("index_return")
+        pred_rows.append({
+            "id": pred.get("id"),
+            "prediction_date": pred.get("prediction_date") or "",
+            "category": pred.get("category", "today"),
+            "theme_name": pred.get("theme_name", "N/A"),
+            "confidence": pred.get("confidence", "N/A"),
+            "status": pred.get("status", ""),
+            "index_return": float(index_return) if isinstance(index_return, (int, float)) else np.nan,
+        })
+        for stock in parse_leader_stocks(pred.get("leader_stocks")):
+            code = stock.get("code", "") if isinstance(stock, dict) else ""
+            if not code:
+                continue
+            ret = performance.get(code)
+            leg_rows.append({
+                "pred": i,
+                "code": code,
+                "name": stock.get("name", code),
+                "ret": float(ret) if isinstance(ret, (int, float)) else np.nan,
+            })
+
+    preds = pd.DataFrame(pred_rows, columns=[
+        "id", "prediction_date", "category", "theme_name", "confidence", "status", "index_return",
+    ])
+    legs = pd.DataFrame(leg_rows, columns=["pred", "code", "name", "ret"])
+    legs["pred"] = legs["pred"].astype(int)
+    legs["ret"] = legs["ret"].astype(float)
+    add_dimensions(preds)
+    return preds, legs
+
+
+def attach_returns(
+    preds: pd.DataFrame,
+    legs: pd.DataFrame,
+    returns_by_group: Dict[Tuple[str, str], Dict[str, float]],
+    index_by_group: Dict[Tuple[str, str], float],
+) -> None:
+    """(prediction_date, category) 그룹별 조회 결과를 legs.ret / preds.index_return에 채움"""
+    group_keys = list(zip(preds["prediction_date"], preds["category"]))
+    preds["index_return"] = [index_by_group.get(key, 0.0) for key in group_keys]
+    leg_keys = [group_keys[p] for p in legs["pred"]]
+    legs["ret"] = [
+        returns_by_group.get(key, {}).get(code, np.nan)
+        for key, code in zip(leg_keys, legs["code"])
+    ]
+    legs["ret"] = legs["ret"].astype(float)
+    add_dimensions(preds)
+
+
+def add_dimensions(preds: pd.DataFrame) -> None:
+    """집계용 파생 컬럼: weekday(예측일 요일), regime(평가 구간 KOSPI 수익률 기준 상승/보합/하락)"""
+    dates = pd.to_datetime(preds["prediction_date"], format="%Y-%m-%d", errors="coerce")
+    preds["weekday"] = [WEEKDAYS[d.weekday()] if not pd.isna(d) else "N/A" for d in dates]
+    index_return = preds["index_return"].to_numpy(dtype=float)
+    preds["regime"] = np.select(
+        [np.isnan(index_return), index_return > REGIME_BAND, index_return < -REGIME_BAND],
+        ["N/A", "상승", "하락"],
+        "보합",
+    )
+
+
+def due_mask(preds: pd.DataFrame, now: Optional[datetime] = None, force: bool = False) -> np.ndarray:
+    """평가 시점 도달 여부 (today: 당일 18:00 이후, 그 외: 카테고리별 영업일 경과)"""
+    has_date = (preds["prediction_date"] != "").to_numpy()
+    if force:
+        return has_date
+    now = now or datetime.now(KST).replace(tzinfo=None)
+    calendar = get_calendar()
+
+    elapsed = {
+        d: calendar.sessions_between(d, now)
+        for d in preds.loc[has_date, "prediction_date"].unique()
+    }
+    dates = preds["prediction_date"]
+    is_today = (preds["category"] == "today").to_numpy()
+    today_due = np.array([bool(d) and now >= datetime.strptime(d, "%Y-%m-%d").replace(hour=18) for d in dates])
+    max_sessions = preds["category"].map(MAX_SESSIONS).fillna(DEFAULT_MAX_SESSIONS).to_numpy()
+    sessions = np.array([elapsed.get(d, -1) for d in dates])
+    return has_date & np.where(is_today, today_due, sessions >= max_sessions)
+
+
+def evaluate_frame(
+    preds: pd.DataFrame,
+    legs: pd.DataFrame,
+    threshold: float = HIT_THRESHOLD,
+    rule: str = "majority",
+) -> np.ndarray:
+    """예측별 hit/missed/expired 판정 (평가 시점 여부는 due_mask로 별도 판단)"""
+    n = len(preds)
+    # legs.pred(preds 인덱스) → preds 내 위치 (preds가 부분 집합이면 밖의 종목은 제외)
+    pred = preds.index.get_indexer(legs["pred"])
+    ret = legs["ret"].to_numpy(dtype=float)[pred >= 0]
+    pred = pred[pred >= 0]
+    valid = ~np.isnan(ret)
+    n_codes = np.bincount(pred, minlength=n)
+    n_eval = np.bincount(pred[valid], minlength=n)
+    n_hit = np.bincount(pred[valid & (ret >= threshold)], minlength=n)
+    return np.select(
+        [(n_codes == 0) | (n_eval == 0), n_hit >= required_hits(n_eval, rule)],
+        ["expired", "hit"],
+        "missed",
+    )
+
+
+def accuracy_by(preds: pd.DataFrame, status: Iterable[str], dimension: str) -> Dict[str, Dict[str, Any]]:
+    """차원별 적중률 {값: {total, hit, accuracy}} (hit/missed만 집계)"""
+    frame = pd.DataFrame({"key": preds[dimension].astype(str).to_numpy(), "status": np.asarray(list(status))})
+    frame = frame[frame["status"].isin(["hit", "missed"])]
+    if frame.empty:
+        return {}
+    grouped = frame.assign(hit=frame["status"] == "hit").groupby("key", sort=False)["hit"].agg(["size", "sum"])
+    return {
+        key: {
+            "total": int(row["size"]),
+            "hit": int(row["sum"]),
+            "accuracy": round(int(row["sum"]) / int(row["size"]) * 100, 1) if row["size"] else 0.0,
+        }
+        for key, row in grouped.iterrows()
+    }
+
+
+def accuracy_report(preds: pd.DataFrame, status: Iterable[str], dimensions: Sequence[str] = DIMENSIONS) -> Dict[str, Any]:
+    """전체 + 차원별 적중률 (calculate_accuracy_report 반환 형식, by_<차원> 키)"""
+    status = np.asarray(list(status))
+    decided = np.isin(status, ["hit", "missed"])
+    total = int(decided.sum())
+    hits = int((status == "hit").sum())
+    report: Dict[str, Any] = {
+        "total": total,
+        "hit": hits,
+        "accuracy": round(hits / total * 100, 1) if total else 0.0,
+    }
+    for dimension in dimensions:
+        name = "theme" if dimension == "theme_name" else dimension
+        report[f"by_{name}"] = accuracy_by(preds, status, dimension)
+    return report
+
+
+def sweep(
+    preds: pd.DataFrame,
+    legs: pd.DataFrame,
+    thresholds: Sequence[float] = (1.0, 2.0, 3.0, 5.0),
+    rules: Sequence[str] = ("any", "majority", "all"),
+) -> pd.DataFrame:
+    """판정 파라미터 조합별 적중률 (같은 수익률로 재판정, 가격 재조회 없음)
+
+    Returns:
+        threshold, rule, total, hit, expired, accuracy 컬럼 프레임
+    """
+    rows = []
+    for threshold in thresholds:
+        for rule in rules:
+            status = evaluate_frame(preds, legs, threshold, rule)
+            total = int(np.isin(status, ["hit", "missed"]).sum())
+            hits = int((status == "hit").sum())
+            rows.append({
+                "threshold": threshold,
+                "rule": rule,
+                "total": total,
+                "hit": hits,
+                "expired": int((status == "expired").sum()),
+                "accuracy": round(hits / total * 100, 1) if total else 0.0,
+            })
+    return pd.DataFrame(rows)
+
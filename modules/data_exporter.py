@@ -3,22 +3,36 @@
 """
 import json
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 from modules.utils import KST
+from modules import json_backend
+from modules.history_index import IndexManager, history_entry
+from modules.json_store import atomic_write_json, atomic_write_text, file_lock, read_last_jsonl
+from modules.latest_sections import update_latest
+from modules.snapshot_format import load_snapshot, write_history_snapshot
+from modules.snapshot_log import append_snapshot
 
 # 프로젝트 루트 경로
 ROOT_DIR = Path(__file__).parent.parent
 
+# 히스토리 스냅샷 저장 시 .gz/.br 사전 압축본 동시 생성 여부 (git에는 커밋하지 않음)
+SNAPSHOT_COMPRESSED_SIBLINGS = os.getenv("SNAPSHOT_COMPRESSED_SIBLINGS", "").lower() in ("1", "true")
 
-def save_history_file(data: Dict[str, Any], history_dir: Path) -> str:
+# 테마 인덱스 (히스토리 스냅샷별 테마 분석 요약, JSON Lines 추가 전용)
+THEME_INDEX_FILENAME = "theme-index.jsonl"
+
+
+def save_history_file(data: Dict[str, Any], history_dir: Path, compact: bool = False) -> str:
     """날짜_시간 형식으로 히스토리 파일 저장
 
     Args:
         data: 저장할 데이터
         history_dir: 히스토리 디렉토리 경로
+        compact: True면 compact-v2 keyframe 또는 같은 날 직전 스냅샷 대비 delta-v1로 저장
+                 (modules/snapshot_format.py, 읽을 때는 load_snapshot 사용)
 
     Returns:
         저장된 파일명
@@ -29,87 +43,201 @@ def save_history_file(data: Dict[str, Any], history_dir: Path) -> str:
     filename = now.strftime("%Y-%m-%d_%H%M") + ".json"
     file_path = history_dir / filename
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if compact:
+        write_history_snapshot(file_path, data, siblings=SNAPSHOT_COMPRESSED_SIBLINGS)
+    else:
+        atomic_write_json(file_path, data)
 
     return filename
 
 
-def cleanup_old_history(history_dir: Path, days: int = 30) -> int:
-    """30일 이상 된 히스토리 파일 삭제
+def history_index_manager(
+    output_dir: Path,
+    history_subdir: str = "history",
+    index_filename: str = "history-index.json",
+    retention_days: int = 30,
+) -> IndexManager:
+    """히스토리 디렉토리 인덱스 관리자 (history / forecast-history 공용)
 
     Args:
-        history_dir: 히스토리 디렉토리 경로
-        days: 보관 기간 (기본 30일)
-
-    Returns:
-        삭제된 파일 수
+        output_dir: 데이터 출력 디렉토리 (history 상위 디렉토리)
+        history_subdir: 히스토리 서브디렉토리명 (기본 "history")
+        index_filename: 인덱스 파일명 (기본 "history-index.json")
+        retention_days: 보관 기간 (기본 30일)
     """
-    if not history_dir.exists():
-        return 0
-
-    cutoff_date = datetime.now(KST) - timedelta(days=days)
-    deleted_count = 0
+    return IndexManager(
+        output_dir / history_subdir,
+        output_dir / index_filename,
+        lambda file_path: history_entry(file_path, history_subdir),
+        retention_days=retention_days,
+    )
 
-    for file_path in history_dir.glob("*.json"):
-        try:
-            # 파일명에서 날짜 추출 (YYYY-MM-DD_HHMM.json)
-            date_str = file_path.stem[:10]  # YYYY-MM-DD
-            file_date = datetime.strptime(date_str, "%Y-%m-%d")
-            file_date = file_date.replace(tzinfo=KST)
-
-            if file_date < cutoff_date:
-                file_path.unlink()
-                deleted_count += 1
-        except (ValueError, IndexError):
-            # 파일명 형식이 맞지 않으면 건너뜀
-            continue
 
-    return deleted_count
-
-
-def update_history_index(
+def record_history_file(
     output_dir: Path,
+    filename: str,
     history_subdir: str = "history",
     index_filename: str = "history-index.json",
 ) -> None:
-    """히스토리 인덱스 파일 갱신
+    """새 히스토리 파일을 인덱스에 추가하고 보관 기간이 지난 파일 정리 후 인덱스 저장"""
+    with file_lock(output_dir / index_filename):
+        index = history_index_manager(output_dir, history_subdir, index_filename)
+        index.add_file(output_dir / history_subdir / filename)
+        index.evict_expired()
+        index.save()
+
+
+def _theme_index_entry(data: Dict[str, Any], filename: str) -> Optional[Dict[str, Any]]:
+    """스냅샷 데이터에서 테마 인덱스 한 줄 구성 (테마 분석이 없으면 None)
+
+    대장주의 news_evidence(긴 URL 목록)는 제외하여 항목당 약 2KB로 유지한다.
+    """
+    theme_analysis = data.get("theme_analysis")
+    if not theme_analysis or not theme_analysis.get("themes"):
+        return None
+
+    themes = []
+    leader_codes = []
+    for theme in theme_analysis["themes"]:
+        leaders = []
+        for stock in theme.get("leader_stocks", []):
+            leaders.append({k: v for k, v in stock.items() if k != "news_evidence"})
+            if stock.get("code"):
+                leader_codes.append(stock["code"])
+        themes.append({**theme, "leader_stocks": leaders})
+
+    stem = Path(filename).stem
+    return {
+        "filename": filename,
+        "date": stem[:10],
+        "time": stem[11:13] + ":" + stem[13:15],
+        "analyzed_at": theme_analysis.get("analyzed_at", ""),
+        "analysis_date": theme_analysis.get("analysis_date", ""),
+        "market_summary": theme_analysis.get("market_summary", ""),
+        "themes": themes,
+        "leader_codes": leader_codes,
+    }
+
+
+def _same_snapshot_day(last: Dict[str, Any], entry: Dict[str, Any]) -> bool:
+    """같은 날짜의 같은 테마 분석(analyzed_at)인지 — 인덱스에는 날짜별로 분석마다 1줄만 둔다"""
+    return bool(entry["analyzed_at"]) and last.get("analyzed_at") == entry["analyzed_at"] and last.get("date") == entry["date"]
+
+
+def load_theme_index(output_dir: Path) -> List[Dict[str, Any]]:
+    """테마 인덱스 로드 (오래된 순). 인덱스가 없으면 히스토리 스냅샷에서 1회 재구성
 
     Args:
         output_dir: 데이터 출력 디렉토리 (history 상위 디렉토리)
-        history_subdir: 히스토리 서브디렉토리명 (기본 "history")
-        index_filename: 인덱스 파일명 (기본 "history-index.json")
     """
-    history_dir = output_dir / history_subdir
-
-    if not history_dir.exists():
-        entries = []
-    else:
-        entries = []
-        for file_path in sorted(history_dir.glob("*.json"), reverse=True):
+    index_path = output_dir / THEME_INDEX_FILENAME
+    if not index_path.exists():
+        rebuild_theme_index(output_dir)
+    if not index_path.exists():
+        return []
+
+    entries = []
+    with open(index_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
             try:
-                # 파일명에서 날짜/시간 추출 (YYYY-MM-DD_HHMM.json)
-                filename = file_path.name
-                date_str = file_path.stem[:10]  # YYYY-MM-DD
-                time_str = file_path.stem[11:13] + ":" + file_path.stem[13:15]  # HH:MM
-
-                entries.append({
-                    "filename": filename,
-                    "date": date_str,
-                    "time": time_str,
-                    "path": f"data/{history_subdir}/{filename}",
-                })
-            except (ValueError, IndexError):
+                entries.append(json_backend.loads(line))
+            except json.JSONDecodeError:
+                # 쓰기 도중 중단된 마지막 줄 등은 건너뜀
                 continue
+    return entries
 
-    index_data = {
-        "updated_at": datetime.now(KST).strftime("%Y-%m-%d %H:%M:%S"),
-        "entries": entries,
-    }
 
-    index_path = output_dir / index_filename
-    with open(index_path, "w", encoding="utf-8") as f:
-        json.dump(index_data, f, ensure_ascii=False, indent=2)
+def append_theme_index(data: Dict[str, Any], filename: str, output_dir: Path) -> bool:
+    """히스토리 스냅샷의 테마 분석을 테마 인덱스에 1줄 추가
+
+    직전 항목과 날짜·analyzed_at이 모두 같으면(같은 날 장중 갱신 시 기존 테마 분석 보존) 추가하지 않는다.
+    분석이 이월된 다음 날 스냅샷은 날짜가 다르므로 추가된다 (날짜별 빈도/모멘텀 집계 유지).
+    히스토리 스냅샷과 달리 30일 정리 대상이 아니므로 장기 모멘텀/로테이션 분석에 사용할 수 있다.
+
+    Returns:
+        추가 여부
+    """
+    entry = _theme_index_entry(data, filename)
+    if entry is None:
+        return False
+
+    index_path = output_dir / THEME_INDEX_FILENAME
+    with file_lock(index_path):
+        if not index_path.exists():
+            # 인덱스 최초 생성: 방금 저장한 스냅샷까지 포함하여 재구성
+            return rebuild_theme_index(output_dir) > 0
+
+        last = read_last_jsonl(index_path)
+        if last and _same_snapshot_day(last, entry):
+            return False
+
+        with open(index_path, "a", encoding="utf-8") as f:
+            f.write(json_backend.dumps(entry) + "\n")
+    return True
+
+
+def rebuild_theme_index(output_dir: Path, history_subdir: str = "history") -> int:
+    """히스토리 스냅샷 전체를 스캔하여 테마 인덱스 재구성 (최초 1회 / 복구용)
+
+    Returns:
+        인덱스 항목 수
+    """
+    history_dir = output_dir / history_subdir
+    if not history_dir.exists():
+        return 0
+
+    lines = []
+    last = None
+    for file_path in sorted(history_dir.glob("*.json")):
+        try:
+            data = load_snapshot(file_path)
+        except (json.JSONDecodeError, OSError, KeyError, ValueError):
+            continue
+        entry = _theme_index_entry(data, file_path.name)
+        if entry is None:
+            continue
+        if last and _same_snapshot_day(last, entry):
+            continue
+        last = entry
+        lines.append(json_backend.dumps(entry))
+
+    atomic_write_text(output_dir / THEME_INDEX_FILENAME, "".join(line + "\n" for line in lines))
+    return len(lines)
+
+
+def merge_theme_index(output_dir: Path, other_path: Path) -> int:
+    """다른 테마 인덱스(워크플로우 백업 등)를 현재 인덱스와 filename 기준 합집합으로 병합
+
+    git reset --hard 후 백업을 그대로 덮어쓰면 원격에서 다른 실행이 추가한 항목이 사라지므로
+    양쪽 항목을 합쳐 filename 순으로 다시 쓴다. 같은 filename은 other_path 쪽을 사용한다.
+
+    Returns:
+        병합 후 인덱스 항목 수
+    """
+    index_path = output_dir / THEME_INDEX_FILENAME
+    with file_lock(index_path):
+        merged = {}
+        for path in (index_path, Path(other_path)):
+            if not path.exists():
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json_backend.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry.get("filename"):
+                        merged[entry["filename"]] = line
+        if not merged:
+            return 0
+        atomic_write_text(index_path, "".join(merged[name] + "\n" for name in sorted(merged)))
+    return len(merged)
 
 
 def _strip_meta(data: Dict) -> Dict:
@@ -192,36 +320,33 @@ def export_for_frontend(
     # None 값 필드 제거
     data = {k: v for k, v in data.items() if v is not None}
 
-    # 기존 latest.json에서 collect_investor_data.py가 저장한 필드 보존
+    def _preserve_investor_fields(existing: Dict[str, Any]) -> Dict[str, Any]:
+        """잠금 상태에서 읽은 최신 latest.json의 collect_investor_data.py 관리 필드 보존"""
+        # investor_intraday: 장중 수급 스냅샷 (collect_investor_data.py가 관리)
+        if "investor_intraday" in existing and "investor_intraday" not in data:
+            data["investor_intraday"] = existing["investor_intraday"]
+        # investor_data: 장중 API는 history/program_net을 반환하지 않으므로 기존 값 보존
+        if "investor_data" in existing and "investor_data" in data:
+            old_inv = existing["investor_data"]
+            for code, new_stock in data["investor_data"].items():
+                old_stock = old_inv.get(code, {})
+                if "history" not in new_stock and "history" in old_stock:
+                    new_stock["history"] = old_stock["history"]
+                if "program_net" not in new_stock and "program_net" in old_stock:
+                    new_stock["program_net"] = old_stock["program_net"]
+        return data
+
+    # JSON 파일 저장 (latest.json + 변경된 섹션 파일, 잠금 + 원자적 교체)
     file_path = output_path / "latest.json"
-    if file_path.exists():
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                existing = json.load(f)
-            # investor_intraday: 장중 수급 스냅샷 (collect_investor_data.py가 관리)
-            if "investor_intraday" in existing and "investor_intraday" not in data:
-                data["investor_intraday"] = existing["investor_intraday"]
-            # investor_data: 장중 API는 history/program_net을 반환하지 않으므로 기존 값 보존
-            if "investor_data" in existing and "investor_data" in data:
-                old_inv = existing["investor_data"]
-                for code, new_stock in data["investor_data"].items():
-                    old_stock = old_inv.get(code, {})
-                    if "history" not in new_stock and "history" in old_stock:
-                        new_stock["history"] = old_stock["history"]
-                    if "program_net" not in new_stock and "program_net" in old_stock:
-                        new_stock["program_net"] = old_stock["program_net"]
-        except Exception:
-            pass
-
-    # JSON 파일 저장 (latest.json)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    saved = update_latest(output_path, _preserve_investor_fields)
+    # 모의투자용 장중 스냅샷 로그 (대장주 + 현재가)
+    append_snapshot(output_path, saved)
 
     # 히스토리 파일 저장
     if save_history:
         history_dir = output_path / "history"
-        save_history_file(data, history_dir)
-        cleanup_old_history(history_dir, days=30)
-        update_history_index(output_path)
+        filename = save_history_file(data, history_dir, compact=True)
+        append_theme_index(data, filename, output_path)
+        record_history_file(output_path, filename)
 
     return str(file_path)
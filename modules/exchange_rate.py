@@ -2,32 +2,204 @@
 한국수출입은행 환율 API 클라이언트
 - 실시간 환율 정보 조회
 - 주요 통화(USD, JPY, EUR, CNY) 환율 제공
+- 날짜별 응답 캐시 (.exchange_rate_cache.json) — 지난 날짜 고시는 바뀌지 않으므로 영구 보관,
+  당일 고시는 TODAY_TTL 동안만 재사용. 빈 응답(고시 없음)은 지난 날짜만 저장한다 (당일 고시 전 응답 제외)
+- 고시 없는 날(주말/공휴일)은 이전 후보 날짜를 동시에 조회해 가장 최근 고시일을 찾는다
+- get_range: 기간 일별 매매기준율 (차트용)
 """
+import threading
 import time
 import urllib3
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+from modules.json_store import atomic_write_json, read_json
+from modules.trading_calendar import DateLike, to_date
 from modules.utils import KST
 
 # 주요 통화 코드
 MAJOR_CURRENCIES = ["USD", "JPY(100)", "EUR", "CNH"]
 
+# 고시 데이터가 없을 때 거슬러 올라가 조회할 최대 일수
+MAX_BACK_DAYS = 7
+
+CACHE_PATH = Path(__file__).parent.parent / ".exchange_rate_cache.json"
+TODAY_TTL = 3600  # 당일 고시 캐시 유효 시간 (초)
+PROBE_WORKERS = 4  # 이전 날짜 동시 조회 수
+RANGE_WORKERS = 4  # get_range 동시 조회 수
+
+
+def back_dates(search_date: str, days: int = MAX_BACK_DAYS) -> List[str]:
+    """search_date 이전 days일 중 조회할 날짜 (YYYYMMDD, 최신순)
+
+    주말은 고시가 없어 제외한다. 은행 영업일은 KRX 휴장일과 다르므로(12/31 등) 거래일 달력으로
+    거르거나 순서를 바꾸지 않는다 — 가장 최근 고시일이 곧 전일 기준이다.
+    """
+    base_date = datetime.strptime(search_date, "%Y%m%d")
+    candidates = [base_date - timedelta(days=n) for n in range(1, days + 1)]
+    return [d.strftime("%Y%m%d") for d in candidates if d.weekday() < 5]
+
 
 class ExchangeRateAPI:
-    """한국수출입은행 환율 API 클라이언트"""
+    """한국수출입은행 환율 API 클라이언트
 
-    def __init__(self, api_key: str = None):
-        """
-        Args:
-            api_key: 한국수출입은행 API 인증키
-        """
+    Args:
+        api_key: 한국수출입은행 API 인증키
+        cache_path: 날짜별 응답 캐시 파일 (None이면 메모리 캐시만)
+    """
+
+    def __init__(self, api_key: str = None, cache_path: Optional[Path] = CACHE_PATH):
         self.api_key = api_key or "iiUCA5fWpK1ni8A3BR5JrWk7obCuk5ka"
         self.api_url = "https://www.koreaexim.go.kr/site/program/financial/exchangeJSON"
 
+        # Session 재사용 (WAF 쿠키 검증 통과를 위해 필수)
+        # verify=False: GitHub Actions에서 koreaexim SSL 인증서 검증 실패 대응
+        self.session = requests.Session()
+        self.session.verify = False
+        self.session.headers.update({
+            "User-Agent": "Mozilla/5.0 (compatible; ExchangeRateBot/1.0)"
+        })
+
+        self.cache_path = cache_path
+        cached = read_json(cache_path, default={}) if cache_path else {}
+        # {YYYYMMDD: {"items": [주요 통화 응답 항목], "fetched_at": epoch초}}
+        self._cache: Dict[str, Dict[str, Any]] = cached if isinstance(cached, dict) else {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(KST).strftime("%Y%m%d")
+
+    def _cached(self, search_date: str) -> Optional[List[Dict[str, Any]]]:
+        """캐시된 고시 항목 (지난 날짜는 빈 응답도 유효, 당일은 TODAY_TTL 내 고시만) — 없으면 None"""
+        entry = self._cache.get(search_date)
+        if entry is None:
+            return None
+        if search_date < self._today():
+            return entry["items"]
+        if entry["items"] and time.time() - entry["fetched_at"] < TODAY_TTL:
+            return entry["items"]
+        return None
+
+    def _fetch(self, search_date: str) -> List[Dict[str, Any]]:
+        """한 날짜의 주요 통화 고시 항목 (캐시 우선, 고시 없으면 [])
+
+        Raises:
+            requests.exceptions.RequestException: 3회 재시도 후에도 연결 실패
+            ValueError: 목록이 아니거나 항목 result가 1(성공)이 아닌 응답 (인증 오류·호출 한도 등 — 캐시하지 않음)
+        """
+        cached = self._cached(search_date)
+        if cached is not None:
+            return cached
+
+        params = {
+            "authkey": self.api_key,
+            "searchdate": search_date,
+            "data": "AP01",  # 환율
+        }
+        last_err = None
+        for attempt in range(3):
+            try:
+                response = self.session.get(self.api_url, params=params, timeout=10)
+                response.raise_for_status()
+                data = response.json()
+                break
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                last_err = e
+                print(f"[환율] 연결 재시도 ({attempt + 1}/3): {e}")
+                time.sleep(2 * (attempt + 1))
+        else:
+            raise last_err
+
+        if data is None:
+            data = []
+        if not isinstance(data, list):
+            raise ValueError(f"예상하지 못한 응답 ({search_date}): {str(data)[:200]}")
+
+        # 오류 응답도 목록으로 온다: [{"result": 3, ...}] (2: DATA 코드 오류, 3: 인증코드 오류, 4: 일일 제한 횟수 마감)
+        failed = [item for item in data if item.get("result", 1) != 1]
+        if failed:
+            raise ValueError(f"오류 응답 ({search_date}): result={failed[0].get('result')}")
+
+        items = [item for item in data if item.get("cur_unit", "") in MAJOR_CURRENCIES]
+        if not items and search_date >= self._today():
+            return items  # 당일 고시 전 — 지나간 뒤 '고시 없음'으로 굳지 않도록 저장하지 않음
+        with self._lock:
+            self._cache[search_date] = {"items": items, "fetched_at": time.time()}
+            self._dirty = True
+        return items
+
+    def _fetch_quiet(self, search_date: str) -> Optional[List[Dict[str, Any]]]:
+        """_fetch — 실패하면 None (동시 조회용)"""
+        try:
+            return self._fetch(search_date)
+        except Exception as e:
+            print(f"[환율] {search_date} 조회 실패: {e}")
+            return None
+
+    def _probe(self, dates: List[str]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """후보 날짜(우선순) 중 고시가 있는 첫 날짜와 항목
+
+        캐시로 판정되는 앞쪽 후보는 바로 확인하고, 나머지는 동시에 조회해 우선순으로 기다린다.
+        앞 후보에서 고시가 확인되면 아직 시작하지 않은 조회는 취소한다.
+        """
+        for i, search_date in enumerate(dates):
+            cached = self._cached(search_date)
+            if cached is None:
+                dates = dates[i:]
+                break
+            if cached:
+                return search_date, cached
+        else:
+            return None, []
+
+        pool = ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(dates)))
+        try:
+            futures = [pool.submit(self._fetch_quiet, d) for d in dates]
+            for search_date, future in zip(dates, futures):
+                items = future.result()
+                if items:
+                    return search_date, items
+            return None, []
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _save_cache(self) -> None:
+        if not self.cache_path or not self._dirty:
+            return
+        with self._lock:
+            payload = dict(self._cache)
+            self._dirty = False
+        try:
+            atomic_write_json(self.cache_path, payload, indent=None)
+        except OSError as e:
+            print(f"[환율] 캐시 저장 실패: {e}")
+
+    def _to_rates(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """응답 항목 → 주요 통화 환율 목록 (USD, JPY, EUR, CNY 순)"""
+        rates = []
+        for item in items:
+            cur_unit = item.get("cur_unit", "")
+            if cur_unit in MAJOR_CURRENCIES:
+                rates.append({
+                    "currency": cur_unit.replace("(100)", "").replace("CNH", "CNY"),  # JPY(100)->JPY, CNH->CNY
+                    "currency_name": item.get("cur_nm", ""),
+                    "rate": self._parse_number(item.get("deal_bas_r", "0")),  # 매매기준율
+                    "ttb": self._parse_number(item.get("ttb", "0")),  # 송금 받을 때 (전신환매입률)
+                    "tts": self._parse_number(item.get("tts", "0")),  # 송금 보낼 때 (전신환매도율)
+                    "is_100": "(100)" in cur_unit,  # 100단위 여부 (JPY)
+                })
+
+        currency_order = {"USD": 0, "JPY": 1, "EUR": 2, "CNY": 3}
+        rates.sort(key=lambda x: currency_order.get(x["currency"], 99))
+        return rates
+
     def get_exchange_rates(self, search_date: str = None) -> Dict[str, Any]:
         """환율 정보 조회
 
@@ -45,78 +217,20 @@ class ExchangeRateAPI:
         """
         # 조회일자 설정
         if not search_date:
-            now = datetime.now(KST)
-            search_date = now.strftime("%Y%m%d")
-
-        params = {
-            "authkey": self.api_key,
-            "searchdate": search_date,
-            "data": "AP01",  # 환율
-        }
+            search_date = self._today()
 
         try:
-            # Session 사용 (WAF 쿠키 검증 통과를 위해 필수)
-            # verify=False: GitHub Actions에서 koreaexim SSL 인증서 검증 실패 대응
-            session = requests.Session()
-            session.verify = False
-            session.headers.update({
-                "User-Agent": "Mozilla/5.0 (compatible; ExchangeRateBot/1.0)"
-            })
-
-            data = None
-            last_err = None
-            for attempt in range(3):
-                try:
-                    response = session.get(self.api_url, params=params, timeout=10)
-                    response.raise_for_status()
-                    data = response.json()
-                    break
-                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
-                    last_err = e
-                    print(f"[환율] 연결 재시도 ({attempt + 1}/3): {e}")
-                    time.sleep(2 * (attempt + 1))
-
-            if data is None and last_err:
-                raise last_err
-
-            if not data:
-                # 데이터가 없으면 최대 7일 전까지 조회 시도 (주말/공휴일 대응)
-                base_date = datetime.strptime(search_date, "%Y%m%d")
-                for days_back in range(1, 8):
-                    prev_date = (base_date - timedelta(days=days_back)).strftime("%Y%m%d")
-                    params["searchdate"] = prev_date
-                    response = session.get(self.api_url, params=params, timeout=10)
-                    response.raise_for_status()
-                    data = response.json()
-                    if data:
-                        search_date = prev_date
-                        break
-
-            # 주요 통화만 필터링
-            rates = []
-            for item in data:
-                cur_unit = item.get("cur_unit", "")
-                if cur_unit in MAJOR_CURRENCIES:
-                    # 숫자 파싱 (쉼표 제거)
-                    deal_bas_r = self._parse_number(item.get("deal_bas_r", "0"))
-                    ttb = self._parse_number(item.get("ttb", "0"))
-                    tts = self._parse_number(item.get("tts", "0"))
-
-                    rates.append({
-                        "currency": cur_unit.replace("(100)", "").replace("CNH", "CNY"),  # JPY(100)->JPY, CNH->CNY
-                        "currency_name": item.get("cur_nm", ""),
-                        "rate": deal_bas_r,  # 매매기준율
-                        "ttb": ttb,  # 송금 받을 때 (전신환매입률)
-                        "tts": tts,  # 송금 보낼 때 (전신환매도율)
-                        "is_100": "(100)" in cur_unit,  # 100단위 여부 (JPY)
-                    })
-
-            # 통화 순서 정렬 (USD, JPY, EUR, CNY)
-            currency_order = {"USD": 0, "JPY": 1, "EUR": 2, "CNY": 3}
-            rates.sort(key=lambda x: currency_order.get(x["currency"], 99))
+            items = self._fetch(search_date)
+            if not items:
+                # 데이터가 없으면 최대 7일 전까지 조회 (주말/공휴일 대응)
+                found, items = self._probe(back_dates(search_date))
+                if found:
+                    search_date = found
+
+            rates = self._to_rates(items)
 
             # 전일 대비 변동 계산
-            self._add_change(rates, search_date, session)
+            self._add_change(rates, search_date)
 
             return {
                 "timestamp": datetime.now(KST).strftime("%Y-%m-%d %H:%M:%S"),
@@ -130,34 +244,18 @@ class ExchangeRateAPI:
         except Exception as e:
             print(f"[환율] 데이터 처리 실패: {e}")
             return {"timestamp": "", "search_date": "", "rates": []}
+        finally:
+            self._save_cache()
 
-    def _add_change(self, rates: list, search_date: str, session) -> None:
+    def _add_change(self, rates: list, search_date: str) -> None:
         """전일 환율 대비 변동폭/변동률 추가"""
         try:
-            base_date = datetime.strptime(search_date, "%Y%m%d")
-            prev_data = None
-            for days_back in range(1, 8):
-                prev_date = (base_date - timedelta(days=days_back)).strftime("%Y%m%d")
-                params = {
-                    "authkey": self.api_key,
-                    "searchdate": prev_date,
-                    "data": "AP01",
-                }
-                resp = session.get(self.api_url, params=params, timeout=10)
-                if resp.ok and resp.json():
-                    prev_data = resp.json()
-                    break
-
-            if not prev_data:
+            _, prev_items = self._probe(back_dates(search_date))
+            if not prev_items:
                 return
 
             # 전일 환율 맵 생성
-            prev_map = {}
-            for item in prev_data:
-                cur_unit = item.get("cur_unit", "")
-                if cur_unit in MAJOR_CURRENCIES:
-                    key = cur_unit.replace("(100)", "").replace("CNH", "CNY")
-                    prev_map[key] = self._parse_number(item.get("deal_bas_r", "0"))
+            prev_map = {r["currency"]: r["rate"] for r in self._to_rates(prev_items)}
 
             for rate in rates:
                 prev_rate = prev_map.get(rate["currency"])
@@ -167,6 +265,44 @@ class ExchangeRateAPI:
         except Exception as e:
             print(f"[환율] 전일 대비 변동 계산 실패: {e}")
 
+    def get_range(self, start: DateLike, end: DateLike) -> List[Dict[str, Any]]:
+        """기간 일별 매매기준율 (차트용, 고시가 있는 날만)
+
+        캐시에 없는 평일만 RANGE_WORKERS개씩 동시에 조회한다 (API 일일 호출 한도 1,000건 —
+        처음 조회하는 긴 기간은 나눠서 요청). 조회에 실패한 날은 결과에서 빠진다.
+
+        Args:
+            start, end: 기간 (YYYYMMDD/YYYY-MM-DD/date, 양 끝 포함)
+
+        Returns:
+            [{"date": "2026-02-03", "rates": {"USD": 1450.5, "JPY": 950.1, "EUR": ..., "CNY": ...}}, ...]
+            (날짜 오름차순)
+        """
+        day, last = to_date(start), to_date(end)
+        dates = []
+        while day <= last:
+            if day.weekday() < 5:
+                dates.append(day.strftime("%Y%m%d"))
+            day += timedelta(days=1)
+
+        items_by_date = {d: self._cached(d) for d in dates}
+        missing = [d for d, items in items_by_date.items() if items is None]
+        try:
+            if missing:
+                with ThreadPoolExecutor(max_workers=min(RANGE_WORKERS, len(missing))) as pool:
+                    items_by_date.update(zip(missing, pool.map(self._fetch_quiet, missing)))
+        finally:
+            self._save_cache()
+
+        return [
+            {
+                "date": f"{d[:4]}-{d[4:6]}-{d[6:]}",
+                "rates": {r["currency"]: r["rate"] for r in self._to_rates(items)},
+            }
+            for d, items in items_by_date.items()
+            if items
+        ]
+
     def _parse_number(self, value: str) -> float:
         """숫자 문자열 파싱 (쉼표 제거)"""
         if not value:
@@ -2,24 +2,28 @@
 
 3개 에이전트(뉴스/감성, 시장데이터, 종합) + 2-Phase JSON 구조화.
 예측당 총 6회 API 호출 (1 검색 + 1 + 3 voting 검색없음 + 1 JSON).
+
+Agent 1, 2는 서로의 결과를 참조하지 않으므로 별도 키로 동시 실행하고,
+두 결과가 모두 준비된 뒤에 종합 에이전트를 시작한다.
 """
 import logging
 import time
 import requests
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 from modules.theme_forecast import (
     GEMINI_API_URL,
     GeminiDailyQuotaExhausted,
-    _exhausted_keys,
     _extract_text_from_response,
     _extract_grounding_sources,
     _gemini_post,
     _call_gemini_phase2,
     _self_consistency_vote,
 )
+from modules.gemini_key_pool import get_key_pool
 from modules.utils import KST
 from datetime import datetime
 
@@ -178,11 +182,100 @@ def _build_synthesis_prompt(news_analysis: str, market_analysis: str, context: s
 JSON 형식 불필요. 상세한 종합 분석 텍스트를 출력하세요."""
 
 
+def _pick_agent_key(available_keys: List[str], busy_keys: set) -> Optional[str]:
+    """소진되지 않은 키 중 다른 에이전트가 사용 중이지 않은 키 우선 선택 (여유가 큰 순서)"""
+    candidates = get_key_pool().available_keys(available_keys)
+    if not candidates:
+        return None
+    for k in candidates:
+        if k not in busy_keys:
+            return k
+    return candidates[0]
+
+
+def _run_agent_with_failover(
+    name: str,
+    agent_fn: Callable[[str, str], Tuple[Optional[str], List[Dict[str, str]]]],
+    context: str,
+    api_key: str,
+    available_keys: List[str],
+    busy_keys: set,
+) -> Dict:
+    """단일 에이전트 실행 — 일일 할당 소진 시 다른 키로 1회 재시도
+
+    Returns:
+        {"name", "text", "sources", "key", "elapsed"} (실패 시 text=None)
+    """
+    started = time.perf_counter()
+    key = api_key
+    text, sources = None, []
+    try:
+        text, sources = agent_fn(context, key)
+    except GeminiDailyQuotaExhausted:
+        get_key_pool().mark_exhausted(key)
+        retry_key = _pick_agent_key(available_keys, busy_keys)
+        if retry_key:
+            logger.debug("%s 키 소진, 다른 키로 재시도...", name)
+            key = retry_key
+            try:
+                text, sources = agent_fn(context, key)
+            except GeminiDailyQuotaExhausted:
+                get_key_pool().mark_exhausted(key)
+                logger.warning("%s 실패 (재시도 키도 소진)", name)
+        else:
+            logger.warning("%s 실패 (가용 키 없음)", name)
+
+    return {
+        "name": name,
+        "text": text,
+        "sources": sources,
+        "key": key,
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def run_agents_concurrently(
+    agents: List[Tuple[str, Callable[[str, str], Tuple[Optional[str], List[Dict[str, str]]]]]],
+    context: str,
+    available_keys: List[str],
+) -> Dict[str, Dict]:
+    """서로 독립적인 에이전트를 별도 키로 동시 실행
+
+    가용 키가 에이전트 수보다 적으면 키를 순환 재사용한다.
+    각 에이전트의 소요 시간(elapsed, 초)을 결과에 포함한다.
+
+    Returns:
+        {에이전트명: _run_agent_with_failover 결과}
+    """
+    assigned = [available_keys[i % len(available_keys)] for i in range(len(agents))]
+    busy_keys = set(assigned)
+
+    results: Dict[str, Dict] = {}
+    with ThreadPoolExecutor(max_workers=len(agents)) as pool:
+        futures = {
+            pool.submit(
+                _run_agent_with_failover, name, fn, context, key, available_keys, busy_keys
+            ): name
+            for (name, fn), key in zip(agents, assigned)
+        }
+        for fut, name in futures.items():
+            try:
+                results[name] = fut.result()
+            except Exception as e:
+                logger.warning("%s 실행 오류: %s", name, e)
+                results[name] = {"name": name, "text": None, "sources": [], "key": None, "elapsed": 0.0}
+
+    for name, r in results.items():
+        status = "✓" if r["text"] else "✗"
+        print(f"    {status} {name} 완료 ({r['elapsed']:.1f}초)")
+    return results
+
+
 def run_multi_agent_forecast(context: str, api_keys: List[str]) -> Optional[Dict]:
     """Multi-Agent 오케스트레이터
 
-    1. agent_news_sentiment (1회, Google Search)
-    2. agent_market_data (1회, 검색 없음)
+    1. agent_news_sentiment (1회, Google Search)  ┐ 별도 키로 동시 실행
+    2. agent_market_data (1회, 검색 없음)          ┘
     3. agent_synthesize (3회 voting, 검색 없음 — Agent 1 결과 재활용)
     4. _call_gemini_phase2 (1회, JSON 구조화)
     총 6회 API 호출 (Google Search는 Agent 1에서만 1회)
@@ -191,64 +284,52 @@ def run_multi_agent_forecast(context: str, api_keys: List[str]) -> Optional[Dict
         return None
 
     # 소진 키 제외한 가용 키 목록
-    available_keys = [k for k in api_keys if k not in _exhausted_keys]
+    available_keys = get_key_pool().available_keys(api_keys)
     if not available_keys:
         logger.warning("모든 API 키 소진")
         return None
 
-    # 에이전트별 키 분배 (가용 키가 여러 개면 분산, 아니면 동일 키 재사용)
-    key_agent1 = available_keys[0]
-    key_agent2 = available_keys[1 % len(available_keys)]
-    key_synthesis = available_keys[0]  # Agent 1 완료 후 재사용
-    key_phase2 = available_keys[2 % len(available_keys)]
-
-    # Step 1: 뉴스/감성 에이전트
-    print("    Agent 1: 뉴스/감성 분석...")
-    try:
-        news_analysis, news_sources = agent_news_sentiment(context, key_agent1)
-    except GeminiDailyQuotaExhausted:
-        _exhausted_keys.add(key_agent1)
-        # 다른 키로 1회 재시도
-        retry_keys = [k for k in available_keys if k not in _exhausted_keys]
-        if retry_keys:
-            logger.debug("Agent 1 키 소진, 다른 키로 재시도...")
-            news_analysis, news_sources = agent_news_sentiment(context, retry_keys[0])
-            key_agent1 = retry_keys[0]
-        else:
-            logger.warning("Agent 1 실패 (가용 키 없음)")
-            return None
+    # Step 1+2: 뉴스/감성 + 시장 데이터 에이전트 동시 실행 (서로 독립)
+    print("    Agent 1+2: 뉴스/감성 + 시장 데이터 분석 (동시 실행)...")
+    started = time.perf_counter()
+    agent_results = run_agents_concurrently(
+        [
+            ("Agent 1 (뉴스/감성)", agent_news_sentiment),
+            ("Agent 2 (시장 데이터)", agent_market_data),
+        ],
+        context,
+        available_keys,
+    )
+    news_result = agent_results["Agent 1 (뉴스/감성)"]
+    market_result = agent_results["Agent 2 (시장 데이터)"]
+    print(f"    Agent 1+2 총 소요: {time.perf_counter() - started:.1f}초")
+
+    news_analysis, news_sources = news_result["text"], news_result["sources"]
     if not news_analysis:
         logger.warning("Agent 1 실패")
         return None
-
-    time.sleep(1)
-
-    # Step 2: 시장 데이터 에이전트
-    print("    Agent 2: 시장 데이터 분석...")
-    try:
-        market_analysis, _ = agent_market_data(context, key_agent2)
-    except GeminiDailyQuotaExhausted:
-        _exhausted_keys.add(key_agent2)
-        retry_keys = [k for k in available_keys if k not in _exhausted_keys]
-        if retry_keys:
-            logger.debug("Agent 2 키 소진, 다른 키로 재시도...")
-            market_analysis, _ = agent_market_data(context, retry_keys[0])
-        else:
-            logger.warning("Agent 2 실패 (가용 키 없음)")
-            return None
+    market_analysis = market_result["text"]
     if not market_analysis:
         logger.warning("Agent 2 실패")
         return None
 
-    time.sleep(1)
+    # 종합/Phase 2 키: 소진되지 않은 키 중에서 분배
+    remaining_keys = get_key_pool().available_keys(available_keys)
+    if not remaining_keys:
+        logger.warning("모든 API 키 소진")
+        return None
+    key_synthesis = news_result["key"] if news_result["key"] in remaining_keys else remaining_keys[0]
+    key_phase2 = next((k for k in remaining_keys if k != key_synthesis), key_synthesis)
 
     # Step 3: 종합 에이전트 (Self-Consistency 3회)
     print("    Agent 3: 종합 판단 (Self-Consistency 3회)...")
     synthesis_prompt = _build_synthesis_prompt(news_analysis, market_analysis, context)
+    started = time.perf_counter()
     reasoning, _ = _self_consistency_vote(synthesis_prompt, key_synthesis, n_samples=3)
     if not reasoning:
         logger.warning("Agent 3 실패")
         return None
+    print(f"    ✓ Agent 3 완료 ({time.perf_counter() - started:.1f}초)")
 
     time.sleep(1)
 
@@ -258,7 +339,7 @@ def run_multi_agent_forecast(context: str, api_keys: List[str]) -> Optional[Dict
     if not result:
         # retry with remaining keys
         tried = {key_phase2}
-        for fallback_key in api_keys:
+        for fallback_key in get_key_pool().available_keys(api_keys):
             if fallback_key in tried:
                 continue
             tried.add(fallback_key)
@@ -0,0 +1,148 @@
+"""
+스트리밍 예측 응답용 증분 JSON 파서
+
+Gemini streamGenerateContent로 받은 텍스트 조각을 feed()로 넣으면
+today/short_term/long_term 배열의 테마 객체가 닫히는 즉시 파싱·검증하여 보관한다.
+스트림이 중간에 끊겨도 그때까지 완성된 테마는 result()로 사용할 수 있다.
+"""
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+THEME_CATEGORIES = ("today", "short_term", "long_term")
+SCALAR_KEYS = ("market_context", "us_market_summary")
+
+
+def _loads_lenient(raw: str) -> Optional[Any]:
+    """json.loads, 실패 시 trailing comma/주석 제거 후 재시도"""
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        pass
+    cleaned = re.sub(r'//[^\n]*', '', raw)
+    cleaned = re.sub(r',\s*([}\]])', r'\1', cleaned)
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        return None
+
+
+def validate_theme(theme: Any) -> bool:
+    """예측 테마 객체 최소 검증 — 테마명 존재 + 대장주 항목마다 종목명/코드 존재"""
+    if not isinstance(theme, dict):
+        return False
+    name = theme.get("theme_name")
+    if not isinstance(name, str) or not name.strip():
+        return False
+    leaders = theme.get("leader_stocks", [])
+    if not isinstance(leaders, list):
+        return False
+    return all(isinstance(s, dict) and s.get("name") and s.get("code") for s in leaders)
+
+
+class IncrementalForecastParser:
+    """예측 JSON 증분 파서
+
+    루트 객체(depth 1)의 키를 추적하다가 THEME_CATEGORIES 배열 안의 객체(depth 3)가
+    닫히면 해당 구간만 잘라 파싱한다. 문자열 내부의 괄호/따옴표는 이스케이프를 고려해 무시한다.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.complete = False
+        self.rejected = 0
+        self._result: Dict[str, Any] = {k: [] for k in THEME_CATEGORIES}
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._expect_value = False
+        self._array_key: Optional[str] = None
+        self._obj_start = -1
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict]]:
+        """텍스트 조각 추가. 이번 조각으로 새로 완성·검증된 [(카테고리, 테마)] 반환"""
+        self.text += chunk
+        completed: List[Tuple[str, Dict]] = []
+        text = self.text
+
+        i = self._pos
+        while i < len(text) and not self.complete:
+            c = text[i]
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._on_root_string(text[self._string_start:i + 1])
+            elif c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 2 and c == "[":
+                    self._array_key = self._key if self._key in THEME_CATEGORIES else None
+                elif self._depth == 3 and c == "{" and self._array_key:
+                    self._obj_start = i
+            elif c in "}]":
+                if self._depth == 3 and c == "}" and self._obj_start >= 0:
+                    theme = self._on_theme(text[self._obj_start:i + 1])
+                    if theme is not None:
+                        completed.append((self._array_key, theme))
+                    self._obj_start = -1
+                self._depth -= 1
+                if self._depth == 1:
+                    self._array_key = None
+                elif self._depth == 0:
+                    self.complete = True
+            elif self._depth == 1:
+                if c == ":" and self._last_string is not None:
+                    self._key = _loads_lenient(self._last_string)
+                    self._expect_value = True
+                elif c == ",":
+                    self._key = None
+                    self._expect_value = False
+            i += 1
+
+        self._pos = i
+        return completed
+
+    def _on_root_string(self, raw: str) -> None:
+        if self._expect_value:
+            if self._key in SCALAR_KEYS:
+                value = _loads_lenient(raw)
+                if isinstance(value, str):
+                    self._result[self._key] = value
+        else:
+            self._last_string = raw
+
+    def _on_theme(self, raw: str) -> Optional[Dict]:
+        theme = _loads_lenient(raw)
+        if not validate_theme(theme):
+            self.rejected += 1
+            logger.debug("스트림 테마 검증 실패 (%s): %s", self._array_key, raw[:80])
+            return None
+        self._result[self._array_key].append(theme)
+        return theme
+
+    @property
+    def theme_count(self) -> int:
+        return sum(len(self._result[k]) for k in THEME_CATEGORIES)
+
+    def result(self) -> Dict[str, Any]:
+        """지금까지 완성·검증된 결과 (스트림이 끊긴 경우 부분 결과)"""
+        return {k: (list(v) if isinstance(v, list) else v) for k, v in self._result.items()}
@@ -11,8 +11,13 @@ import requests
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
-from config.settings import GEMINI_API_KEY_1, GEMINI_API_KEY_2, GEMINI_API_KEY_3, GEMINI_API_KEY_4, GEMINI_API_KEY_5
+from config.settings import (
+    GEMINI_API_KEY_1, GEMINI_API_KEY_2, GEMINI_API_KEY_3, GEMINI_API_KEY_4, GEMINI_API_KEY_5,
+    ANALYSIS_CONTEXT_TOKEN_BUDGET,
+)
 from modules.utils import KST
+from modules.gemini_key_pool import get_key_pool
+from modules.prompt_context import PromptContextBuilder, rank_items
 
 logger = logging.getLogger(__name__)
 
@@ -62,111 +67,114 @@ THEME_ANALYSIS_SCHEMA = {
     "required": ["market_summary", "themes"],
 }
 
-# 세션 내 일일 할당 소진된 키 추적
-_exhausted_keys: set = set()
-
 
 def _get_api_keys() -> List[str]:
-    """사용 가능한 API 키 목록 반환"""
+    """사용 가능한 API 키 목록 반환 (키 풀 기준 여유가 큰 순서)"""
     keys = [GEMINI_API_KEY_1, GEMINI_API_KEY_2, GEMINI_API_KEY_3, GEMINI_API_KEY_4, GEMINI_API_KEY_5]
-    return [k for k in keys if k]
+    return get_key_pool().ordered(keys)
+
+
+def _stock_relevance(ranked_lists: List[List[Dict]]) -> Dict[str, float]:
+    """종목코드별 관련도 = 각 순위 목록에서 1/(순위+1)의 합 (여러 목록에 상위 노출될수록 높음)"""
+    scores: Dict[str, float] = {}
+    for stocks in ranked_lists:
+        for rank, s in enumerate(stocks):
+            code = s.get("code", "")
+            if code:
+                scores[code] = scores.get(code, 0.0) + 1.0 / (rank + 1)
+    return scores
+
+
+def _fmt_trading_value(tv) -> str:
+    return f"{tv / 100_000_000:,.0f}억원" if tv else "N/A"
 
 
-def _build_stock_context(stock_data: Dict[str, Any], fundamental_data: Dict[str, Dict] = None, investor_data: Dict[str, Dict] = None) -> str:
-    """수집된 종목 데이터에서 Gemini 프롬프트용 컨텍스트 생성"""
-    lines = []
+def _build_stock_context(
+    stock_data: Dict[str, Any],
+    fundamental_data: Dict[str, Dict] = None,
+    investor_data: Dict[str, Dict] = None,
+    token_budget: Optional[int] = None,
+) -> str:
+    """수집된 종목 데이터에서 Gemini 프롬프트용 컨텍스트 생성
+
+    섹션 우선순위(거래대금/교차 → 상승률 → 수급/프로그램 → 등락률/거래량 → 펀더멘탈)와
+    종목 관련도 순으로 token_budget(기본 ANALYSIS_CONTEXT_TOKEN_BUDGET) 안에 담는다.
+    """
+    builder = PromptContextBuilder(
+        ANALYSIS_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget,
+        label="테마 분석 컨텍스트",
+    )
+    fluc = stock_data.get("fluctuation", {})
 
     # 상승 TOP10
     rising_kospi = stock_data.get("rising", {}).get("kospi", [])[:10]
     rising_kosdaq = stock_data.get("rising", {}).get("kosdaq", [])[:10]
-    if rising_kospi or rising_kosdaq:
-        lines.append("## 상승률 TOP 종목")
-        for s in rising_kospi:
-            lines.append(f"- {s.get('name')}({s.get('code')}) 코스피 +{s.get('change_rate', 0):.2f}% 현재가:{s.get('current_price', 0):,}원 거래량:{s.get('volume', 0):,}")
-        for s in rising_kosdaq:
-            lines.append(f"- {s.get('name')}({s.get('code')}) 코스닥 +{s.get('change_rate', 0):.2f}% 현재가:{s.get('current_price', 0):,}원 거래량:{s.get('volume', 0):,}")
-
-    # 거래량 TOP10
+    builder.add_section("상승률 TOP 종목", rank_items(
+        [("코스피", rising_kospi), ("코스닥", rising_kosdaq)],
+        lambda s, m: f"- {s.get('name')}({s.get('code')}) {m} +{s.get('change_rate', 0):.2f}% 현재가:{s.get('current_price', 0):,}원 거래량:{s.get('volume', 0):,}",
+    ), priority=2)
+
+    # 거래량 TOP20
     vol_kospi = stock_data.get("volume", {}).get("kospi", [])[:20]
     vol_kosdaq = stock_data.get("volume", {}).get("kosdaq", [])[:20]
-    if vol_kospi or vol_kosdaq:
-        lines.append("\n## 거래량 TOP 종목")
-        for s in vol_kospi:
-            lines.append(f"- {s.get('name')}({s.get('code')}) 코스피 등락:{s.get('change_rate', 0):.2f}% 거래량:{s.get('volume', 0):,}")
-        for s in vol_kosdaq:
-            lines.append(f"- {s.get('name')}({s.get('code')}) 코스닥 등락:{s.get('change_rate', 0):.2f}% 거래량:{s.get('volume', 0):,}")
-
-    # 거래대금 TOP10
+    builder.add_section("거래량 TOP 종목", rank_items(
+        [("코스피", vol_kospi), ("코스닥", vol_kosdaq)],
+        lambda s, m: f"- {s.get('name')}({s.get('code')}) {m} 등락:{s.get('change_rate', 0):.2f}% 거래량:{s.get('volume', 0):,}",
+    ), priority=4)
+
+    # 거래대금 TOP20
     tv_kospi = stock_data.get("trading_value", {}).get("kospi", [])[:20]
     tv_kosdaq = stock_data.get("trading_value", {}).get("kosdaq", [])[:20]
-    if tv_kospi or tv_kosdaq:
-        lines.append("\n## 거래대금 TOP 종목")
-        for s in tv_kospi:
-            tv = s.get("trading_value", 0)
-            tv_str = f"{tv / 100_000_000:,.0f}억원" if tv else "N/A"
-            lines.append(f"- {s.get('name')}({s.get('code')}) 코스피 등락:{s.get('change_rate', 0):.2f}% 거래대금:{tv_str}")
-        for s in tv_kosdaq:
-            tv = s.get("trading_value", 0)
-            tv_str = f"{tv / 100_000_000:,.0f}억원" if tv else "N/A"
-            lines.append(f"- {s.get('name')}({s.get('code')}) 코스닥 등락:{s.get('change_rate', 0):.2f}% 거래대금:{tv_str}")
-
-    # 등락률 TOP10
-    fluc = stock_data.get("fluctuation", {})
+    builder.add_section("거래대금 TOP 종목", rank_items(
+        [("코스피", tv_kospi), ("코스닥", tv_kosdaq)],
+        lambda s, m: f"- {s.get('name')}({s.get('code')}) {m} 등락:{s.get('change_rate', 0):.2f}% 거래대금:{_fmt_trading_value(s.get('trading_value', 0))}",
+    ), priority=1)
+
+    # 등락률 TOP20
     fluc_kospi_up = fluc.get("kospi_up", [])[:20]
     fluc_kosdaq_up = fluc.get("kosdaq_up", [])[:20]
-    if fluc_kospi_up or fluc_kosdaq_up:
-        lines.append("\n## 등락률 상승 TOP 종목")
-        for s in fluc_kospi_up:
-            lines.append(f"- {s.get('name')}({s.get('code')}) 코스피 +{s.get('change_rate', 0):.2f}% 현재가:{s.get('current_price', 0):,}원")
-        for s in fluc_kosdaq_up:
-            lines.append(f"- {s.get('name')}({s.get('code')}) 코스닥 +{s.get('change_rate', 0):.2f}% 현재가:{s.get('current_price', 0):,}원")
+    builder.add_section("등락률 상승 TOP 종목", rank_items(
+        [("코스피", fluc_kospi_up), ("코스닥", fluc_kosdaq_up)],
+        lambda s, m: f"- {s.get('name')}({s.get('code')}) {m} +{s.get('change_rate', 0):.2f}% 현재가:{s.get('current_price', 0):,}원",
+    ), priority=4)
+
     # 거래대금+상승률 교차 필터 (거래대금 순서 기준, 등락률 상승 TOP에도 포함된 종목)
-    fluc_up_codes = set(
-        s.get("code", "") for s in fluc.get("kospi_up", []) + fluc.get("kosdaq_up", [])
-    )
+    fluc_up_codes = {s.get("code", "") for s in fluc.get("kospi_up", []) + fluc.get("kosdaq_up", [])}
     tv_all_kospi = stock_data.get("trading_value", {}).get("kospi", [])
     tv_all_kosdaq = stock_data.get("trading_value", {}).get("kosdaq", [])
-
     cross_kospi_up = [s for s in tv_all_kospi if s.get("code", "") in fluc_up_codes][:10]
     cross_kosdaq_up = [s for s in tv_all_kosdaq if s.get("code", "") in fluc_up_codes][:10]
-    if cross_kospi_up or cross_kosdaq_up:
-        lines.append("\n## 거래대금+상승률 교차 종목 (대금 순)")
-        for s in cross_kospi_up:
-            tv = s.get("trading_value", 0)
-            tv_str = f"{tv / 100_000_000:,.0f}억원" if tv else "N/A"
-            lines.append(f"- {s.get('name')}({s.get('code')}) 코스피 등락:+{s.get('change_rate', 0):.2f}% 거래대금:{tv_str}")
-        for s in cross_kosdaq_up:
-            tv = s.get("trading_value", 0)
-            tv_str = f"{tv / 100_000_000:,.0f}억원" if tv else "N/A"
-            lines.append(f"- {s.get('name')}({s.get('code')}) 코스닥 등락:+{s.get('change_rate', 0):.2f}% 거래대금:{tv_str}")
+    builder.add_section("거래대금+상승률 교차 종목 (대금 순)", rank_items(
+        [("코스피", cross_kospi_up), ("코스닥", cross_kosdaq_up)],
+        lambda s, m: f"- {s.get('name')}({s.get('code')}) {m} 등락:+{s.get('change_rate', 0):.2f}% 거래대금:{_fmt_trading_value(s.get('trading_value', 0))}",
+    ), priority=1)
 
     # 종목코드 → 종목명 매핑 구성 (펀더멘탈/수급 섹션에서 공용)
     code_to_name = {}
-    all_sections = [
-        stock_data.get("rising", {}),
-        stock_data.get("falling", {}),
-        stock_data.get("volume", {}),
-        stock_data.get("trading_value", {}),
-    ]
-    fluc_data = stock_data.get("fluctuation", {})
-    for section in all_sections:
-        for market_stocks in section.values():
+    for section in ("rising", "falling", "volume", "trading_value"):
+        for market_stocks in stock_data.get(section, {}).values():
             if isinstance(market_stocks, list):
                 for s in market_stocks:
                     c = s.get("code", "")
                     if c:
                         code_to_name[c] = s.get("name", c)
     for key in ("kospi_up", "kospi_down", "kosdaq_up", "kosdaq_down"):
-        for s in fluc_data.get(key, []):
+        for s in fluc.get(key, []):
             c = s.get("code", "")
             if c:
                 code_to_name[c] = s.get("name", c)
 
+    # 종목별 부가 데이터(펀더멘탈/수급/프로그램)는 상위 목록 노출도로 정렬
+    relevance = _stock_relevance([
+        tv_kospi, tv_kosdaq, cross_kospi_up, cross_kosdaq_up,
+        rising_kospi, rising_kosdaq, fluc_kospi_up, fluc_kosdaq_up,
+        vol_kospi, vol_kosdaq,
+    ])
+
     # 펀더멘탈 데이터 섹션
     if fundamental_data:
-        lines.append("\n## 종목별 밸류에이션/재무 지표")
+        items = []
         for code, f in fundamental_data.items():
-            name = code_to_name.get(code, code)
             parts = []
             if f.get("per") is not None:
                 parts.append(f"PER:{f['per']}")
@@ -187,44 +195,43 @@ def _build_stock_context(stock_data: Dict[str, Any], fundamental_data: Dict[str,
             if f.get("rsi") is not None:
                 parts.append(f"RSI:{f['rsi']:.1f}")
             if parts:
-                lines.append(f"- {name}({code}): {' | '.join(parts)}")
+                name = code_to_name.get(code, code)
+                items.append((relevance.get(code, 0.0), f"- {name}({code}): {' | '.join(parts)}"))
+        builder.add_section("종목별 밸류에이션/재무 지표", items, priority=5)
 
     # 외국인/기관 수급 데이터 섹션
     if investor_data:
-        lines.append("\n## 종목별 외국인/기관 수급 동향")
+        items = []
         for code, inv in investor_data.items():
-            name = code_to_name.get(code, code)
             parts = []
-            foreign = inv.get("foreign_net")
-            institution = inv.get("institution_net")
-            individual = inv.get("individual_net")
-            if foreign is not None and foreign != 0:
-                sign = "+" if foreign > 0 else ""
-                parts.append(f"외국인:{sign}{foreign:,}주")
-            if institution is not None and institution != 0:
-                sign = "+" if institution > 0 else ""
-                parts.append(f"기관:{sign}{institution:,}주")
-            if individual is not None and individual != 0:
-                sign = "+" if individual > 0 else ""
-                parts.append(f"개인:{sign}{individual:,}주")
+            for label, value in (
+                ("외국인", inv.get("foreign_net")),
+                ("기관", inv.get("institution_net")),
+                ("개인", inv.get("individual_net")),
+            ):
+                if value is not None and value != 0:
+                    sign = "+" if value > 0 else ""
+                    parts.append(f"{label}:{sign}{value:,}주")
             if parts:
-                lines.append(f"- {name}({code}): {' | '.join(parts)}")
+                name = code_to_name.get(code, code)
+                items.append((relevance.get(code, 0.0), f"- {name}({code}): {' | '.join(parts)}"))
+        builder.add_section("종목별 외국인/기관 수급 동향", items, priority=3)
 
     # 프로그램 매매 데이터 섹션 (fundamental_data에서 추출)
     if fundamental_data:
-        pgtr_lines = []
+        items = []
         for code, f in fundamental_data.items():
             pgtr = f.get("pgtr_ntby_qty")
             if pgtr is not None and pgtr != 0:
                 name = code_to_name.get(code, code)
                 sign = "+" if pgtr > 0 else ""
                 label = "순매수" if pgtr > 0 else "순매도"
-                pgtr_lines.append(f"- {name}({code}): 프로그램 {label} {sign}{pgtr:,}주")
-        if pgtr_lines:
-            lines.append("\n## 종목별 프로그램 매매 동향")
-            lines.extend(pgtr_lines)
+                items.append((relevance.get(code, 0.0), f"- {name}({code}): 프로그램 {label} {sign}{pgtr:,}주"))
+        builder.add_section("종목별 프로그램 매매 동향", items, priority=3)
 
-    return "\n".join(lines)
+    context = builder.build()
+    builder.print_report()  # 예산 초과로 제외된 섹션/항목
+    return context
 
 
 def _build_prompt(stock_context: str) -> str:
@@ -342,6 +349,7 @@ def _call_gemini(prompt: str, api_key: str) -> Optional[Dict]:
         },
     }
     try:
+        get_key_pool().record_call(api_key)
         resp = requests.post(url, json=payload, timeout=120)
         resp.raise_for_status()
         text = _extract_text_from_response(resp.json())
@@ -360,6 +368,7 @@ def _call_gemini(prompt: str, api_key: str) -> Optional[Dict]:
     payload["generationConfig"].pop("responseMimeType", None)
     payload["generationConfig"].pop("responseSchema", None)
 
+    get_key_pool().record_call(api_key)
     resp = requests.post(url, json=payload, timeout=120)
     resp.raise_for_status()
 
@@ -394,9 +403,10 @@ def analyze_themes(stock_data: Dict[str, Any], fundamental_data: Dict[str, Dict]
     prompt = _build_prompt(stock_context)
 
     max_retries_per_key = 3
+    key_pool = get_key_pool()
 
     for key_idx, api_key in enumerate(api_keys):
-        if api_key in _exhausted_keys:
+        if key_pool.is_exhausted(api_key):
             logger.debug("키 %d 일일 할당 소진, 건너뜀", key_idx + 1)
             continue
         for attempt in range(max_retries_per_key):
@@ -421,12 +431,12 @@ def analyze_themes(stock_data: Dict[str, Any], fundamental_data: Dict[str, Dict]
                         for detail in body.get("error", {}).get("details", []):
                             for violation in detail.get("violations", []):
                                 if "PerDay" in violation.get("quotaId", ""):
-                                    _exhausted_keys.add(api_key)
+                                    key_pool.mark_exhausted(api_key)
                                     logger.debug("키 %d 일일 할당 소진 (RPD), 다음 키로 전환", key_idx + 1)
                                     break
                     except Exception:
                         pass
-                    if api_key in _exhausted_keys:
+                    if key_pool.is_exhausted(api_key):
                         break
                     if attempt < max_retries_per_key - 1:
                         wait = 2 ** (attempt + 1)
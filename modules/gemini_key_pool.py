@@ -0,0 +1,189 @@
+"""
+Gemini API 키 풀 스케줄러
+
+- 키별 사용 횟수(RPD), 최근 1분 호출 시각(RPM), 일일 할당 소진 여부를 추적
+- 상태를 로컬 파일에 저장하여 cron으로 새로 뜨는 프로세스도 이전 실행의 소진 정보를 재사용
+  (GitHub Actions는 actions/cache로 실행 간 공유)
+- 호출 기록은 메모리에만 반영하고, 파일은 할당 소진·기준일 변경·프로세스 종료 시 저장
+- 호출 전 남은 여유(headroom)가 가장 큰 키부터 사용
+
+키 원문은 저장하지 않고 SHA-256 앞 12자리를 식별자로 사용한다.
+Gemini 일일 할당은 태평양 표준시 자정에 초기화되므로 quota_date도 같은 기준으로 계산한다.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from config.settings import (
+    ROOT_DIR,
+    GEMINI_API_KEY_1, GEMINI_API_KEY_2, GEMINI_API_KEY_3, GEMINI_API_KEY_4, GEMINI_API_KEY_5,
+)
+from modules.json_store import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# gemini-2.5-flash 무료 등급 기준 (환경변수로 조정 가능)
+DEFAULT_RPM_LIMIT = int(os.getenv("GEMINI_RPM_LIMIT", "10"))
+DEFAULT_RPD_LIMIT = int(os.getenv("GEMINI_RPD_LIMIT", "250"))
+
+STATE_PATH = ROOT_DIR / ".gemini_key_state.json"
+
+_QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+
+
+def _quota_date() -> str:
+    """Gemini 일일 할당 기준일 (태평양 시간)"""
+    return datetime.now(_QUOTA_TZ).strftime("%Y-%m-%d")
+
+
+def key_id(api_key: str) -> str:
+    """API 키 식별자 (원문 대신 해시 앞 12자리)"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+class GeminiKeyPool:
+    """프로세스 간 공유되는 Gemini 키 할당 스케줄러"""
+
+    def __init__(
+        self,
+        keys: Iterable[str],
+        state_path: Path = STATE_PATH,
+        rpm_limit: int = DEFAULT_RPM_LIMIT,
+        rpd_limit: int = DEFAULT_RPD_LIMIT,
+    ):
+        self.keys = [k for k in keys if k]
+        self.state_path = state_path
+        self.rpm_limit = rpm_limit
+        self.rpd_limit = rpd_limit
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        # {key_id: {"count": int, "exhausted": bool, "recent": [epoch, ...]}}
+        self._date = _quota_date()
+        self._state: Dict[str, Dict] = {}
+        self._load()
+
+    # ── 영속화 ─────────────────────────────────────────────
+    def _load(self) -> None:
+        """로컬 상태 파일에서 오늘 상태 로드"""
+        if not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("date") == self._date:
+                self._state = saved.get("keys", {})
+        except (json.JSONDecodeError, OSError) as e:
+            logger.debug("키 풀 상태 파일 로드 실패: %s", e)
+
+    def _save_local(self) -> None:
+        """로컬 상태 파일 저장 (임시 파일 → rename, _lock 보유 상태에서 호출)"""
+        payload = {"date": self._date, "updated_at": time.time(), "keys": self._state}
+        try:
+            atomic_write_json(self.state_path, payload, indent=None)
+            self._dirty = False
+        except OSError as e:
+            logger.debug("키 풀 상태 파일 저장 실패: %s", e)
+
+    def flush(self) -> None:
+        """변경된 상태가 있으면 파일에 저장 (프로세스 종료 시 자동 호출)"""
+        with self._lock:
+            if self._dirty:
+                self._save_local()
+
+    # ── 상태 조회/갱신 ──────────────────────────────────────
+    def _entry(self, kid: str) -> Dict:
+        return self._state.setdefault(kid, {"count": 0, "exhausted": False, "recent": []})
+
+    def _roll_date(self) -> None:
+        """할당 기준일이 바뀌면 전체 상태 초기화"""
+        today = _quota_date()
+        if today != self._date:
+            self._date = today
+            self._state = {}
+            self._save_local()
+
+    def headroom(self, api_key: str) -> int:
+        """남은 호출 여유 = min(RPM 잔여, RPD 잔여). 소진된 키는 -1"""
+        with self._lock:
+            self._roll_date()
+            entry = self._entry(key_id(api_key))
+            if entry["exhausted"]:
+                return -1
+            now = time.time()
+            entry["recent"] = [t for t in entry["recent"] if now - t < 60]
+            rpm_left = self.rpm_limit - len(entry["recent"])
+            rpd_left = self.rpd_limit - entry["count"]
+            return min(rpm_left, rpd_left)
+
+    def is_exhausted(self, api_key: str) -> bool:
+        with self._lock:
+            self._roll_date()
+            return self._entry(key_id(api_key))["exhausted"]
+
+    def ordered(self, keys: Optional[List[str]] = None) -> List[str]:
+        """키를 여유가 큰 순서로 정렬 (동률이면 원래 순서 유지, 소진된 키는 맨 뒤)"""
+        keys = self.keys if keys is None else [k for k in keys if k]
+        scored = [(self.headroom(k), idx, k) for idx, k in enumerate(keys)]
+        return [k for _, _, k in sorted(scored, key=lambda x: (-x[0], x[1]))]
+
+    def available_keys(self, keys: Optional[List[str]] = None) -> List[str]:
+        """소진되지 않은 키만 여유가 큰 순서로 반환"""
+        return [k for k in self.ordered(keys) if not self.is_exhausted(k)]
+
+    def pick(self, exclude: Iterable[str] = ()) -> Optional[str]:
+        """여유가 가장 큰 키 1개 선택 (exclude에 포함된 키는 가급적 피함)"""
+        ordered = self.available_keys()
+        if not ordered:
+            return None
+        excluded = set(exclude)
+        for k in ordered:
+            if k not in excluded:
+                return k
+        return ordered[0]
+
+    def record_call(self, api_key: str) -> None:
+        """API 호출 1회 기록 (RPM 윈도우 + 일일 횟수)"""
+        kid = key_id(api_key)
+        with self._lock:
+            self._roll_date()
+            entry = self._entry(kid)
+            entry["count"] += 1
+            now = time.time()
+            entry["recent"] = [t for t in entry["recent"] if now - t < 60] + [now]
+            self._dirty = True
+
+    def mark_exhausted(self, api_key: str) -> None:
+        """일일 할당(RPD) 소진 기록 — 다른 프로세스가 바로 알 수 있도록 즉시 저장"""
+        kid = key_id(api_key)
+        with self._lock:
+            self._roll_date()
+            entry = self._entry(kid)
+            if entry["exhausted"]:
+                return
+            entry["exhausted"] = True
+            self._save_local()
+
+
+# 싱글톤 인스턴스
+_pool: Optional[GeminiKeyPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_key_pool() -> GeminiKeyPool:
+    """Gemini 키 풀 싱글톤 반환 (gemini_analyzer/theme_forecast/forecast_agents 공용)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            keys = [GEMINI_API_KEY_1, GEMINI_API_KEY_2, GEMINI_API_KEY_3, GEMINI_API_KEY_4, GEMINI_API_KEY_5]
+            _pool = GeminiKeyPool(keys)
+            atexit.register(_pool.flush)
+        return _pool
@@ -0,0 +1,186 @@
+"""
+날짜별 파일 인덱스 관리 (history / forecast-history / paper-trading 공용)
+
+인덱스 JSON 포맷은 프론트엔드가 읽는 기존 형식 그대로 유지한다.
+    {"updated_at": "...", "entries": [최신 → 과거 순 항목, ...]}
+
+매 저장마다 디렉토리를 glob/정렬하던 방식 대신, 인덱스를 오래된 순 deque로 들고
+새 항목은 뒤에 추가(같은 파일명이면 교체), 보관 기간이 지난 항목은 앞에서 꺼내며
+해당 파일만 삭제한다. 항목 재구성(entry_builder)은 인덱스 파일이 없거나 깨졌을 때만 전체에 대해 수행한다.
+
+로드 시에는 디렉토리 파일명 목록(glob)과 인덱스를 대조해 누락된 파일은 추가하고 사라진 파일은 뺀다.
+워크플로우가 git reset --hard 후 이전 백업 인덱스를 복원하면 원격에서 추가된 파일이 인덱스에 없을 수 있기 때문이다.
+"""
+import bisect
+import json
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional
+
+from modules import json_backend
+from modules.json_store import atomic_write_json
+from modules.utils import KST
+
+logger = logging.getLogger(__name__)
+
+# 파일 삭제 시 함께 지우는 사전 압축본 (snapshot_format.write_compressed_siblings)
+_SIBLING_SUFFIXES = (".gz", ".br")
+
+
+def history_entry(file_path: Path, subdir: str) -> Optional[Dict[str, Any]]:
+    """YYYY-MM-DD_HHMM.json 스냅샷 파일의 인덱스 항목"""
+    stem = file_path.stem
+    if len(stem) < 15 or stem[10] != "_":
+        return None
+    return {
+        "filename": file_path.name,
+        "date": stem[:10],
+        "time": stem[11:13] + ":" + stem[13:15],
+        "path": f"data/{subdir}/{file_path.name}",
+    }
+
+
+class IndexManager:
+    """날짜별 파일 디렉토리 + 인덱스 JSON 관리자
+
+    Args:
+        data_dir: 파일이 저장되는 디렉토리
+        index_path: 인덱스 JSON 경로
+        entry_builder: 파일 경로 → 인덱스 항목 (인덱스 재구성 시 사용, None이면 건너뜀)
+        retention_days: 보관 기간 (일). 항목의 date가 기준일보다 이르면 파일과 함께 제거
+
+    항목은 "filename"(YYYY-MM-DD로 시작) 오름차순으로 보관되며, 저장 시 역순(최신 먼저)으로 기록된다.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        index_path: Path,
+        entry_builder: Callable[[Path], Optional[Dict[str, Any]]],
+        retention_days: int = 30,
+    ):
+        self.data_dir = Path(data_dir)
+        self.index_path = Path(index_path)
+        self.entry_builder = entry_builder
+        self.retention_days = retention_days
+        self._entries: Deque[Dict[str, Any]] = deque()
+        self._loaded = False
+
+    # ── 로드 ───
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            entries = json_backend.load(self.index_path).get("entries", [])
+        except FileNotFoundError:
+            self.rebuild()
+            return
+        except (json.JSONDecodeError, OSError, AttributeError) as e:
+            logger.warning("인덱스 파일 손상, 재구성: %s (%s)", self.index_path, e)
+            self.rebuild()
+            return
+        self._entries = deque(sorted(entries, key=lambda e: e["filename"]))
+        self.reconcile()
+
+    def reconcile(self) -> int:
+        """디렉토리 파일명 목록과 인덱스 대조 — 누락 파일 추가, 사라진 파일 항목 제거
+
+        Returns:
+            추가·제거된 항목 수
+        """
+        names = {p.name for p in self.data_dir.glob("*.json")} if self.data_dir.exists() else set()
+        indexed = {e["filename"] for e in self._entries}
+
+        vanished = indexed - names
+        if vanished:
+            self._entries = deque(e for e in self._entries if e["filename"] not in vanished)
+
+        added = 0
+        for name in sorted(names - indexed):
+            entry = self.entry_builder(self.data_dir / name)
+            if entry is not None:
+                self.add(entry)
+                added += 1
+
+        if vanished or added:
+            logger.info("인덱스 대조: %s (+%d, -%d)", self.index_path.name, added, len(vanished))
+        return added + len(vanished)
+
+    def rebuild(self) -> int:
+        """디렉토리를 스캔해 인덱스 항목 재구성 (인덱스 유실 시 1회)"""
+        self._loaded = True
+        entries = []
+        if self.data_dir.exists():
+            for file_path in sorted(self.data_dir.glob("*.json")):
+                entry = self.entry_builder(file_path)
+                if entry is not None:
+                    entries.append(entry)
+        self._entries = deque(entries)
+        return len(entries)
+
+    @property
+    def entries(self) -> list:
+        """인덱스 항목 (최신 먼저)"""
+        self._load()
+        return list(reversed(self._entries))
+
+    # ── 갱신 ───
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        """항목 추가. 같은 파일명이면 교체, 보통 가장 최신이므로 끝에 붙는다"""
+        self._load()
+        filename = entry["filename"]
+        if not self._entries or self._entries[-1]["filename"] < filename:
+            self._entries.append(entry)
+            return
+        if self._entries[-1]["filename"] == filename:
+            self._entries[-1] = entry
+            return
+
+        # 과거 날짜 재수집 등 드문 경우만 이진 탐색 삽입
+        keys = [e["filename"] for e in self._entries]
+        pos = bisect.bisect_left(keys, filename)
+        if pos < len(keys) and keys[pos] == filename:
+            self._entries[pos] = entry
+        else:
+            self._entries.insert(pos, entry)
+
+    def add_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """entry_builder로 항목을 만들어 추가"""
+        entry = self.entry_builder(Path(file_path))
+        if entry is not None:
+            self.add(entry)
+        return entry
+
+    def evict_expired(self, now: Optional[datetime] = None) -> int:
+        """보관 기간이 지난 항목을 앞에서부터 제거하고 파일(+압축본)도 삭제
+
+        Returns:
+            제거된 항목 수
+        """
+        self._load()
+        cutoff = ((now or datetime.now(KST)) - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        removed = 0
+        while self._entries and self._entries[0]["filename"][:10] < cutoff:
+            entry = self._entries.popleft()
+            file_path = self.data_dir / entry["filename"]
+            file_path.unlink(missing_ok=True)
+            for suffix in _SIBLING_SUFFIXES:
+                file_path.with_name(file_path.name + suffix).unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def save(self, updated_at: Optional[str] = None) -> None:
+        """인덱스 JSON 원자적 저장 (최신 먼저)
+
+        다른 프로세스와 동시에 갱신될 수 있으면 로드~저장 구간을 json_store.file_lock(index_path)로 감싼다.
+        """
+        self._load()
+        atomic_write_json(self.index_path, {
+            "updated_at": updated_at or datetime.now(KST).strftime("%Y-%m-%d %H:%M:%S"),
+            "entries": self.entries,
+        })
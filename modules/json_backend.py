@@ -0,0 +1,113 @@
+"""
+JSON 직렬화 백엔드
+
+orjson → msgspec → 표준 json 순으로 설치된 것을 사용한다 (JSON_BACKEND 환경변수로 고정 가능).
+출력 규칙은 기존 json.dumps(..., ensure_ascii=False) 호출과 같게 맞춘다.
+- dumps(data): 공백 없는 compact 출력 (separators=(",", ":"))
+- dumps(data, indent=2): 들여쓰기 2칸 (json.dumps(indent=2)와 같은 모양)
+- 한글 등 비ASCII 문자는 이스케이프하지 않음
+
+빠른 백엔드가 처리하지 못하는 값(64비트 초과 정수, NaN, 비문자열 키 등)은 표준 json으로 다시 직렬화한다.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_orjson = None
+_msgspec = None
+
+_requested = os.getenv("JSON_BACKEND", "").lower()
+if _requested in ("", "orjson"):
+    try:
+        import orjson as _orjson
+    except ImportError:
+        _orjson = None
+if _orjson is None and _requested in ("", "msgspec"):
+    try:
+        import msgspec as _msgspec
+    except ImportError:
+        _msgspec = None
+
+BACKEND = "orjson" if _orjson else "msgspec" if _msgspec else "json"
+
+if _orjson:
+    _ORJSON_PASSTHROUGH = (
+        _orjson.OPT_PASSTHROUGH_DATETIME | _orjson.OPT_PASSTHROUGH_DATACLASS | _orjson.OPT_PASSTHROUGH_SUBCLASS
+    )
+
+if _msgspec:
+    _msgspec_encoder = _msgspec.json.Encoder()
+    _msgspec_decoder = _msgspec.json.Decoder()
+
+
+def _has_nan(value: Any) -> bool:
+    """NaN/Infinity 포함 여부 (표준 json은 NaN 리터럴로 출력, 빠른 백엔드는 null로 바꿈)"""
+    if isinstance(value, float):
+        return value != value or value in (float("inf"), float("-inf"))
+    if isinstance(value, dict):
+        return any(_has_nan(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_nan(v) for v in value)
+    return False
+
+
+def _stdlib_dumps(data: Any, indent: Optional[int]) -> bytes:
+    if indent is None:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8")
+
+
+def dumps_bytes(data: Any, indent: Optional[int] = None) -> bytes:
+    """UTF-8 JSON 바이트 (indent는 None 또는 2)"""
+    if indent not in (None, 2):
+        return _stdlib_dumps(data, indent)
+    try:
+        if _orjson:
+            # datetime/dataclass/서브클래스는 표준 json과 같게 TypeError → 표준 json 경로에서 처리
+            option = _ORJSON_PASSTHROUGH | (_orjson.OPT_INDENT_2 if indent == 2 else 0)
+            payload = _orjson.dumps(data, option=option)
+        elif _msgspec:
+            payload = _msgspec_encoder.encode(data)
+            if indent == 2:
+                payload = _msgspec.json.format(payload, indent=2)
+        else:
+            return _stdlib_dumps(data, indent)
+    except (TypeError, ValueError, OverflowError) as e:
+        logger.debug("%s 직렬화 실패, 표준 json 사용: %s", BACKEND, e)
+        return _stdlib_dumps(data, indent)
+    if b"null" in payload and _has_nan(data):
+        return _stdlib_dumps(data, indent)
+    return payload
+
+
+def dumps(data: Any, indent: Optional[int] = None) -> str:
+    """JSON 문자열 (json.dumps(data, ensure_ascii=False, ...) 대체)"""
+    return dumps_bytes(data, indent).decode("utf-8")
+
+
+def loads(raw: Union[str, bytes, bytearray]) -> Any:
+    """JSON 파싱 (실패 시 json.JSONDecodeError)"""
+    if _orjson:
+        try:
+            return _orjson.loads(raw)
+        except _orjson.JSONDecodeError:
+            pass
+    elif _msgspec:
+        try:
+            return _msgspec_decoder.decode(raw)
+        except _msgspec.DecodeError:
+            pass
+    else:
+        return json.loads(raw)
+    # 빠른 백엔드가 거부한 입력(NaN 리터럴 등)은 표준 json으로 다시 시도해 동일한 예외/결과를 낸다
+    return json.loads(raw)
+
+
+def load(path: Union[str, Path]) -> Any:
+    """파일에서 JSON 로드"""
+    with open(path, "rb") as f:
+        return loads(f.read())
@@ -0,0 +1,140 @@
+"""
+원자적 JSON 파일 저장소
+
+latest.json, 인덱스 파일처럼 여러 스크립트가 읽고 쓰는 파일용.
+- 쓰기: 같은 디렉토리 임시 파일 → fsync → os.replace (읽는 쪽은 항상 이전 또는 새 파일 전체만 본다)
+- 갱신: <파일>.lock 에 advisory lock(fcntl.flock)을 잡고 최신 내용을 다시 읽어 수정 후 저장
+  (같은 호스트에서 동시에 실행되는 수집 스크립트끼리 서로의 필드를 덮어쓰지 않는다)
+
+fcntl이 없는 환경(Windows)에서는 잠금 없이 원자적 쓰기만 수행한다.
+"""
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Union
+
+from modules import json_backend
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+PathLike = Union[str, Path]
+
+
+def _fsync_dir(directory: Path) -> None:
+    """rename 결과를 디스크에 반영 (지원하지 않는 플랫폼은 무시)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: PathLike, payload: bytes) -> None:
+    """임시 파일에 쓰고 fsync 후 os.replace로 교체"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    _fsync_dir(path.parent)
+
+
+def atomic_write_text(path: PathLike, text: str) -> None:
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def atomic_write_json(path: PathLike, data: Any, indent: Optional[int] = 2) -> None:
+    """JSON 원자적 저장 (기본 indent=2, ensure_ascii=False — 기존 파일 포맷 유지)"""
+    atomic_write_bytes(path, json_backend.dumps_bytes(data, indent=indent))
+
+
+def read_json(path: PathLike, default: Any = None) -> Any:
+    """JSON 로드, 파일이 없거나 JSON이 깨져 있으면 default"""
+    try:
+        return json_backend.load(path)
+    except FileNotFoundError:
+        return default
+    except json.JSONDecodeError as e:
+        logger.warning("JSON 파싱 실패, 기본값 사용: %s (%s)", path, e)
+        return default
+
+
+def read_last_jsonl(path: PathLike) -> Optional[Any]:
+    """JSON Lines 파일의 마지막 항목만 읽기 (파일 끝에서 역방향 탐색, 깨진 줄이면 None)"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            lines = buf.rstrip(b"\n").split(b"\n")
+            if len(lines) > 1 or pos == 0:
+                try:
+                    return json_backend.loads(lines[-1])
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    return None
+    return None
+
+
+@contextmanager
+def file_lock(path: PathLike) -> Iterator[None]:
+    """<path>.lock 에 대한 배타적 advisory lock (같은 호스트의 다른 프로세스와 직렬화)"""
+    path = Path(path)
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def update_json(
+    path: PathLike,
+    updater: Callable[[Any], Any],
+    default: Any = None,
+    indent: Optional[int] = 2,
+) -> Any:
+    """잠금 → 최신 내용 로드 → updater 적용 → 원자적 저장
+
+    Args:
+        path: JSON 파일 경로
+        updater: 현재 데이터를 받아 수정. 새 객체를 반환하면 그것을 저장, None이면 받은 객체를 저장
+        default: 파일이 없을 때 updater에 넘길 값 (None이면 빈 dict)
+        indent: 저장 시 들여쓰기
+
+    Returns:
+        저장된 데이터
+    """
+    with file_lock(path):
+        current = read_json(path, default={} if default is None else default)
+        result = updater(current)
+        data = current if result is None else result
+        atomic_write_json(path, data, indent=indent)
+    return data
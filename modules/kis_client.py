@@ -8,6 +8,7 @@
 - 토큰은 24시간 유효하므로, 캐시된 토큰을 최대한 재사용합니다.
 - 토큰이 만료되어도 먼저 사용을 시도하고, 실패 시에만 재발급합니다.
 - 로컬과 GitHub Actions 간 토큰 공유를 위해 Supabase를 사용합니다.
+- API 키/토큰은 첫 API 호출 시점에 한 번에 로드합니다 (생성 시 네트워크 요청 없음).
 """
 import json
 import time
@@ -27,13 +28,16 @@ from config.settings import (
     ROOT_DIR,
 )
 from modules.supabase_client import (
-    get_kis_credentials_from_supabase,
     get_kis_token_from_supabase,
     save_kis_token_to_supabase,
     get_supabase_manager,
 )
 
 
+# _load_token_from_supabase: 토큰을 아직 조회하지 않음 (None은 "조회했지만 없음")
+_NOT_FETCHED = object()
+
+
 class TokenExpiredError(Exception):
     """토큰 만료 에러"""
     pass
@@ -54,9 +58,9 @@ class KISClient:
     """
 
     def __init__(self):
-        # Supabase에서 KIS API 키 조회 시도, 없으면 환경변수 사용
-        self._load_credentials()
         self.base_url = KIS_BASE_URL
+        self._app_key: Optional[str] = None
+        self._app_secret: Optional[str] = None
 
         # 토큰 캐시 파일 경로
         self._token_cache_path = ROOT_DIR / ".kis_token_cache.json"
@@ -73,47 +77,91 @@ class KISClient:
         self._force_refresh_count = 0
         self._force_refresh_date = None
 
-        self._validate_credentials()
-        self._load_cached_token()
+        # API 키/토큰 지연 로드 (첫 API 호출 시 _ensure_ready)
+        self._ready = False
+        self._ready_lock = threading.RLock()
+
+        # Supabase 미설정이면 환경변수 키만 쓰므로 네트워크 없이 바로 검증
+        if not get_supabase_manager().is_available():
+            self._ensure_ready()
+
+    @property
+    def app_key(self) -> Optional[str]:
+        self._ensure_ready()
+        return self._app_key
 
-    def _load_credentials(self):
-        """KIS API 키 로드 (Supabase 우선, 환경변수 폴백)"""
-        supabase_creds = get_kis_credentials_from_supabase()
+    @property
+    def app_secret(self) -> Optional[str]:
+        self._ensure_ready()
+        return self._app_secret
+
+    def _ensure_ready(self):
+        """API 키 + 캐시 토큰 로드 (최초 1회, 스레드 안전)
+
+        Supabase 조회는 키와 토큰을 한 번에 가져온다 (요청 1회).
+        """
+        if self._ready:
+            return
+        with self._ready_lock:
+            if self._ready:
+                return
+            supabase_token = self._load_credentials()
+            self._validate_credentials()
+            self._load_cached_token(supabase_token)
+            self._ready = True
+
+    def _load_credentials(self) -> Any:
+        """KIS API 키 로드 (Supabase 우선, 환경변수 폴백)
+
+        Returns:
+            같은 조회로 받은 Supabase 토큰 데이터 (없으면 None, Supabase 미설정이면 _NOT_FETCHED)
+        """
+        manager = get_supabase_manager()
+        if not manager.is_available():
+            supabase_creds, supabase_token = None, _NOT_FETCHED
+        else:
+            supabase_creds, supabase_token = manager.get_kis_bundle()
 
         if supabase_creds:
-            self.app_key = supabase_creds['app_key']
-            self.app_secret = supabase_creds['app_secret']
+            self._app_key = supabase_creds['app_key']
+            self._app_secret = supabase_creds['app_secret']
             print("[KIS] Supabase에서 API 키를 로드했습니다.")
         else:
-            self.app_key = KIS_APP_KEY
-            self.app_secret = KIS_APP_SECRET
+            self._app_key = KIS_APP_KEY
+            self._app_secret = KIS_APP_SECRET
             if KIS_APP_KEY:
                 print("[KIS] 환경변수에서 API 키를 로드했습니다.")
+        return supabase_token
 
     def _validate_credentials(self):
         """API 키 유효성 검사"""
-        if not self.app_key:
+        if not self._app_key:
             raise ValueError("KIS_APP_KEY 환경변수가 설정되지 않았습니다.")
-        if not self.app_secret:
+        if not self._app_secret:
             raise ValueError("KIS_APP_SECRET 환경변수가 설정되지 않았습니다.")
 
-    def _load_cached_token(self) -> bool:
-        """캐시된 토큰 로드 (Supabase 우선, 로컬 파일 폴백)"""
+    def _load_cached_token(self, supabase_token: Any = _NOT_FETCHED) -> bool:
+        """캐시된 토큰 로드 (Supabase 우선, 로컬 파일 폴백)
+
+        Args:
+            supabase_token: 이미 조회한 Supabase 토큰 데이터 (있으면 재조회하지 않음)
+        """
         # 1. Supabase에서 토큰 로드 시도
-        if self._load_token_from_supabase():
+        if self._load_token_from_supabase(supabase_token):
             return True
 
         # 2. 로컬 파일에서 토큰 로드
         return self._load_token_from_file()
 
-    def _load_token_from_supabase(self) -> bool:
-        """Supabase에서 토큰 로드"""
+    def _load_token_from_supabase(self, token_data: Any = _NOT_FETCHED) -> bool:
+        """Supabase에서 토큰 로드 (token_data를 받지 않으면 조회)"""
         manager = get_supabase_manager()
         if not manager.is_available():
             print("[KIS] Supabase 미설정 - 로컬 캐시만 사용합니다.")
             return False
 
-        token_data = get_kis_token_from_supabase()
+        if token_data is _NOT_FETCHED:
+            token_data = get_kis_token_from_supabase()
         if not token_data:
             print("[KIS] Supabase에 저장된 토큰이 없습니다.")
             return False
@@ -249,6 +297,8 @@ class KISClient:
         Raises:
             TokenRefreshLimitError: 1일 1회 발급 제한 초과 시
         """
+        self._ensure_ready()
+
         # 캐시된 토큰이 유효하면 그대로 사용
         if not force_refresh and self._is_token_valid():
             return self._access_token
@@ -473,6 +523,7 @@ class KISClient:
 
     def get_token_status(self) -> Dict[str, Any]:
         """현재 토큰 상태 조회"""
+        self._ensure_ready()
         status = {
             "has_token": self._access_token is not None,
             "is_valid": self._is_token_valid(),
@@ -652,6 +703,23 @@ class KISClient:
         return self.request("GET", path, tr_id, params=params)
 
 
+_client: Optional[KISClient] = None
+_client_lock = threading.Lock()
+
+
+def get_kis_client() -> KISClient:
+    """프로세스 공용 KIS 클라이언트 싱글톤 (토큰·rate limiter 공유)
+
+    상주 스케줄러(scheduler_main.py)에서 여러 작업이 같은 토큰을 재사용하도록
+    KISRankAPI/StockHistoryAPI 등은 client를 주지 않으면 이 인스턴스를 쓴다.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = KISClient()
+        return _client
+
+
 def test_client():
     """클라이언트 테스트"""
     try:
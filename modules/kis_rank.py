@@ -7,7 +7,7 @@
 from typing import Dict, Any, List, Tuple
 from datetime import datetime
 
-from modules.kis_client import KISClient
+from modules.kis_client import KISClient, get_kis_client
 from modules.market_hours import is_market_hours
 
 
@@ -20,9 +20,9 @@ class KISRankAPI:
     def __init__(self, client: KISClient = None):
         """
         Args:
-            client: KIS 클라이언트 (없으면 새로 생성)
+            client: KIS 클라이언트 (없으면 프로세스 공용 클라이언트)
         """
-        self.client = client or KISClient()
+        self.client = client or get_kis_client()
         # blng_cls_code별 _collect_extended_stocks 결과 캐시
         # 동일 blng_cls_code는 시장 무관하게 같은 데이터를 반환하므로 1회만 호출
         self._extended_stocks_cache: Dict[str, List[Dict[str, Any]]] = {}
@@ -0,0 +1,174 @@
+"""
+latest.json 섹션 분할 저장 (sections-v1)
+
+latest.json의 최상위 키마다 data/latest/<키>.json 파일을 두고, manifest.json에
+섹션별 해시·크기·갱신 시각을 기록한다. 스칼라 값(timestamp, investor_estimated 등)은
+meta 섹션 하나로 묶는다.
+
+    data/latest/manifest.json
+    {"format": "sections-v1", "timestamp": "...", "updated_at": "...",
+     "sections": {"news": {"hash": "...", "bytes": 123, "updated_at": "..."}, ...}}
+
+- 저장: 해시가 바뀐 섹션 파일만 다시 쓴다 (keys를 주면 그 섹션만 비교)
+- 프론트엔드(src/lib/latest-sections.ts)는 manifest만 받아 해시가 바뀐 섹션만 다시 받는다
+- latest.json은 기존 소비자(Python 스크립트, 워크플로우 병합, git 히스토리 기반 모의투자)를 위해 계속 함께 저장한다
+"""
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from modules import json_backend
+from modules.json_store import atomic_write_bytes, atomic_write_json, file_lock, read_json
+from modules.utils import KST
+
+logger = logging.getLogger(__name__)
+
+SECTIONS_FORMAT = "sections-v1"
+SECTIONS_DIRNAME = "latest"
+MANIFEST_FILENAME = "manifest.json"
+LATEST_FILENAME = "latest.json"
+META_SECTION = "meta"
+
+
+def _is_section_value(value: Any) -> bool:
+    """dict/list 값은 개별 섹션, 나머지 스칼라는 meta로 묶음"""
+    return isinstance(value, (dict, list))
+
+
+def split_sections(data: Dict[str, Any]) -> Dict[str, Any]:
+    """latest 데이터 → {섹션명: 값}"""
+    sections: Dict[str, Any] = {}
+    meta: Dict[str, Any] = {}
+    for key, value in data.items():
+        if _is_section_value(value) and key != META_SECTION:
+            sections[key] = value
+        else:
+            meta[key] = value
+    sections[META_SECTION] = meta
+    return sections
+
+
+def _encode(value: Any) -> bytes:
+    return json_backend.dumps_bytes(value)
+
+
+def _section_keys(keys: Iterable[str], data: Dict[str, Any]) -> List[str]:
+    """갱신 대상 키 → 섹션명 (스칼라 키는 meta, meta는 항상 포함)"""
+    names = {META_SECTION}
+    for key in keys:
+        if key in data and _is_section_value(data[key]) and key != META_SECTION:
+            names.add(key)
+        elif key in data:
+            names.add(META_SECTION)
+        else:
+            names.add(key)  # 삭제된 섹션
+    return sorted(names)
+
+
+def write_sections(output_dir: Path, data: Dict[str, Any], keys: Optional[Iterable[str]] = None) -> List[str]:
+    """섹션 파일 + manifest 저장
+
+    Args:
+        output_dir: 데이터 출력 디렉토리 (latest.json 위치)
+        data: latest 전체 데이터
+        keys: 이번에 갱신한 최상위 키 (None이면 전체 비교, 없어진 섹션 파일도 삭제)
+
+    Returns:
+        새로 쓴(또는 삭제한) 섹션명 목록
+    """
+    sections_dir = output_dir / SECTIONS_DIRNAME
+    manifest_path = sections_dir / MANIFEST_FILENAME
+    now = datetime.now(KST).strftime("%Y-%m-%d %H:%M:%S")
+    sections = split_sections(data)
+
+    with file_lock(manifest_path):
+        manifest = read_json(manifest_path, default={}) or {}
+        entries: Dict[str, Dict[str, Any]] = dict(manifest.get("sections", {}))
+        if keys is None:
+            targets = list(sections) + [name for name in entries if name not in sections]
+        else:
+            targets = _section_keys(keys, data)
+
+        changed = []
+        for name in targets:
+            section_path = sections_dir / f"{name}.json"
+            if name not in sections:
+                if name in entries:
+                    entries.pop(name)
+                    section_path.unlink(missing_ok=True)
+                    changed.append(name)
+                continue
+            payload = _encode(sections[name])
+            digest = hashlib.sha256(payload).hexdigest()[:16]
+            if entries.get(name, {}).get("hash") == digest and section_path.exists():
+                continue
+            atomic_write_bytes(section_path, payload)
+            entries[name] = {"hash": digest, "bytes": len(payload), "updated_at": now}
+            changed.append(name)
+
+        if changed or not manifest_path.exists():
+            atomic_write_json(manifest_path, {
+                "format": SECTIONS_FORMAT,
+                "timestamp": data.get("timestamp", ""),
+                "updated_at": now,
+                "sections": dict(sorted(entries.items())),
+            })
+    return changed
+
+
+def read_sections(output_dir: Path) -> Optional[Dict[str, Any]]:
+    """섹션 파일에서 latest 데이터 조립 (manifest가 없으면 None)"""
+    sections_dir = output_dir / SECTIONS_DIRNAME
+    manifest = read_json(sections_dir / MANIFEST_FILENAME)
+    if not manifest or manifest.get("format") != SECTIONS_FORMAT:
+        return None
+    data: Dict[str, Any] = {}
+    for name in manifest.get("sections", {}):
+        value = read_json(sections_dir / f"{name}.json")
+        if name == META_SECTION:
+            data.update(value or {})
+        elif value is not None:
+            data[name] = value
+    return data
+
+
+def save_latest(output_dir: Path, data: Dict[str, Any], keys: Optional[Iterable[str]] = None) -> None:
+    """latest.json 원자적 저장 + 변경된 섹션 파일 갱신"""
+    with file_lock(output_dir / LATEST_FILENAME):
+        atomic_write_json(output_dir / LATEST_FILENAME, data)
+        write_sections(output_dir, data, keys)
+
+
+def update_latest(
+    output_dir: Path,
+    updater: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+    keys: Optional[Iterable[str]] = None,
+) -> Dict[str, Any]:
+    """잠금 → 최신 latest.json 로드 → updater 적용 → latest.json + 변경 섹션 저장
+
+    Args:
+        output_dir: 데이터 출력 디렉토리
+        updater: 현재 데이터를 받아 수정 (새 dict 반환 시 그것을 저장)
+        keys: 이 writer가 관리하는 최상위 키 (None이면 전체 섹션 비교)
+
+    Returns:
+        저장된 데이터
+    """
+    latest_path = output_dir / LATEST_FILENAME
+    with file_lock(latest_path):
+        current = read_json(latest_path, default={}) or {}
+        result = updater(current)
+        data = current if result is None else result
+        atomic_write_json(latest_path, data)
+        write_sections(output_dir, data, keys)
+    return data
+
+
+def sync_sections(output_dir: Path) -> List[str]:
+    """latest.json 기준으로 섹션 파일 재동기화 (워크플로우에서 latest.json 복원·병합 후 호출)"""
+    data = read_json(output_dir / LATEST_FILENAME)
+    if not data:
+        return []
+    return write_sections(output_dir, data)
@@ -0,0 +1,121 @@
+"""
+당일 1분봉 캐시
+
+inquire-time-itemchartprice(FHKST03010200)는 한 번에 30개 분봉을 15:30부터 역순으로 돌려준다.
+종목마다 장 전체 분봉을 한 번만 받아 두고 최고가 시간/매수 후 최고가 조회를 메모리에서 처리한다.
+
+- 페이지 간 중복 캔들(커서 시각 포함)은 시각 기준으로 한 번만 보관
+- 요청 간격은 KISClient의 rate limiter(초당 20건)가 스레드 간에 공유해 맞춘다
+"""
+import logging
+import threading
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from modules.kis_client import KISClient
+
+logger = logging.getLogger(__name__)
+
+MINUTE_CHART_PATH = "/uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice"
+MINUTE_CHART_TR_ID = "FHKST03010200"
+SESSION_CLOSE = "153000"
+SESSION_OPEN = "090000"
+MAX_PAGES = 15  # 30개 × 15페이지 = 450분 (정규장 390분 + 여유)
+
+
+def _hhmm(t: str) -> str:
+    return f"{t[:2]}:{t[2:4]}"
+
+
+class MinuteBars:
+    """한 종목의 당일 분봉 고가 (시각 오름차순) + 시점 이후 최고가 인덱스
+
+    Args:
+        candles: (체결시각 "HHMMSS", 고가) 목록 (순서 무관, 같은 시각은 하나만)
+    """
+
+    def __init__(self, candles: Iterable[Tuple[str, int]]):
+        ordered = sorted(candles)
+        self.times: List[str] = [t for t, _ in ordered]
+        self.highs: List[int] = [h for _, h in ordered]
+        # _best_after[i]: i번째 이후 캔들 중 최고가 인덱스 (동률이면 늦은 시각)
+        self._best_after: List[int] = [0] * len(ordered)
+        best = -1
+        for i in range(len(ordered) - 1, -1, -1):
+            if best < 0 or self.highs[i] > self.highs[best]:
+                best = i
+            self._best_after[i] = best
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def high_time(self, high_price: int) -> Optional[str]:
+        """고가 high_price 이상을 기록한 가장 늦은 분봉 시각 "HH:MM" """
+        for i in range(len(self.times) - 1, -1, -1):
+            if self.highs[i] >= high_price:
+                return _hhmm(self.times[i])
+        return None
+
+    def high_after(self, after_time: str) -> Optional[dict]:
+        """after_time("HH:MM") 이후 분봉 중 최고가 + 달성 시각
+
+        Returns:
+            {"high_price": int, "high_time": "HH:MM"} or None
+        """
+        start = bisect_right(self.times, after_time.replace(":", "") + "00")
+        if start >= len(self.times):
+            return None
+        best = self._best_after[start]
+        if self.highs[best] <= 0:
+            return None
+        return {"high_price": self.highs[best], "high_time": _hhmm(self.times[best])}
+
+
+def fetch_minute_bars(client: KISClient, code: str) -> MinuteBars:
+    """15:30부터 역순으로 페이지를 넘기며 당일 분봉 전체 조회 (실패 시 받은 데까지)"""
+    candles: Dict[str, int] = {}
+    cursor = SESSION_CLOSE
+
+    for _ in range(MAX_PAGES):
+        params = {
+            "FID_ETC_CLS_CODE": "",
+            "FID_COND_MRKT_DIV_CODE": "J",
+            "FID_INPUT_ISCD": code,
+            "FID_INPUT_HOUR_1": cursor,
+            "FID_PW_DATA_INCU_YN": "N",
+        }
+        try:
+            result = client.request("GET", MINUTE_CHART_PATH, MINUTE_CHART_TR_ID, params=params)
+            items = result.get("output2", [])
+            if not items:
+                break
+            for item in items:
+                t = item.get("stck_cntg_hour", "")
+                if t:
+                    candles[t] = int(item.get("stck_hgpr", "0"))
+            cursor = items[-1].get("stck_cntg_hour", "")
+            if not cursor or cursor <= SESSION_OPEN:
+                break
+        except Exception as e:
+            logger.debug("분봉 조회 실패 %s (cursor=%s): %s", code, cursor, e)
+            break
+
+    return MinuteBars(candles.items())
+
+
+class MinuteBarCache:
+    """종목별 당일 분봉 캐시 (스레드 안전, 종목당 1회 조회)"""
+
+    def __init__(self, client: KISClient):
+        self.client = client
+        self._bars: Dict[str, MinuteBars] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, code: str) -> MinuteBars:
+        with self._lock:
+            code_lock = self._locks.setdefault(code, threading.Lock())
+        with code_lock:
+            if code not in self._bars:
+                self._bars[code] = fetch_minute_bars(self.client, code)
+            return self._bars[code]
@@ -0,0 +1,340 @@
+"""
+예측 저장소 — theme_predictions / forecast_snapshots 일괄 읽기·쓰기
+
+백테스트 평가 결과와 예측 저장을 행 단위 요청 대신 묶어서 처리한다.
+- update_statuses: 평가 결과(id, 키 컬럼, status/evaluated_at/actual_performance)만 id 기준 bulk upsert
+  (WRITE_BATCH행당 id 조회 1회 + upsert 1회, 나머지 컬럼은 건드리지 않음).
+  조회 이후 삭제된(stale) 행은 upsert가 키·평가 컬럼만 있는 새 행을 만들지 않도록 남아 있는 id만 쓴다
+- replace_predictions: 당일 기존 행 1회 조회 → 평가 완료 행 보호 + stale 행 판별 → upsert 1회 + delete 1회
+  (조회 실패 시 보호/삭제 없이 전체 upsert)
+
+백엔드
+- SupabasePredictionStore: Supabase(PostgREST) 클라이언트
+- SQLitePredictionStore: 같은 스키마/제약(UNIQUE(prediction_date, category, theme_name))의 로컬 대체 저장소.
+  PREDICTION_STORE_SQLITE 환경변수로 경로를 지정하면 get_prediction_store()가 Supabase 대신 사용한다
+  (드라이런/로컬 검증용, ON CONFLICT 구문은 Postgres와 동일).
+
+round_trips: 백엔드 요청(SQLite는 트랜잭션) 횟수 — 실행 로그에 출력해 요청 수를 확인한다.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from modules.utils import KST
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH = 500  # bulk upsert 1회 최대 행 수
+PAGE_SIZE = 1000   # Supabase(PostgREST) 1회 최대 반환 행 수
+PREDICTION_KEY = ("prediction_date", "category", "theme_name")
+PREDICTION_COLUMNS = (
+    "id", "prediction_date", "category", "theme_name", "description", "catalyst", "confidence",
+    "target_period", "leader_stocks", "status", "evaluated_at", "actual_performance",
+)
+SNAPSHOT_COLUMNS = ("id", "prediction_date", "generated_at", "mode", "forecast_data")
+
+
+def _chunks(rows: Sequence[Dict[str, Any]], size: int = WRITE_BATCH) -> Iterable[Sequence[Dict[str, Any]]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def evaluation_row(prediction: Dict[str, Any], status: str, performance: Dict[str, Any], evaluated_at: str) -> Dict[str, Any]:
+    """평가 결과 upsert용 행 — id·키 컬럼(NOT NULL)과 평가 컬럼만 (upsert는 보낸 컬럼만 갱신)"""
+    return {
+        "id": prediction["id"],
+        **{column: prediction[column] for column in PREDICTION_KEY},
+        "status": status,
+        "evaluated_at": evaluated_at,
+        "actual_performance": json.dumps(performance, ensure_ascii=False),
+    }
+
+
+class PredictionStore(ABC):
+    """저장소 공통 로직 (백엔드는 _select/_upsert/_delete/_insert/_count 구현)"""
+
+    def __init__(self):
+        self.round_trips = 0
+
+    # --- 조회 ---
+
+    def active_predictions(self) -> List[Dict[str, Any]]:
+        """status='active' 예측 전체"""
+        return self._select("theme_predictions", "*", eq={"status": "active"})
+
+    def evaluated_on(self, prediction_date: str) -> List[Dict[str, Any]]:
+        """특정 날짜의 hit/missed 예측 (재평가 대상)"""
+        return self._select(
+            "theme_predictions", "*", eq={"prediction_date": prediction_date}, status_in=("hit", "missed"),
+        )
+
+    def evaluated_predictions(self, columns: str = "*") -> List[Dict[str, Any]]:
+        """hit/missed 예측 전체 이력"""
+        return self._select("theme_predictions", columns, status_in=("hit", "missed"))
+
+    # --- 쓰기 ---
+
+    def update_statuses(self, evaluations: Sequence[Tuple[Dict[str, Any], str, Dict[str, Any]]]) -> int:
+        """평가 결과 일괄 저장
+
+        Args:
+            evaluations: (조회한 예측 행, status, actual_performance) 목록
+
+        Returns:
+            저장한 행 수 (그 사이 삭제된 예측 제외)
+        """
+        evaluated_at = datetime.now(KST).isoformat()
+        rows = [evaluation_row(pred, status, perf, evaluated_at) for pred, status, perf in evaluations]
+        saved = 0
+        for chunk in _chunks(rows):
+            # 기존 update().eq("id")처럼 없는 행은 건너뜀 (예측 교체의 stale 삭제와 겹친 경우)
+            alive = {r["id"] for r in self._select("theme_predictions", "id", id_in=[r["id"] for r in chunk])}
+            chunk = [r for r in chunk if r["id"] in alive]
+            if chunk:
+                self._upsert("theme_predictions", chunk, ("id",))
+                saved += len(chunk)
+        if saved < len(rows):
+            logger.info("평가 저장: 삭제된 예측 %d건 건너뜀", len(rows) - saved)
+        return saved
+
+    def count_snapshots(self, prediction_date: str) -> int:
+        return self._count("forecast_snapshots", {"prediction_date": prediction_date})
+
+    def insert_snapshot(self, snapshot_row: Dict[str, Any]) -> None:
+        self._insert("forecast_snapshots", snapshot_row)
+
+    def replace_predictions(self, prediction_date: str, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """당일 예측 교체 — 평가 완료(hit/missed) 행은 덮어쓰지 않고, 현재 예측에 없는 행은 삭제
+
+        Returns:
+            {"saved": upsert 행 수, "skipped": 평가완료 보호 수, "stale_deleted": 삭제 수}
+        """
+        try:
+            existing = self._select(
+                "theme_predictions", "id, category, theme_name, status", eq={"prediction_date": prediction_date},
+            )
+        except Exception as e:
+            logger.warning("기존 예측 조회 실패, 전체 upsert 진행: %s", e)
+            existing = []
+        evaluated = {(r["category"], r["theme_name"]) for r in existing if r.get("status") in ("hit", "missed")}
+        safe_rows = [r for r in rows if (r["category"], r["theme_name"]) not in evaluated]
+        for chunk in _chunks(safe_rows):
+            self._upsert("theme_predictions", chunk, PREDICTION_KEY)
+
+        current_themes = {(r["category"], r["theme_name"]) for r in rows}
+        stale_ids = [r["id"] for r in existing if (r["category"], r["theme_name"]) not in current_themes]
+        stale_deleted = 0
+        if stale_ids:
+            try:
+                self._delete("theme_predictions", stale_ids)
+                stale_deleted = len(stale_ids)
+            except Exception as e:
+                logger.warning("stale 예측 삭제 실패: %s", e)
+        return {"saved": len(safe_rows), "skipped": len(rows) - len(safe_rows), "stale_deleted": stale_deleted}
+
+    # --- 백엔드 ---
+
+    @abstractmethod
+    def _select(
+        self,
+        table: str,
+        columns: str,
+        eq: Optional[Dict[str, Any]] = None,
+        status_in: Optional[Sequence[str]] = None,
+        id_in: Optional[Sequence[Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def _upsert(self, table: str, rows: Sequence[Dict[str, Any]], on_conflict: Sequence[str]) -> None:
+        ...
+
+    @abstractmethod
+    def _delete(self, table: str, ids: Sequence[Any]) -> None:
+        ...
+
+    @abstractmethod
+    def _insert(self, table: str, row: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def _count(self, table: str, eq: Dict[str, Any]) -> int:
+        ...
+
+
+class SupabasePredictionStore(PredictionStore):
+    """Supabase(PostgREST) 백엔드 — 조회는 PAGE_SIZE 단위 페이지"""
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    def _select(self, table, columns, eq=None, status_in=None, id_in=None):
+        rows: List[Dict[str, Any]] = []
+        start = 0
+        while True:
+            query = self.client.table(table).select(columns)
+            for column, value in (eq or {}).items():
+                query = query.eq(column, value)
+            if status_in:
+                query = query.in_("status", list(status_in))
+            if id_in is not None:
+                query = query.in_("id", list(id_in))
+            response = query.order("id").range(start, start + PAGE_SIZE - 1).execute()
+            self.round_trips += 1
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+            start += PAGE_SIZE
+
+    def _upsert(self, table, rows, on_conflict):
+        self.client.table(table).upsert(list(rows), on_conflict=",".join(on_conflict)).execute()
+        self.round_trips += 1
+
+    def _delete(self, table, ids):
+        self.client.table(table).delete().in_("id", list(ids)).execute()
+        self.round_trips += 1
+
+    def _insert(self, table, row):
+        self.client.table(table).insert(row).execute()
+        self.round_trips += 1
+
+    def _count(self, table, eq):
+        query = self.client.table(table).select("id", count="exact")
+        for column, value in eq.items():
+            query = query.eq(column, value)
+        response = query.limit(1).execute()
+        self.round_trips += 1
+        return response.count or 0
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS theme_predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prediction_date TEXT NOT NULL,
+    category TEXT NOT NULL,
+    theme_name TEXT NOT NULL,
+    description TEXT,
+    catalyst TEXT,
+    confidence TEXT,
+    target_period TEXT,
+    leader_stocks TEXT,
+    status TEXT NOT NULL DEFAULT 'active',
+    evaluated_at TEXT,
+    actual_performance TEXT,
+    UNIQUE (prediction_date, category, theme_name)
+);
+CREATE TABLE IF NOT EXISTS forecast_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prediction_date TEXT NOT NULL,
+    generated_at TEXT,
+    mode TEXT,
+    forecast_data TEXT
+);
+"""
+
+_SQLITE_COLUMNS = {"theme_predictions": PREDICTION_COLUMNS, "forecast_snapshots": SNAPSHOT_COLUMNS}
+
+
+class SQLitePredictionStore(PredictionStore):
+    """SQLite 로컬 대체 저장소 (스키마·제약·upsert 동작을 Supabase 테이블과 맞춤)
+
+    Args:
+        path: DB 파일 경로 (":memory:"이면 메모리 DB)
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        super().__init__()
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.executescript(_SQLITE_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _columns(self, table: str, columns: str) -> List[str]:
+        known = _SQLITE_COLUMNS[table]
+        if columns.strip() == "*":
+            return list(known)
+        requested = [c.strip() for c in columns.split(",") if c.strip()]
+        unknown = [c for c in requested if c not in known]
+        if unknown:
+            raise ValueError(f"{table}에 없는 컬럼: {unknown}")
+        return requested
+
+    def _select(self, table, columns, eq=None, status_in=None, id_in=None):
+        selected = self._columns(table, columns)
+        where, params = [], []
+        for column, value in (eq or {}).items():
+            where.append(f"{column} = ?")
+            params.append(value)
+        if status_in:
+            where.append(f"status IN ({', '.join('?' * len(status_in))})")
+            params.extend(status_in)
+        if id_in is not None:
+            where.append(f"id IN ({', '.join('?' * len(id_in))})")
+            params.extend(id_in)
+        sql = f"SELECT {', '.join(selected)} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY id", params).fetchall()
+        self.round_trips += 1
+        return [dict(row) for row in rows]
+
+    def _upsert(self, table, rows, on_conflict):
+        if not rows:
+            return
+        known = _SQLITE_COLUMNS[table]
+        columns = [c for c in known if any(c in row for row in rows)]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in on_conflict and c != "id")
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({', '.join(on_conflict)}) DO UPDATE SET {updates}"
+        )
+        with self._lock, self._conn:
+            self._conn.executemany(sql, [[row.get(c) for c in columns] for row in rows])
+        self.round_trips += 1
+
+    def _delete(self, table, ids):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {table} WHERE id IN ({', '.join('?' * len(ids))})", list(ids))
+        self.round_trips += 1
+
+    def _insert(self, table, row):
+        columns = [c for c in _SQLITE_COLUMNS[table] if c in row]
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [row[c] for c in columns],
+            )
+        self.round_trips += 1
+
+    def _count(self, table, eq):
+        where = " AND ".join(f"{column} = ?" for column in eq)
+        with self._lock:
+            count = self._conn.execute(
+                f"SELECT COUNT(*) FROM {table}" + (f" WHERE {where}" if where else ""), list(eq.values())
+            ).fetchone()[0]
+        self.round_trips += 1
+        return count
+
+
+def get_prediction_store() -> Optional[PredictionStore]:
+    """PREDICTION_STORE_SQLITE가 있으면 SQLite, 아니면 Supabase 저장소 (연결 불가 시 None)"""
+    sqlite_path = os.getenv("PREDICTION_STORE_SQLITE")
+    if sqlite_path:
+        return SQLitePredictionStore(sqlite_path)
+
+    from modules.supabase_client import get_supabase_manager
+    client = get_supabase_manager()._get_client()
+    return SupabasePredictionStore(client) if client else None
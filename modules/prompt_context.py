@@ -0,0 +1,152 @@
+"""
+토큰 예산 기반 프롬프트 컨텍스트 빌더
+
+섹션별로 항목(종목 1줄, 테마 블록 등)을 관련도 점수와 함께 등록해 두면,
+섹션 우선순위 → 항목 점수 순으로 토큰 예산 안에 담길 만큼만 채택한다.
+출력 순서는 등록 순서(섹션)와 원래 순서(항목)를 유지하고,
+예산 초과로 제외된 항목은 report()로 받거나 print_report()로 출력한다.
+"""
+import math
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+_HANGUL_CJK_RE = re.compile(r"[ᄀ-ᇿ㄰-㆏가-힣一-鿿]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Gemini 토큰 수 근사치
+
+    한글/한자는 글자당 약 1토큰, 그 외(숫자/영문/기호/공백)는 4글자당 약 1토큰으로 계산.
+    정확한 값이 아니라 예산 비교용 상한 추정치이다.
+    """
+    if not text:
+        return 0
+    cjk = len(_HANGUL_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def rank_items(
+    markets: List[Tuple[str, List[Dict]]],
+    fmt: Callable[[Dict, str], str],
+) -> List[Tuple[float, str]]:
+    """시장별 순위 목록을 (관련도, 텍스트) 항목으로 변환
+
+    관련도는 1/(순위+1) — 예산이 부족하면 코스피/코스닥 상위 종목이 번갈아 남는다.
+    """
+    items = []
+    for market, stocks in markets:
+        for rank, s in enumerate(stocks):
+            items.append((1.0 / (rank + 1), fmt(s, market)))
+    return items
+
+
+class PromptContextBuilder:
+    """토큰 예산 안에서 섹션/항목을 채택하는 컨텍스트 빌더
+
+    Args:
+        token_budget: 컨텍스트 전체 토큰 예산 (None 또는 0이면 무제한)
+        label: 리포트 출력용 이름
+    """
+
+    def __init__(self, token_budget: Optional[int] = None, label: str = "컨텍스트"):
+        self.token_budget = token_budget or 0
+        self.label = label
+        # [{"title", "header", "items": [(score, text)], "priority", "required"}]
+        self._sections: List[Dict] = []
+        self._dropped: List[Dict] = []
+        self._used_tokens = 0
+
+    def add_section(
+        self,
+        title: str,
+        items: List[Tuple[float, str]],
+        priority: int = 5,
+        header: Optional[str] = None,
+        required: bool = False,
+    ) -> None:
+        """섹션 등록
+
+        Args:
+            title: 섹션 이름 (리포트용)
+            items: [(관련도 점수, 텍스트)] — 점수가 높을수록 먼저 채택, 텍스트는 여러 줄 가능
+            priority: 섹션 우선순위 (작을수록 먼저 채택)
+            header: 섹션 헤더 줄 (기본값 "## {title}")
+            required: True면 예산과 무관하게 전체 포함
+        """
+        if not items:
+            return
+        self._sections.append({
+            "title": title,
+            "header": f"## {title}" if header is None else header,
+            "items": items,
+            "priority": priority,
+            "required": required,
+        })
+
+    def build(self) -> str:
+        """예산에 맞춰 채택된 섹션/항목을 등록 순서대로 합쳐 반환"""
+        self._dropped = []
+        budget = self.token_budget
+        used = 0
+        kept: Dict[int, List[int]] = {}
+
+        order = sorted(
+            range(len(self._sections)),
+            key=lambda i: (not self._sections[i]["required"], self._sections[i]["priority"], i),
+        )
+        for sec_idx in order:
+            section = self._sections[sec_idx]
+            items = section["items"]
+            header_cost = estimate_tokens(section["header"]) + 1
+            ranked = sorted(range(len(items)), key=lambda j: -items[j][0])
+
+            chosen: List[int] = []
+            cost = header_cost
+            for item_idx in ranked:
+                item_cost = estimate_tokens(items[item_idx][1]) + 1
+                if section["required"] or not budget or used + cost + item_cost <= budget:
+                    chosen.append(item_idx)
+                    cost += item_cost
+
+            if chosen:
+                kept[sec_idx] = sorted(chosen)
+                used += cost
+            chosen_set = set(chosen)
+            dropped_items = [items[j][1] for j in ranked if j not in chosen_set]
+            if dropped_items:
+                self._dropped.append({
+                    "section": section["title"],
+                    "kept": len(chosen),
+                    "dropped": len(dropped_items),
+                    "items": dropped_items,
+                })
+
+        blocks = []
+        for sec_idx, section in enumerate(self._sections):
+            if sec_idx not in kept:
+                continue
+            items = section["items"]
+            body = [items[j][1] for j in kept[sec_idx]]
+            blocks.append("\n".join([section["header"], *body]))
+
+        self._used_tokens = used
+        return "\n\n".join(blocks)
+
+    @property
+    def used_tokens(self) -> int:
+        """마지막 build()의 추정 토큰 수"""
+        return self._used_tokens
+
+    def report(self) -> List[Dict]:
+        """마지막 build()에서 제외된 항목 [{section, kept, dropped, items}]"""
+        return list(self._dropped)
+
+    def print_report(self, samples: int = 2) -> None:
+        """마지막 build()의 예산 초과 제외 내역 출력 (섹션별 채택/제외 수 + 제외 항목 예시)"""
+        if not self._dropped:
+            return
+        total = sum(d["dropped"] for d in self._dropped)
+        print(f"  {self.label}: 약 {self._used_tokens:,} 토큰 (예산 {self.token_budget:,}), {total}개 항목 제외")
+        for d in self._dropped:
+            examples = ", ".join(item.strip().lstrip("- ")[:30] for item in d["items"][:samples])
+            print(f"    - {d['section']}: {d['kept']}개 채택, {d['dropped']}개 제외 (예: {examples})")
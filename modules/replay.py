@@ -0,0 +1,363 @@
+"""
+저장된 데이터로 예측 백테스트/모의투자 재현 (오프라인, 네트워크 없음)
+
+frontend/public/data 아래 파일만으로 backtest_main.py와 같은 판정·집계를 다시 계산한다.
+
+- 예측: forecast-history/의 날짜별 첫 예측 파일 (Supabase theme_predictions에 저장되는 실행과 동일)
+- 종가: LocalPriceStore — history/ 스냅샷의 종목 일별 종가(history 섹션)와 장 마감 후 순위 현재가,
+  부족분은 paper-trading/ 결과의 종가로 채움. 장중 스냅샷의 당일 가격은 종가로 쓰지 않는다.
+- 수익률: PriceLoader 계산을 그대로 쓰되(LocalPriceLoader), 저장 종가가 띄엄띄엄이므로
+  구간 첫/마지막 거래일(일간 수익률은 전 거래일) 종가가 모두 있을 때만 인정한다.
+- 모의투자: 날짜별 09:00 이후 첫 스냅샷 가격에 대장주를 매수해 종가에 매도
+  (최고가는 분봉 대신 장중 스냅샷 가격으로 근사)
+
+KOSPI 지수 일봉은 로컬에 없으므로 index_return은 NaN(regime N/A)이다.
+"""
+import logging
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from modules import json_backend
+from modules.backtest import PriceLoader, _date_to_kis, group_codes, load_group_returns
+from modules.backtest_frame import accuracy_report, attach_returns, build_frames, due_mask, evaluate_frame
+from modules.snapshot_format import load_snapshot
+from modules.snapshot_log import LOG_DIRNAME, read_snapshot_log, snapshot_entry
+from modules.stock_record import StockRegistry
+from modules.trading_calendar import get_calendar, to_date
+
+logger = logging.getLogger(__name__)
+
+MARKET_OPEN = "09:00"
+MARKET_CLOSE = "15:30"
+
+
+def _kis(value) -> str:
+    return value.strftime("%Y%m%d")
+
+
+def settled_session(timestamp: str) -> Optional[str]:
+    """timestamp 시점에 종가가 확정된 마지막 거래일 (YYYYMMDD)
+
+    거래일 장 마감(15:30) 전이면 전 거래일, 그 외(장 마감 후/휴장일)는 당일 또는 직전 거래일.
+    """
+    calendar = get_calendar()
+    day = to_date(timestamp[:10])
+    if calendar.is_session(day) and timestamp[11:16] < MARKET_CLOSE:
+        session = calendar.previous_session(day)
+    else:
+        session = calendar.session_on_or_before(day)
+    return _kis(session) if session else None
+
+
+class LocalPriceStore:
+    """저장된 스냅샷에서 모은 종목별 일별 종가 {code: {YYYYMMDD: 종가}}"""
+
+    def __init__(self):
+        self._closes: Dict[str, Dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._closes)
+
+    def add(self, code: str, date_kis: str, close: float, overwrite: bool = True) -> None:
+        if not code or not date_kis or not close or close <= 0:
+            return
+        closes = self._closes.setdefault(code, {})
+        if overwrite or date_kis not in closes:
+            closes[date_kis] = float(close)
+
+    def add_snapshot(self, data: Dict[str, Any]) -> None:
+        """히스토리 스냅샷 1개 반영 — history 섹션 종가 + (장 마감 후면) 순위 현재가"""
+        timestamp = data.get("timestamp") or ""
+        settled = settled_session(timestamp) if len(timestamp) >= 16 else None
+        if settled is None:
+            return
+
+        for code, history in (data.get("history") or {}).items():
+            for change in (history or {}).get("changes", []):
+                date_kis = _date_to_kis(change.get("date", ""))
+                if date_kis and date_kis <= settled:
+                    self.add(code, date_kis, change.get("close", 0))
+
+        day = timestamp[:10]
+        if not get_calendar().is_session(day) or timestamp[11:16] >= MARKET_CLOSE:
+            registry = StockRegistry(data)
+            for code in registry:
+                price = registry.price(code)
+                if price is not None:
+                    self.add(code, settled, price)
+
+    def add_paper_trading(self, data: Dict[str, Any]) -> None:
+        """모의투자 결과의 종가 (스냅샷에 없는 날짜만 채움)"""
+        date_kis = _date_to_kis(data.get("trade_date", ""))
+        for stock in data.get("stocks", []):
+            self.add(stock.get("code", ""), date_kis, stock.get("close_price", 0), overwrite=False)
+
+    def close(self, code: str, date_kis: str) -> Optional[float]:
+        return self._closes.get(code, {}).get(date_kis)
+
+    def series(self, code: str) -> Optional[Tuple[List[str], List[float]]]:
+        """(날짜 오름차순, 종가) — PriceLoader 시계열 형식"""
+        closes = self._closes.get(code)
+        if not closes:
+            return None
+        dates = sorted(closes)
+        return dates, [closes[d] for d in dates]
+
+    def last_date(self) -> Optional[str]:
+        return max((max(closes) for closes in self._closes.values() if closes), default=None)
+
+
+class LocalPriceLoader(PriceLoader):
+    """LocalPriceStore 기반 PriceLoader (API 호출 없음)
+
+    저장 종가는 모든 거래일에 있지 않으므로, 라이브 조회라면 구간 끝이 되었을 거래일의 종가가
+    실제로 있을 때만 수익률을 계산한다 (없으면 미확보 → expired).
+    """
+
+    def __init__(self, store: LocalPriceStore):
+        super().__init__(kis_client=None, workers=1)
+        self.store = store
+
+    def _fetch_stock(self, code: str) -> Optional[Tuple[List[str], List[float]]]:
+        return self.store.series(code)
+
+    def _fetch_index(self) -> Optional[Tuple[List[str], List[float]]]:
+        return None
+
+    def load(self) -> None:
+        for code in self._windows:
+            if code not in self._series:
+                self._series[code] = self._fetch_stock(code)
+
+    def _period_return(self, series, start: str, end: str) -> Optional[float]:
+        calendar = get_calendar()
+        dates, _ = self._window(series, _date_to_kis(start), _date_to_kis(end))
+        first, last = calendar.add_sessions(start, 0), calendar.session_on_or_before(end)
+        if not dates or dates[0] != _kis(first) or last is None or dates[-1] != _kis(last):
+            return None
+        return super()._period_return(series, start, end)
+
+    def _daily_return(self, series, target_date: str) -> Optional[float]:
+        dates, _ = self._window(series, "", _date_to_kis(target_date))
+        previous = get_calendar().previous_session(target_date)
+        if len(dates) < 2 or previous is None or dates[-2] != _kis(previous):
+            return None
+        return super()._daily_return(series, target_date)
+
+    def index_return(self, start: str, end: str) -> float:
+        return math.nan
+
+    def daily_index_return(self, target_date: str) -> float:
+        return math.nan
+
+
+def _file_timestamp(path: Path) -> str:
+    """YYYY-MM-DD_HHMM.json / YYYY-MM-DD.json → "YYYY-MM-DD HH:MM:00" """
+    stem = path.stem
+    hhmm = stem[11:15] if len(stem) >= 15 else "2359"
+    return f"{stem[:10]} {hhmm[:2]}:{hhmm[2:]}:00"
+
+
+def scan_history(data_dir: Path) -> Tuple[LocalPriceStore, Dict[str, List[Dict[str, Any]]]]:
+    """history/ + paper-trading/ + snapshot-log/ 한 번 순회
+
+    Returns:
+        (종가 저장소, {YYYY-MM-DD: 스냅샷 로그 항목 목록 (시간순)})
+    """
+    store = LocalPriceStore()
+    entries_by_day: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    for path in sorted((data_dir / "history").glob("*.json")):
+        try:
+            data = load_snapshot(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("히스토리 스냅샷 로드 실패, 건너뜀: %s (%s)", path.name, e)
+            continue
+        if not data.get("timestamp"):
+            data["timestamp"] = _file_timestamp(path)
+        store.add_snapshot(data)
+        entry = snapshot_entry(data)
+        entries_by_day.setdefault(entry["timestamp"][:10], {})[entry["timestamp"]] = entry
+
+    for path in sorted((data_dir / LOG_DIRNAME).glob("*.jsonl")):
+        for entry in read_snapshot_log(data_dir, path.stem):
+            entries_by_day.setdefault(path.stem, {})[entry["timestamp"]] = entry
+
+    for path in sorted((data_dir / "paper-trading").glob("*.json")):
+        try:
+            store.add_paper_trading(json_backend.load(path))
+        except (OSError, ValueError) as e:
+            logger.warning("모의투자 파일 로드 실패, 건너뜀: %s (%s)", path.name, e)
+
+    return store, {
+        day: [entries[ts] for ts in sorted(entries)]
+        for day, entries in sorted(entries_by_day.items())
+    }
+
+
+def load_forecast_predictions(
+    data_dir: Path,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """forecast-history/ → theme_predictions 행 형식 목록 (날짜별 첫 실행 파일만)
+
+    Supabase에는 당일 첫 실행의 예측만 저장되므로 같은 날 이후 실행 파일은 건너뛴다.
+    """
+    first_by_day: Dict[str, Path] = {}
+    for path in sorted((data_dir / "forecast-history").glob("*.json")):
+        day = path.stem[:10]
+        if (start and day < start) or (end and day > end):
+            continue
+        first_by_day.setdefault(day, path)
+
+    predictions = []
+    for day, path in sorted(first_by_day.items()):
+        try:
+            forecast = json_backend.load(path)
+        except (OSError, ValueError) as e:
+            logger.warning("예측 파일 로드 실패, 건너뜀: %s (%s)", path.name, e)
+            continue
+        for category in ("today", "short_term", "long_term"):
+            for theme in forecast.get(category, []):
+                predictions.append({
+                    "id": f"{path.stem}/{category}/{theme.get('theme_name', '')}",
+                    "prediction_date": day,
+                    "category": category,
+                    "theme_name": theme.get("theme_name", ""),
+                    "confidence": theme.get("confidence", ""),
+                    "leader_stocks": theme.get("leader_stocks", []),
+                    "status": "active",
+                })
+    return predictions
+
+
+def replay_paper_trading(
+    store: LocalPriceStore,
+    entries_by_day: Dict[str, List[Dict[str, Any]]],
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """날짜별 모의투자 재현 (collect_paper_trading.py 결과 형식, price_snapshots 제외)
+
+    09:00~15:30 스냅샷 중 첫 번째 가격에 그날 등장한 모든 대장주를 매수하고, 저장된 종가에 매도한다.
+    """
+    days = []
+    for day, entries in entries_by_day.items():
+        if (start and day < start) or (end and day > end):
+            continue
+        intraday = [e for e in entries if MARKET_OPEN <= e["timestamp"][11:16] < MARKET_CLOSE]
+        if not intraday or not get_calendar().is_session(day):
+            continue
+        morning = intraday[0]
+
+        leaders: Dict[str, Dict[str, str]] = {}
+        for entry in intraday:
+            for leader in entry["leaders"]:
+                leaders.setdefault(leader["code"], leader)
+
+        results = []
+        for code, leader in leaders.items():
+            buy_price, market = morning["prices"].get(code, (None, None))
+            close_price = store.close(code, _date_to_kis(day))
+            if buy_price is None or close_price is None:
+                continue
+            close_price = int(close_price)
+            high_price, high_time = close_price, MARKET_CLOSE
+            for entry in intraday[1:]:
+                price = entry["prices"].get(code, (None,))[0]
+                if price is not None and price > high_price:
+                    high_price, high_time = price, entry["timestamp"][11:16]
+            results.append({
+                "code": code,
+                "name": leader["name"],
+                "theme": leader["theme"],
+                **({"market": market} if market else {}),
+                "buy_price": buy_price,
+                "close_price": close_price,
+                "profit_rate": round((close_price - buy_price) / buy_price * 100, 2) if buy_price > 0 else 0,
+                "profit_amount": close_price - buy_price,
+                "high_price": high_price,
+                "high_time": high_time,
+                "high_profit_rate": round((high_price - buy_price) / buy_price * 100, 2) if buy_price > 0 else 0,
+                "high_profit_amount": high_price - buy_price,
+            })
+        if results:
+            days.append({
+                "trade_date": day,
+                "morning_timestamp": morning["timestamp"],
+                "stocks": results,
+                "summary": summarize_trades(results),
+            })
+    return days
+
+
+def summarize_trades(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """종가/최고가 기준 모의투자 요약 (collect_paper_trading.py summary와 같은 키)"""
+    total_invested = sum(r["buy_price"] for r in results)
+    total_value = sum(r["close_price"] for r in results)
+    high_total_value = sum(r["high_price"] for r in results)
+    total_profit = total_value - total_invested
+    high_total_profit = high_total_value - total_invested
+    return {
+        "total_stocks": len(results),
+        "profit_stocks": sum(1 for r in results if r["profit_rate"] > 0),
+        "loss_stocks": sum(1 for r in results if r["profit_rate"] < 0),
+        "total_invested": total_invested,
+        "total_value": total_value,
+        "total_profit": total_profit,
+        "total_profit_rate": round(total_profit / total_invested * 100, 2) if total_invested > 0 else 0,
+        "high_total_value": high_total_value,
+        "high_total_profit": high_total_profit,
+        "high_total_profit_rate": round(high_total_profit / total_invested * 100, 2) if total_invested > 0 else 0,
+        "high_profit_stocks": sum(1 for r in results if r["high_profit_rate"] > 0),
+        "high_loss_stocks": sum(1 for r in results if r["high_profit_rate"] < 0),
+    }
+
+
+def run_replay(
+    data_dir: Path,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    as_of: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """저장 데이터 전체 재현
+
+    Args:
+        start, end: 예측일/거래일 범위 (YYYY-MM-DD, 양 끝 포함)
+        as_of: 평가 기준 시각 (기본: 저장 종가 마지막 거래일 18:00 — 이후 구간이 필요한 예측은 active)
+
+    Returns:
+        {"predictions", "preds", "legs", "statuses", "pred_groups", "returns_by_group",
+         "index_by_group", "report", "paper_trading", "store_codes", "as_of"}
+    """
+    store, entries_by_day = scan_history(data_dir)
+    if as_of is None:
+        last = store.last_date()
+        as_of = datetime.strptime(last, "%Y%m%d").replace(hour=18) if last else datetime.now()
+
+    predictions = load_forecast_predictions(data_dir, start, end)
+    preds, legs = build_frames(predictions)
+    pred_groups = group_codes(preds, legs)
+    returns_by_group, index_by_group = load_group_returns(LocalPriceLoader(store), pred_groups)
+    attach_returns(preds, legs, returns_by_group, index_by_group)
+
+    due = due_mask(preds, now=as_of)
+    statuses = np.where(due, evaluate_frame(preds, legs), "active")
+    return {
+        "predictions": predictions,
+        "preds": preds,
+        "legs": legs,
+        "statuses": statuses,
+        "pred_groups": pred_groups,
+        "returns_by_group": returns_by_group,
+        "index_by_group": index_by_group,
+        "report": accuracy_report(preds, statuses),
+        "paper_trading": replay_paper_trading(store, entries_by_day, start, end),
+        "store_codes": len(store),
+        "as_of": as_of,
+    }
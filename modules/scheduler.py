@@ -0,0 +1,180 @@
+"""
+상주 스케줄러 — 장중 작업을 한 프로세스에서 순차 실행
+
+cron이 작업마다 새 프로세스를 띄우면 매번 모듈 import, Supabase 토큰 조회, 거래일 달력 생성을
+반복한다. 상주 프로세스는 이를 한 번만 하고 아래 상태를 작업 간에 공유한다.
+- KIS 클라이언트 (get_kis_client: 토큰·rate limiter)
+- Supabase 매니저 (get_supabase_manager), 거래일 달력 (get_calendar), Gemini 키 풀
+
+작업 표(default_jobs)는 기존 워크플로우 실행 시각과 같다. 작업은 각 스크립트의 main()을 그대로 호출하며,
+sys.argv 기반 스크립트는 실행 동안 sys.argv를 작업 인자로 바꿔 둔다.
+
+장애 격리:
+- 작업에서 난 예외/sys.exit는 해당 작업 실패로 기록하고 다음 작업을 계속 실행한다
+- KeyboardInterrupt는 스케줄러를 종료한다
+- 같은 프로세스이므로 멈춘(hang) 작업을 강제 종료하지는 못한다
+"""
+import importlib
+import logging
+import subprocess
+import sys
+import time
+import traceback
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from modules.trading_calendar import get_calendar
+from modules.utils import KST
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent.parent
+
+MAX_LATENESS = timedelta(minutes=20)  # 예정 시각보다 이만큼 늦으면 건너뜀 (앞 작업 지연, 절전 복귀 등)
+POLL_SECONDS = 30  # 대기 중 시계 재확인 간격
+HOOK_TIMEOUT = 300
+
+
+def default_jobs() -> List[Dict[str, Any]]:
+    """기본 작업 표 (KST, 거래일만) — .github/workflows 실행 시각과 동일
+
+    - argv: sys.argv 기반 스크립트 인자
+    - kwargs: main(**kwargs)로 넘길 인자 (main.py처럼 argparse가 __main__에 있는 경우)
+    """
+    from collect_investor_data import CLOSING_SCHEDULE, INTRADAY_SCHEDULE
+
+    return [
+        {"name": "forecast", "module": "forecast_main", "times": ["07:30"]},
+        {"name": "theme_analysis", "module": "main", "times": ["09:05", "09:28"], "kwargs": {}},
+        {
+            "name": "investor",
+            "module": "collect_investor_data",
+            "times": [s["time"] for s in INTRADAY_SCHEDULE] + CLOSING_SCHEDULE,
+        },
+        {"name": "forecast_intraday", "module": "forecast_main", "times": ["10:00", "13:00"], "argv": ["--intraday"]},
+        {"name": "refresh", "module": "main", "times": ["11:30"], "kwargs": {"test_mode": True, "skip_ai": True}},
+        {"name": "paper_trading", "module": "collect_paper_trading", "times": ["15:40"]},
+        {"name": "backtest", "module": "backtest_main", "times": ["18:00"]},
+    ]
+
+
+def _at(day: date, hhmm: str) -> datetime:
+    hour, minute = hhmm.split(":")
+    return datetime(day.year, day.month, day.day, int(hour), int(minute))
+
+
+def next_slot(jobs: Sequence[Dict[str, Any]], after: datetime, max_days: int = 14) -> Tuple[datetime, List[Dict[str, Any]]]:
+    """after 이후(미포함) 가장 이른 실행 시각과 그 시각의 작업 목록 (거래일만, 작업 표 순서 유지)
+
+    Args:
+        after: 기준 시각 (KST, timezone-naive)
+    """
+    calendar = get_calendar()
+    day = after.date()
+    for _ in range(max_days):
+        if calendar.is_session(day):
+            slots = sorted({_at(day, t) for job in jobs for t in job["times"]})
+            upcoming = [s for s in slots if s > after]
+            if upcoming:
+                slot = upcoming[0]
+                hhmm = slot.strftime("%H:%M")
+                return slot, [job for job in jobs if hhmm in job["times"]]
+        day += timedelta(days=1)
+    raise ValueError(f"{max_days}일 안에 실행할 작업이 없습니다 (기준: {after})")
+
+
+def run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """작업 1개 실행 — 예외/sys.exit를 잡아 결과로 반환
+
+    Returns:
+        {"name", "ok", "elapsed", "error"}
+    """
+    name = job["name"]
+    saved_argv = sys.argv
+    sys.argv = [f"{job['module']}.py", *job.get("argv", [])]
+    started = time.monotonic()
+    error = None
+    try:
+        module = importlib.import_module(job["module"])
+        if "kwargs" in job:
+            module.main(**job["kwargs"])
+        else:
+            module.main()
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            error = f"exit {e.code}"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    finally:
+        sys.argv = saved_argv
+
+    elapsed = time.monotonic() - started
+    if error:
+        logger.error("작업 실패 %s (%.1fs): %s", name, elapsed, error)
+    return {"name": name, "ok": error is None, "elapsed": round(elapsed, 1), "error": error}
+
+
+def run_hook(command: str) -> bool:
+    """작업 후 셸 명령 실행 (git 커밋/푸시 등) — 실패해도 스케줄러는 계속"""
+    try:
+        result = subprocess.run(command, shell=True, cwd=ROOT_DIR, timeout=HOOK_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        print(f"  ✗ 후처리 명령 시간 초과 ({HOOK_TIMEOUT}s): {command}")
+        return False
+    if result.returncode != 0:
+        print(f"  ✗ 후처리 명령 실패 (exit {result.returncode}): {command}")
+        return False
+    return True
+
+
+def warm_up() -> None:
+    """공유 상태 미리 준비 (달력, KIS 토큰) — 실패해도 작업 실행 시 다시 시도된다"""
+    get_calendar()
+    try:
+        from modules.kis_client import get_kis_client
+        get_kis_client().get_access_token()
+        print("  ✓ KIS 토큰 준비")
+    except Exception as e:
+        print(f"  ⚠ KIS 토큰 준비 실패 (작업 실행 시 재시도): {e}")
+
+
+def now_kst() -> datetime:
+    return datetime.now(KST).replace(tzinfo=None)
+
+
+def _sleep_until(target: datetime) -> None:
+    while True:
+        remaining = (target - now_kst()).total_seconds()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, POLL_SECONDS))
+
+
+def run_forever(
+    jobs: Sequence[Dict[str, Any]],
+    hook: Optional[str] = None,
+    start: Optional[datetime] = None,
+) -> None:
+    """작업 표에 따라 계속 실행 (start 이전 시각은 실행하지 않음)"""
+    last = start or now_kst()
+    while True:
+        slot, due = next_slot(jobs, last)
+        names = ", ".join(job["name"] for job in due)
+        print(f"\n[스케줄러] 다음 실행 {slot:%Y-%m-%d %H:%M} — {names}")
+        _sleep_until(slot)
+        last = slot
+
+        late = now_kst() - slot
+        if late > MAX_LATENESS:
+            print(f"  ⚠ {int(late.total_seconds() // 60)}분 지연 — {names} 건너뜀")
+            continue
+
+        for job in due:
+            print(f"\n{'=' * 50}\n[스케줄러] {job['name']} 시작 ({now_kst():%H:%M:%S})\n{'=' * 50}")
+            result = run_job(job)
+            status = "완료" if result["ok"] else f"실패 ({result['error']})"
+            print(f"[스케줄러] {job['name']} {status} — {result['elapsed']}s")
+            if hook and result["ok"]:
+                run_hook(hook)
@@ -0,0 +1,380 @@
+"""
+히스토리 스냅샷 압축 포맷 (compact-v2) + 델타 포맷 (delta-v1)
+
+들여쓰기 없는 JSON + 프론트엔드(src/lib/snapshot.ts)와 합의된 무손실 축약 규칙:
+- 순위 목록(rising/falling/volume/...)의 종목 레코드 키를 짧은 별칭으로 치환
+- 같은 종목이 여러 순위 목록에 나오면 처음 등장한 레코드를 _stocks[code]에 한 번만 저장하고,
+  목록에는 종목코드(레코드가 같을 때) 또는 {"@": 코드, 달라진 필드..., "-": [없는 필드]}만 남김
+  (rank, direction 등 섹션별로 다른 필드만 기록)
+- news: 여러 종목에 중복 등장하는 기사를 _articles 테이블로 한 번만 저장하고 인덱스로 참조
+- news 기사의 originallink가 link와 같으면 생략
+- history[code].code (키와 중복) 생략
+
+expand_snapshot()으로 원본 구조를 그대로 복원할 수 있다. compact-v1(종목 중복 제거 이전) 파일도 읽는다.
+
+delta-v1: 같은 날 직전 스냅샷 대비 JSON Patch(RFC 6902 add/remove/replace) 파일.
+- {"_format": "delta-v1", "base": "직전 파일명", "depth": 체인 길이, "ops": [...]}
+- 날짜가 바뀌거나 체인이 MAX_DELTA_CHAIN에 도달하면 전체 스냅샷(keyframe)을 저장
+- 체인이 하루를 넘지 않으므로 날짜 단위 정리(IndexManager.evict_expired)로 base가 먼저 지워지지 않는다
+load_snapshot()이 base를 따라가며 복원한다 (프론트엔드는 src/lib/snapshot.ts의 loadSnapshot).
+"""
+import copy
+import gzip
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from modules import json_backend
+from modules.json_store import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "compact-v2"
+_LEGACY_FORMATS = ("compact-v1",)
+DELTA_FORMAT = "delta-v1"
+
+# 델타 체인 최대 길이 (스냅샷 1개 복원 시 최대 MAX_DELTA_CHAIN + 1개 파일 읽기)
+MAX_DELTA_CHAIN = 6
+# 델타 크기가 전체 스냅샷 대비 이 비율 이상이면 keyframe으로 저장
+DELTA_MAX_RATIO = 0.5
+
+# 종목 레코드가 담긴 순위 섹션 ({시장: [레코드]})
+STOCK_LIST_SECTIONS = ("rising", "falling", "volume", "trading_value", "fluctuation", "fluctuation_direct")
+
+# 종목 레코드 키 별칭 (프론트엔드 src/lib/snapshot.ts의 STOCK_KEY_ALIASES와 동일하게 유지)
+STOCK_KEY_ALIASES = {
+    "current_price": "cp",
+    "change_rate": "cr",
+    "change_price": "cg",
+    "volume": "v",
+    "volume_rate": "vr",
+    "trading_value": "tv",
+    "market": "m",
+    "is_etf": "e",
+    "direction": "d",
+    "consecutive_up_days": "ud",
+    "consecutive_down_days": "dd",
+}
+_STOCK_KEY_EXPAND = {v: k for k, v in STOCK_KEY_ALIASES.items()}
+
+
+def dumps_compact(data: Any) -> str:
+    """들여쓰기/공백 없는 JSON 문자열"""
+    return json_backend.dumps(data)
+
+
+def _rename_keys(record: Dict, mapping: Dict[str, str]) -> Dict:
+    return {mapping.get(k, k): v for k, v in record.items()}
+
+
+def _stock_ref(record: Any, stocks: Dict[str, Dict]) -> Any:
+    """순위 목록 레코드 → _stocks 참조 (처음 등장한 종목이면 _stocks에 등록)"""
+    if not isinstance(record, dict):
+        return record
+    compact = _rename_keys(record, STOCK_KEY_ALIASES)
+    code = record.get("code")
+    if not isinstance(code, str) or not code:
+        return compact
+    base = stocks.setdefault(code, compact)
+    if base is compact or base == compact:
+        return code
+    ref = {"@": code, **{k: v for k, v in compact.items() if k not in base or base[k] != v}}
+    missing = [k for k in base if k not in compact]
+    if missing:
+        ref["-"] = missing
+    return ref
+
+
+def _expand_stock_ref(ref: Any, stocks: Dict[str, Dict]) -> Any:
+    """_stocks 참조 → 원래 키의 종목 레코드"""
+    if isinstance(ref, str):
+        return _rename_keys(stocks[ref], _STOCK_KEY_EXPAND)
+    if not isinstance(ref, dict):
+        return ref
+    if "@" not in ref:
+        return _rename_keys(ref, _STOCK_KEY_EXPAND)
+    missing = set(ref.get("-", ()))
+    record = {k: v for k, v in stocks[ref["@"]].items() if k not in missing}
+    record.update((k, v) for k, v in ref.items() if k not in ("@", "-"))
+    return _rename_keys(record, _STOCK_KEY_EXPAND)
+
+
+def encode_snapshot(data: Dict[str, Any]) -> Dict[str, Any]:
+    """스냅샷 dict → compact-v2 dict (원본은 변경하지 않음)"""
+    if data.get("_format") == SNAPSHOT_FORMAT:
+        return data
+    encoded = dict(data)
+
+    stocks: Dict[str, Dict] = {}
+    for section in STOCK_LIST_SECTIONS:
+        markets = data.get(section)
+        if isinstance(markets, dict):
+            encoded[section] = {
+                market: [_stock_ref(s, stocks) for s in records] if isinstance(records, list) else records
+                for market, records in markets.items()
+            }
+    if stocks:
+        encoded["_stocks"] = stocks
+
+    history = data.get("history")
+    if isinstance(history, dict):
+        encoded["history"] = {
+            code: ({k: v for k, v in h.items() if not (k == "code" and v == code)} if isinstance(h, dict) else h)
+            for code, h in history.items()
+        }
+
+    news = data.get("news")
+    if isinstance(news, dict):
+        articles: List[Dict] = []
+        article_idx: Dict[str, int] = {}
+        encoded_news: Dict[str, Any] = {}
+        for code, entry in news.items():
+            if not isinstance(entry, dict) or not isinstance(entry.get("news"), list):
+                encoded_news[code] = entry
+                continue
+            refs = []
+            for item in entry["news"]:
+                compact_item = dict(item)
+                if "originallink" not in item:
+                    compact_item["originallink"] = None
+                elif item["originallink"] == item.get("link"):
+                    del compact_item["originallink"]
+                key = dumps_compact(compact_item)
+                if key not in article_idx:
+                    article_idx[key] = len(articles)
+                    articles.append(compact_item)
+                refs.append(article_idx[key])
+            encoded_news[code] = {**entry, "news": refs}
+        encoded["news"] = {"_articles": articles, **encoded_news}
+
+    encoded["_format"] = SNAPSHOT_FORMAT
+    return encoded
+
+
+def expand_snapshot(data: Dict[str, Any]) -> Dict[str, Any]:
+    """compact-v2/v1 dict → 원본 스냅샷 구조 (다른 포맷이면 그대로 반환)"""
+    if data.get("_format") != SNAPSHOT_FORMAT and data.get("_format") not in _LEGACY_FORMATS:
+        return data
+    expanded = {k: v for k, v in data.items() if k not in ("_format", "_stocks")}
+
+    stocks = data.get("_stocks") or {}
+    for section in STOCK_LIST_SECTIONS:
+        markets = data.get(section)
+        if isinstance(markets, dict):
+            expanded[section] = {
+                market: [_expand_stock_ref(s, stocks) for s in records] if isinstance(records, list) else records
+                for market, records in markets.items()
+            }
+
+    history = data.get("history")
+    if isinstance(history, dict):
+        expanded["history"] = {
+            code: ({"code": code, **h} if isinstance(h, dict) and "code" not in h else h)
+            for code, h in history.items()
+        }
+
+    news = data.get("news")
+    if isinstance(news, dict) and "_articles" in news:
+        articles = []
+        for item in news["_articles"]:
+            restored = dict(item)
+            if "originallink" not in restored:
+                restored["originallink"] = restored.get("link")
+            elif restored["originallink"] is None:
+                del restored["originallink"]
+            articles.append(restored)
+        expanded["news"] = {
+            code: ({**entry, "news": [dict(articles[i]) for i in entry["news"]]} if isinstance(entry, dict) and isinstance(entry.get("news"), list) else entry)
+            for code, entry in news.items() if code != "_articles"
+        }
+
+    return expanded
+
+
+def write_compressed_siblings(path: Path) -> List[Path]:
+    """JSON 파일 옆에 .gz(항상) / .br(brotli 설치 시) 사전 압축본 생성
+
+    정적 호스팅에서 Content-Encoding 협상용으로 사용한다. gzip mtime=0으로 고정하여 내용이 같으면 바이트도 같다.
+    """
+    raw = path.read_bytes()
+    written = []
+
+    gz_path = path.with_name(path.name + ".gz")
+    gz_path.write_bytes(gzip.compress(raw, compresslevel=9, mtime=0))
+    written.append(gz_path)
+
+    try:
+        import brotli
+        br_path = path.with_name(path.name + ".br")
+        br_path.write_bytes(brotli.compress(raw, quality=11))
+        written.append(br_path)
+    except ImportError:
+        logger.debug("brotli 미설치, .br 생성 건너뜀")
+
+    return written
+
+
+# ── JSON Patch (RFC 6902 부분 구현: add / remove / replace) ───
+
+def _escape_pointer(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape_pointer(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _size(value: Any) -> int:
+    return len(dumps_compact(value))
+
+
+def diff_json(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """old → new JSON Patch 생성
+
+    dict는 키 단위, 같은 길이의 list는 인덱스 단위로 재귀 비교하되,
+    하위 변경 목록이 값 전체 교체보다 커지면 replace 1개로 대체한다.
+    """
+    if old == new:
+        return []
+    ops: List[Dict[str, Any]] = []
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape_pointer(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape_pointer(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(diff_json(old[key], value, child))
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for idx, (a, b) in enumerate(zip(old, new)):
+            ops.extend(diff_json(a, b, f"{path}/{idx}"))
+    else:
+        return [{"op": "replace", "path": path, "value": new}]
+
+    replace = [{"op": "replace", "path": path, "value": new}]
+    if path and _size(ops) > _size(replace):
+        return replace
+    return ops
+
+
+def apply_patch(doc: Any, ops: List[Dict[str, Any]]) -> Any:
+    """JSON Patch 적용 (doc을 직접 수정, 루트 교체 시 새 값 반환)"""
+    for op in ops:
+        path = op["path"]
+        if path == "":
+            doc = copy.deepcopy(op["value"]) if op["op"] != "remove" else None
+            continue
+        tokens = [_unescape_pointer(t) for t in path.split("/")[1:]]
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            idx = len(parent) if last == "-" else int(last)
+            if op["op"] == "add":
+                parent.insert(idx, op["value"])
+            elif op["op"] == "remove":
+                del parent[idx]
+            else:
+                parent[idx] = op["value"]
+        else:
+            if op["op"] == "remove":
+                del parent[last]
+            else:
+                parent[last] = op["value"]
+    return doc
+
+
+# ── 파일 입출력 ───
+
+def write_snapshot(path: Path, data: Dict[str, Any], encode: bool = True, siblings: bool = False) -> int:
+    """스냅샷 저장 (compact-v2 인코딩 + 압축 JSON)
+
+    Args:
+        path: 저장 경로 (.json)
+        data: 스냅샷 데이터
+        encode: compact 축약 적용 여부 (False면 공백만 제거)
+        siblings: .gz/.br 사전 압축본도 함께 생성
+
+    Returns:
+        저장된 JSON 바이트 수
+    """
+    payload = dumps_compact(encode_snapshot(data) if encode else data).encode("utf-8")
+    atomic_write_bytes(path, payload)
+    if siblings:
+        write_compressed_siblings(path)
+    return len(payload)
+
+
+def _read_header(path: Path) -> Dict[str, Any]:
+    return json_backend.load(path)
+
+
+def _previous_snapshot(path: Path) -> Optional[Path]:
+    """같은 디렉토리에서 path 직전(파일명 기준)의 같은 날짜 스냅샷"""
+    date_prefix = path.name[:10]
+    candidates = sorted(
+        p for p in path.parent.glob(f"{date_prefix}_*.json") if p.name < path.name
+    )
+    return candidates[-1] if candidates else None
+
+
+def write_history_snapshot(path: Path, data: Dict[str, Any], siblings: bool = False) -> Dict[str, Any]:
+    """히스토리 스냅샷 저장 — 같은 날 직전 스냅샷이 있으면 delta-v1, 아니면 keyframe(compact-v2)
+
+    Returns:
+        {"kind": "keyframe"|"delta", "bytes": 저장 크기, "base": base 파일명 또는 None}
+    """
+    normalized = json_backend.loads(json_backend.dumps_bytes(data))
+    keyframe = dumps_compact(encode_snapshot(normalized)).encode("utf-8")
+
+    prev = _previous_snapshot(path)
+    if prev is not None:
+        try:
+            prev_raw = _read_header(prev)
+            depth = prev_raw.get("depth", 0) + 1 if prev_raw.get("_format") == DELTA_FORMAT else 1
+            if depth <= MAX_DELTA_CHAIN:
+                base = load_snapshot(prev, _raw=prev_raw)
+                delta = dumps_compact({
+                    "_format": DELTA_FORMAT,
+                    "base": prev.name,
+                    "depth": depth,
+                    "ops": diff_json(base, normalized),
+                }).encode("utf-8")
+                if len(delta) < len(keyframe) * DELTA_MAX_RATIO:
+                    atomic_write_bytes(path, delta)
+                    if siblings:
+                        write_compressed_siblings(path)
+                    return {"kind": "delta", "bytes": len(delta), "base": prev.name}
+        except (OSError, json.JSONDecodeError, KeyError, IndexError, ValueError) as e:
+            logger.warning("델타 생성 실패, keyframe으로 저장: %s", e)
+
+    atomic_write_bytes(path, keyframe)
+    if siblings:
+        write_compressed_siblings(path)
+    return {"kind": "keyframe", "bytes": len(keyframe), "base": None}
+
+
+def load_snapshot(path: Path, _raw: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """스냅샷 로드 — delta-v1이면 base 체인을 따라 복원, compact-v2/v1이면 원본 구조로 확장
+
+    기존 indent=2 포맷도 그대로 읽는다.
+    """
+    raw = _raw if _raw is not None else _read_header(path)
+    chain = []
+    hops = 0
+    while raw.get("_format") == DELTA_FORMAT:
+        chain.append(raw["ops"])
+        path = path.parent / raw["base"]
+        raw = _read_header(path)
+        hops += 1
+        if hops > MAX_DELTA_CHAIN * 4:
+            raise ValueError(f"델타 체인이 너무 깁니다: {path.name}")
+
+    doc = expand_snapshot(raw)
+    for ops in reversed(chain):
+        doc = apply_patch(doc, ops)
+    return doc
@@ -0,0 +1,127 @@
+"""
+장중 스냅샷 로그 (일자별 JSON Lines)
+
+latest.json이 갱신될 때마다 모의투자에 필요한 정보만 한 줄로 추가한다.
+
+    data/snapshot-log/2026-10-19.jsonl
+    {"timestamp": "2026-10-19 09:12:03",
+     "leaders": [{"code": "005930", "name": "삼성전자", "theme": "반도체"}, ...],
+     "prices": {"005930": [71200, "KOSPI"], ...}}
+
+- leaders: theme_analysis의 대장주 (테마 순서, 종목코드 중복 제거)
+- prices: 순위 섹션 첫 등장 현재가 + 시장 (StockRegistry 기준, 가격 0도 그대로 기록)
+
+모의투자(collect_paper_trading.py)는 오늘 로그를 한 번에 읽고, 로그가 없을 때만
+git 히스토리의 latest.json 버전을 하나씩 조회한다.
+같은 timestamp가 여러 번 기록되면 나중 줄을 사용한다 (워크플로우 병합 후 최종본).
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from modules import json_backend
+from modules.json_store import file_lock, read_last_jsonl
+from modules.stock_record import StockRegistry
+from modules.utils import KST
+
+logger = logging.getLogger(__name__)
+
+LOG_DIRNAME = "snapshot-log"
+RETENTION_DAYS = 7
+
+
+def extract_leaders(theme_analysis: Optional[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """theme_analysis → 대장주 목록 [{code, name, theme}] (첫 등장 기준)"""
+    leaders = []
+    seen = set()
+    for theme in (theme_analysis or {}).get("themes", []):
+        theme_name = theme.get("theme_name", "")
+        for stock in theme.get("leader_stocks", []):
+            code = stock.get("code", "")
+            if code and code not in seen:
+                seen.add(code)
+                leaders.append({"code": code, "name": stock.get("name", ""), "theme": theme_name})
+    return leaders
+
+
+def snapshot_entry(data: Dict[str, Any]) -> Dict[str, Any]:
+    """latest 데이터(dict 또는 decode_ranking_snapshot 결과) → 로그 항목"""
+    registry = StockRegistry(data)
+    prices = {}
+    for code in registry:
+        price = registry.price(code)
+        if price is not None:
+            prices[code] = [price, registry.market(code)]
+    return {
+        "timestamp": data.get("timestamp", ""),
+        "leaders": extract_leaders(data.get("theme_analysis")),
+        "prices": prices,
+    }
+
+
+def log_path(output_dir: Path, date_str: str) -> Path:
+    return output_dir / LOG_DIRNAME / f"{date_str}.jsonl"
+
+
+def append_snapshot(output_dir: Path, data: Dict[str, Any]) -> bool:
+    """latest 데이터를 해당 일자 로그에 1줄 추가 (직전 항목과 같으면 건너뜀)
+
+    Returns:
+        추가 여부
+    """
+    entry = snapshot_entry(data)
+    timestamp = entry["timestamp"]
+    if len(timestamp) < 10:
+        return False
+
+    path = log_path(output_dir, timestamp[:10])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path):
+        if path.exists() and read_last_jsonl(path) == entry:
+            return False
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json_backend.dumps(entry) + "\n")
+    prune_logs(output_dir)
+    return True
+
+
+def read_snapshot_log(output_dir: Path, date_str: str) -> List[Dict[str, Any]]:
+    """일자별 로그 로드 (timestamp 오름차순, 같은 timestamp는 나중 줄 우선, 깨진 줄은 건너뜀)"""
+    path = log_path(output_dir, date_str)
+    if not path.exists():
+        return []
+
+    by_timestamp: Dict[str, Dict[str, Any]] = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json_backend.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                logger.warning("스냅샷 로그 손상 줄 건너뜀: %s", path)
+                continue
+            if isinstance(entry, dict) and entry.get("timestamp"):
+                by_timestamp[entry["timestamp"]] = entry
+    return [by_timestamp[ts] for ts in sorted(by_timestamp)]
+
+
+def prune_logs(output_dir: Path, now: Optional[datetime] = None) -> int:
+    """보관 기간이 지난 일자 로그 삭제
+
+    Returns:
+        삭제한 파일 수
+    """
+    log_dir = output_dir / LOG_DIRNAME
+    if not log_dir.exists():
+        return 0
+    cutoff = ((now or datetime.now(KST)) - timedelta(days=RETENTION_DAYS)).strftime("%Y-%m-%d")
+    removed = 0
+    for path in log_dir.glob("*.jsonl"):
+        if path.stem < cutoff:
+            path.unlink(missing_ok=True)
+            path.with_name(path.name + ".lock").unlink(missing_ok=True)
+            removed += 1
+    return removed
@@ -4,9 +4,9 @@
 import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
 
-from modules.kis_client import KISClient
+from modules.kis_client import KISClient, get_kis_client
+from modules.trading_calendar import get_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +17,9 @@ class StockHistoryAPI:
     def __init__(self, client: KISClient = None):
         """
         Args:
-            client: KIS 클라이언트 (없으면 새로 생성)
+            client: KIS 클라이언트 (없으면 프로세스 공용 클라이언트)
         """
-        self.client = client or KISClient()
+        self.client = client or get_kis_client()
 
     def _fetch_daily_volume(self, stock_code: str) -> Dict[str, int]:
         """inquire-daily-price API로 일별 거래량 조회
@@ -80,9 +80,9 @@ class StockHistoryAPI:
                 oldest_date = output2[-1].get("stck_bsop_date", "")
                 if oldest_date:
                     try:
-                        oldest_dt = datetime.strptime(oldest_date, "%Y%m%d")
-                        new_end = (oldest_dt - timedelta(days=1)).strftime("%Y%m%d")
-                        new_start = (oldest_dt - timedelta(days=180)).strftime("%Y%m%d")
+                        calendar = get_calendar()
+                        new_end = calendar.add_sessions(oldest_date, -1).strftime("%Y%m%d")
+                        new_start = calendar.add_sessions(oldest_date, -100).strftime("%Y%m%d")
                         result2 = self.client.get_stock_daily_price(
                             stock_code, start_date=new_start, end_date=new_end
                         )
@@ -0,0 +1,295 @@
+"""
+순위 종목 레코드 타입
+
+KIS 순위 API 응답을 정리한 종목 dict(kis_rank)와 저장된 latest.json/스냅샷의 순위 섹션을
+읽기 전용으로 다룰 때 쓰는 slotted 레코드. 경계에서 한 번 검증(종목코드 필수, 숫자 변환)하므로
+안쪽 코드는 .get() 기본값 처리 없이 속성으로 접근한다.
+
+- msgspec 설치 시 msgspec.Struct: JSON 바이트에서 필요한 필드만 바로 디코딩
+  (decode_ranking_snapshot은 news/history 등 큰 섹션을 객체로 만들지 않고 건너뛴다)
+- 미설치 시 __slots__ 클래스 + 표준 파싱으로 같은 인터페이스 제공
+
+파이프라인이 저장·전송하는 종목 데이터는 기존대로 dict이며, 이 타입은 조회용이다.
+"""
+import logging
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from modules import json_backend
+from modules.utils import safe_float, safe_int
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# 순위 섹션 → 시장 키 (fluctuation 계열은 상승/하락 분리)
+RANKING_SECTIONS = {
+    "rising": ("kospi", "kosdaq"),
+    "falling": ("kospi", "kosdaq"),
+    "volume": ("kospi", "kosdaq"),
+    "trading_value": ("kospi", "kosdaq"),
+    "fluctuation": ("kospi_up", "kospi_down", "kosdaq_up", "kosdaq_down"),
+    "fluctuation_direct": ("kospi_up", "kospi_down", "kosdaq_up", "kosdaq_down"),
+}
+
+STOCK_FIELDS = ("code", "name", "current_price", "change_rate", "volume", "trading_value", "market")
+
+
+if msgspec is not None:
+    class StockRecord(msgspec.Struct, kw_only=True):
+        """순위 종목 레코드 (msgspec.Struct — 기본 slotted)"""
+        code: str
+        name: str = ""
+        current_price: int = 0
+        change_rate: float = 0.0
+        volume: int = 0
+        trading_value: int = 0
+        market: str = ""
+
+    class _RankingSnapshot(msgspec.Struct):
+        """decode_ranking_snapshot 디코딩 대상 — 선언하지 않은 키(news, history 등)는 파싱만 하고 버림"""
+        timestamp: str = ""
+        theme_analysis: Optional[Dict[str, Any]] = None
+        rising: Dict[str, List[StockRecord]] = msgspec.field(default_factory=dict)
+        falling: Dict[str, List[StockRecord]] = msgspec.field(default_factory=dict)
+        volume: Dict[str, List[StockRecord]] = msgspec.field(default_factory=dict)
+        trading_value: Dict[str, List[StockRecord]] = msgspec.field(default_factory=dict)
+        fluctuation: Dict[str, List[StockRecord]] = msgspec.field(default_factory=dict)
+        fluctuation_direct: Dict[str, List[StockRecord]] = msgspec.field(default_factory=dict)
+
+    _snapshot_decoder = msgspec.json.Decoder(_RankingSnapshot)
+else:
+    class StockRecord:
+        """순위 종목 레코드 (__slots__)"""
+        __slots__ = STOCK_FIELDS
+
+        def __init__(
+            self,
+            *,
+            code: str,
+            name: str = "",
+            current_price: int = 0,
+            change_rate: float = 0.0,
+            volume: int = 0,
+            trading_value: int = 0,
+            market: str = "",
+        ):
+            self.code = code
+            self.name = name
+            self.current_price = current_price
+            self.change_rate = change_rate
+            self.volume = volume
+            self.trading_value = trading_value
+            self.market = market
+
+        def __eq__(self, other: Any) -> bool:
+            if not isinstance(other, StockRecord):
+                return NotImplemented
+            return all(getattr(self, f) == getattr(other, f) for f in STOCK_FIELDS)
+
+        def __repr__(self) -> str:
+            fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in STOCK_FIELDS)
+            return f"StockRecord({fields})"
+
+
+def _market_from_key(key: str) -> str:
+    """시장 키(kospi, kosdaq_up, ...) → "KOSPI"/"KOSDAQ" """
+    return "KOSPI" if key.startswith("kospi") else "KOSDAQ"
+
+
+def record_from_dict(stock: Dict[str, Any], market: str = "") -> Optional[StockRecord]:
+    """종목 dict → StockRecord (종목코드가 없으면 None)"""
+    code = stock.get("code")
+    if not code or not isinstance(code, str):
+        return None
+    return StockRecord(
+        code=code,
+        name=stock.get("name") or code,
+        current_price=safe_int(stock.get("current_price")),
+        change_rate=safe_float(stock.get("change_rate")),
+        volume=safe_int(stock.get("volume")),
+        trading_value=safe_int(stock.get("trading_value")),
+        market=stock.get("market") or market,
+    )
+
+
+def to_dict(record: StockRecord) -> Dict[str, Any]:
+    return {f: getattr(record, f) for f in STOCK_FIELDS}
+
+
+def unique_stocks(stock_lists: Iterable[Iterable[Dict[str, Any]]], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """여러 종목 리스트에서 종목코드 기준 첫 등장 dict만 모음 (코드 없는 항목 제외)
+
+    Args:
+        stock_lists: 종목 dict 리스트들 (앞 리스트 우선)
+        limit: 리스트마다 앞에서 N개만 검사 (None이면 전체)
+    """
+    seen = set()
+    result = []
+    for stocks in stock_lists:
+        for stock in islice(stocks, limit):
+            code = stock.get("code")
+            if code and isinstance(code, str) and code not in seen:
+                seen.add(code)
+                result.append(stock)
+    return result
+
+
+def iter_stock_records(
+    data: Dict[str, Any],
+    sections: Tuple[str, ...] = tuple(RANKING_SECTIONS),
+) -> Iterator[Tuple[str, str, StockRecord]]:
+    """순위 섹션의 종목을 (섹션, 시장 키, 레코드)로 순회 (dict/StockRecord 모두 허용, 코드 없는 항목 제외)"""
+    for section in sections:
+        section_data = data.get(section) or {}
+        for key in RANKING_SECTIONS[section]:
+            for stock in section_data.get(key) or []:
+                if isinstance(stock, StockRecord):
+                    yield section, key, stock
+                    continue
+                record = record_from_dict(stock, _market_from_key(key)) if isinstance(stock, dict) else None
+                if record is not None:
+                    yield section, key, record
+
+
+def _code_of(stock: Any) -> str:
+    if isinstance(stock, StockRecord):
+        return stock.code
+    if isinstance(stock, dict):
+        code = stock.get("code")
+        return code if isinstance(code, str) else ""
+    return ""
+
+
+class StockRegistry:
+    """스냅샷 1개의 순위 섹션 종목을 종목코드로 색인 (생성 시 한 번 순회, 이후 조회 O(1))
+
+    순위 섹션은 RANKING_SECTIONS 순서(rising → falling → volume → trading_value → fluctuation → fluctuation_direct)로
+    순회하며, 같은 코드가 여러 목록에 있으면 처음 등장한 종목을 대표로 삼는다.
+    종목 dict와 StockRecord(decode_ranking_snapshot 결과)를 모두 받으며, stock()은 원본 객체를 그대로 돌려준다.
+
+    Args:
+        data: latest.json / 스냅샷 데이터 (또는 {섹션: 순위 데이터} dict)
+        sections: 색인할 섹션 (기본 전체)
+    """
+
+    def __init__(self, data: Dict[str, Any], sections: Tuple[str, ...] = tuple(RANKING_SECTIONS)):
+        self.sections = sections
+        self._first: Dict[str, Tuple[str, str, Any]] = {}
+        self._membership: Dict[str, List[Tuple[str, str]]] = {}
+        self._entries: List[Tuple[str, str, Any]] = []
+        self._records: Dict[str, StockRecord] = {}
+
+        for section in sections:
+            section_data = data.get(section) or {}
+            for key in RANKING_SECTIONS[section]:
+                for stock in section_data.get(key) or []:
+                    code = _code_of(stock)
+                    if not code:
+                        continue
+                    self._entries.append((section, key, stock))
+                    self._membership.setdefault(code, []).append((section, key))
+                    if code not in self._first:
+                        self._first[code] = (section, key, stock)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._first
+
+    def __len__(self) -> int:
+        return len(self._first)
+
+    def __iter__(self) -> Iterator[str]:
+        """처음 등장한 순서의 종목코드"""
+        return iter(self._first)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """(종목코드, 첫 등장 원본) 순회"""
+        for code, (_, _, stock) in self._first.items():
+            yield code, stock
+
+    def stock(self, code: str) -> Optional[Any]:
+        """처음 등장한 종목 원본 (dict 또는 StockRecord)"""
+        first = self._first.get(code)
+        return first[2] if first else None
+
+    def get(self, code: str) -> Optional[StockRecord]:
+        """처음 등장한 종목의 검증된 레코드"""
+        record = self._records.get(code)
+        if record is None and code in self._first:
+            _, key, stock = self._first[code]
+            record = stock if isinstance(stock, StockRecord) else record_from_dict(stock, _market_from_key(key))
+            self._records[code] = record
+        return record
+
+    def price(self, code: str) -> Optional[int]:
+        """처음 등장한 현재가 (종목이 없으면 None, 0은 그대로 반환 — 기존 latest.json 조회와 동일)"""
+        record = self.get(code)
+        return record.current_price if record else None
+
+    def market(self, code: str) -> Optional[str]:
+        """처음 등장한 목록의 시장 ("KOSPI"/"KOSDAQ")"""
+        first = self._first.get(code)
+        return _market_from_key(first[1]) if first else None
+
+    def membership(self, code: str) -> List[Tuple[str, str]]:
+        """종목이 포함된 (섹션, 시장 키) 목록"""
+        return self._membership.get(code, [])
+
+    def in_section(self, code: str, section: str) -> bool:
+        return any(s == section for s, _ in self._membership.get(code, ()))
+
+    def entries(self, sections: Optional[Tuple[str, ...]] = None) -> Iterator[Tuple[str, str, Any]]:
+        """모든 등장 (섹션, 시장 키, 원본) — 중복 포함, 원본 dict를 직접 수정할 때 사용"""
+        for entry in self._entries:
+            if sections is None or entry[0] in sections:
+                yield entry
+
+    def stocks(self, sections: Optional[Tuple[str, ...]] = None) -> List[Any]:
+        """종목코드별 첫 등장 원본 목록 (sections로 범위 제한 가능)"""
+        if sections is None:
+            return [first[2] for first in self._first.values()]
+        seen = set()
+        result = []
+        for section, _, stock in self.entries(sections):
+            code = _code_of(stock)
+            if code not in seen:
+                seen.add(code)
+                result.append(stock)
+        return result
+
+
+def decode_ranking_snapshot(raw: Union[str, bytes]) -> Dict[str, Any]:
+    """latest.json 원문 → {"timestamp", "theme_analysis", 순위 섹션: {시장 키: [StockRecord]}}
+
+    msgspec이 있으면 순위 섹션을 레코드로 바로 디코딩하고 나머지 큰 섹션은 건너뛴다.
+    레코드 타입이 맞지 않는 항목(null 가격 등)이 있거나 디코딩에 실패하면 표준 파싱 + record_from_dict로 다시 읽는다.
+    """
+    if msgspec is not None:
+        try:
+            snap = _snapshot_decoder.decode(raw)
+            result: Dict[str, Any] = {"timestamp": snap.timestamp, "theme_analysis": snap.theme_analysis}
+            for section in RANKING_SECTIONS:
+                markets = getattr(snap, section)
+                for key, records in markets.items():
+                    # record_from_dict와 같은 규칙: 코드 없는 항목 제외, 빈 이름/시장 보정
+                    records[:] = [r for r in records if r.code]
+                    for r in records:
+                        r.name = r.name or r.code
+                        r.market = r.market or _market_from_key(key)
+                result[section] = markets
+            return result
+        except msgspec.DecodeError as e:
+            logger.debug("순위 스냅샷 타입 불일치, 표준 파싱으로 재시도: %s", e)
+
+    data = json_backend.loads(raw)
+    result: Dict[str, Any] = {
+        "timestamp": data.get("timestamp", ""),
+        "theme_analysis": data.get("theme_analysis"),
+        **{section: {} for section in RANKING_SECTIONS},
+    }
+    for section, key, record in iter_stock_records(data):
+        result[section].setdefault(key, []).append(record)
+    return result
@@ -1,12 +1,16 @@
 """
 Supabase 클라이언트 - API 키 및 토큰 관리
 중앙 집중식 API 키/토큰 저장소로 Supabase를 사용합니다.
+
+supabase 패키지(postgrest/httpx/pydantic 포함, 로드 약 0.4초)는 첫 클라이언트 생성 시점에 임포트합니다.
 """
 import os
 import json
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Optional, Dict, Any, Tuple
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 
 class SupabaseCredentialManager:
@@ -15,13 +19,14 @@ class SupabaseCredentialManager:
     def __init__(self):
         self.url = os.getenv("SUPABASE_URL")
         self.key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        self._client: Optional[Client] = None
+        self._client: Optional["Client"] = None
 
-    def _get_client(self) -> Optional[Client]:
+    def _get_client(self) -> Optional["Client"]:
         """Supabase 클라이언트 반환 (지연 초기화)"""
         if self._client is None:
             if not self.url or not self.key:
                 return None
+            from supabase import create_client
             self._client = create_client(self.url, self.key)
         return self._client
 
@@ -81,6 +86,46 @@ class SupabaseCredentialManager:
             'app_secret': creds['app_secret'],
         }
 
+    def get_kis_bundle(self) -> Tuple[Optional[Dict[str, str]], Optional[Dict[str, Any]]]:
+        """KIS API 키 + access_token을 한 번의 조회로 반환
+
+        Returns:
+            (get_kis_credentials 형식 또는 None, get_kis_token 형식 또는 None)
+        """
+        client = self._get_client()
+        if not client:
+            return None, None
+
+        try:
+            response = client.table('api_credentials').select(
+                'credential_type, credential_value, expires_at'
+            ).eq('service_name', 'kis').eq('is_active', True).execute()
+        except Exception as e:
+            print(f"[Supabase] 키 조회 실패: {e}")
+            return None, None
+
+        rows = {row['credential_type']: row for row in (response.data or [])}
+
+        credentials = None
+        if 'app_key' in rows and 'app_secret' in rows:
+            credentials = {
+                'app_key': rows['app_key']['credential_value'],
+                'app_secret': rows['app_secret']['credential_value'],
+            }
+        elif 'app_key' in rows or 'app_secret' in rows:
+            print("[Supabase] KIS API 키가 불완전합니다.")
+
+        token = None
+        if 'access_token' in rows:
+            try:
+                token = json.loads(rows['access_token']['credential_value'])
+                if rows['access_token'].get('expires_at'):
+                    token['expires_at'] = rows['access_token']['expires_at']
+            except json.JSONDecodeError:
+                print("[Supabase] KIS 토큰 JSON 파싱 실패")
+
+        return credentials, token
+
     def get_kis_token(self) -> Optional[Dict[str, Any]]:
         """KIS access_token 조회 (Supabase에서)
 
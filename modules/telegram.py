@@ -1,12 +1,50 @@
 """
 텔레그램 메시지 발송 모듈
 - 가독성 최적화 (이모지, 구분선, 계층 구조)
+- 연결 재사용(requests.Session), 채팅당 발송 간격 유지, 429 retry_after 대기 후 재시도
+- TelegramQueue: 백그라운드 발송 큐 (순서 유지, 인접 메시지를 4096자 이내로 묶음)
+- 메시지 줄은 telegram_template 템플릿으로 렌더링 (mode="plain"이면 태그 없는 콘솔용)
+- 4096자를 넘는 메시지는 발송 시 블록 경계에서 자동 분할
 """
+import atexit
+import queue
+import threading
+import time
 import requests
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
 from config.settings import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from modules.telegram_template import MAX_MESSAGE_CHARS, MessageBuilder, Template, split_message
+
+CHAT_INTERVAL = 1.0  # 같은 채팅 연속 발송 간격 (초) — 채팅당 초당 1건 권장
+MAX_RETRIES = 3  # 429/5xx/연결 오류 재시도 횟수
+PACK_SEPARATOR = "\n\n"  # 묶음 발송 시 메시지 구분
+LINGER_SECONDS = 0.2  # 큐 작업 스레드가 연속 put을 모으는 대기 시간
+
+CURRENCY_EMOJI = {"USD": "🇺🇸", "JPY": "🇯🇵", "EUR": "🇪🇺", "CNY": "🇨🇳"}
+
+# 메시지 줄 템플릿 (모듈 로드 시 html/plain 패턴으로 컴파일)
+T_TITLE = Template("<b>{title}</b>")
+T_MARKET = Template("{emoji} <b>{market}</b>")
+T_STOCK = Template(
+    '<b>{rank}. <a href="{url}">{name}</a></b> <code>{code}</code>\n'
+    "   {emoji} {price:,}원 ({rate}%) · {volume}주"
+)
+T_STOCK_WITH_HISTORY = Template(T_STOCK.source + "\n   └ {history}")
+T_TIMESTAMP = Template("⏰ {timestamp}")
+T_EXCHANGE_TITLE = Template("💱 <b>실시간 환율</b>")
+T_EXCHANGE_RATE = Template("{emoji} {currency}{unit}: <b>{rate:,.2f}</b>원")
+T_EXCHANGE_DATE = Template("<i>📅 기준일: {date}</i>")
+T_THEME_HEADER = Template("✨ <b>AI 테마 분석</b>\n<i>{date} 분석</i>\n\n{summary}\n")
+T_THEME_CONTINUED = Template("✨ <b>AI 테마 분석</b> (계속)\n")
+T_THEME = Template("━━━━━━━━━━━━━━━\n<b>테마 {index}. {name}</b>\n{description}\n")
+T_LEADER = Template('  🏆 <a href="{url}">{name}</a> <code>{code}</code>\n     {reason}')
+T_NEWS_LINK = Template('     • <a href="{url}">{title}</a>')
+T_NEWS = Template("     • {title}")
+T_INVESTOR_TITLE = Template("{emoji} <b>{title}</b> ({label})")
+T_INVESTOR = Template('{hot}{prefix}<a href="{url}"><b>{name}</b></a> <code>{code}</code>')
+T_DETAIL = Template("   {text}")
 
 
 class TelegramSender:
@@ -20,35 +58,81 @@ class TelegramSender:
         self.bot_token = bot_token or TELEGRAM_BOT_TOKEN
         self.chat_id = chat_id or TELEGRAM_CHAT_ID
         self.api_url = f"https://api.telegram.org/bot{self.bot_token}"
+        self.session = requests.Session()
+        self._post_lock = threading.Lock()
+        self._next_post = 0.0  # 다음 발송 가능 시각 (time.monotonic 기준)
+
+    def _post(self, method: str, payload: Dict[str, Any]) -> requests.Response:
+        """Bot API 호출 — 발송 간격(CHAT_INTERVAL, retry_after)을 지키고 연결은 재사용"""
+        with self._post_lock:
+            wait = self._next_post - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                return self.session.post(f"{self.api_url}/{method}", json=payload, timeout=30)
+            finally:
+                self._next_post = max(self._next_post, time.monotonic() + CHAT_INTERVAL)
+
+    def _defer(self, seconds: float) -> None:
+        """다음 발송을 seconds초 뒤로 미룸 (429 retry_after)"""
+        with self._post_lock:
+            self._next_post = max(self._next_post, time.monotonic() + seconds)
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float:
+        """429 응답의 parameters.retry_after (없으면 1초)"""
+        try:
+            return float(response.json().get("parameters", {}).get("retry_after", 1))
+        except (ValueError, AttributeError):
+            return 1.0
 
     def send_message(self, text: str, parse_mode: str = "HTML", disable_preview: bool = True) -> bool:
-        """텔레그램 메시지 발송"""
+        """텔레그램 메시지 발송 (4096자 초과 시 블록 경계에서 나눠 순서대로 발송)"""
         if not self.bot_token or not self.chat_id:
             print("[ERROR] 텔레그램 설정이 없습니다. .env 파일을 확인하세요.")
             return False
 
-        try:
-            response = requests.post(
-                f"{self.api_url}/sendMessage",
-                json={
-                    "chat_id": self.chat_id,
-                    "text": text,
-                    "parse_mode": parse_mode,
-                    "disable_web_page_preview": disable_preview,
-                },
-                timeout=30,
-            )
+        ok = True
+        for chunk in split_message(text):
+            ok = self._send_chunk(chunk, parse_mode, disable_preview) and ok
+        return ok
+
+    def _send_chunk(self, text: str, parse_mode: str, disable_preview: bool) -> bool:
+        """메시지 1개 발송 (429는 retry_after만큼, 5xx/연결 오류는 지수 백오프 후 재시도)"""
+        payload = {
+            "chat_id": self.chat_id,
+            "text": text,
+            "parse_mode": parse_mode,
+            "disable_web_page_preview": disable_preview,
+        }
+        for attempt in range(MAX_RETRIES + 1):
+            retry = attempt < MAX_RETRIES
+            try:
+                response = self._post("sendMessage", payload)
+            except Exception as e:
+                if retry:
+                    print(f"[WARN] 텔레그램 연결 오류, 재시도 ({attempt + 1}/{MAX_RETRIES}): {e}")
+                    self._defer(2 ** attempt)
+                    continue
+                print(f"[ERROR] 텔레그램 발송 예외: {e}")
+                return False
 
             if response.status_code == 200:
                 return True
-            else:
-                print(f"[ERROR] 텔레그램 발송 실패: {response.status_code}")
-                print(f"  응답: {response.text}")
-                return False
+            if response.status_code == 429 and retry:
+                retry_after = self._retry_after(response)
+                print(f"[WARN] 텔레그램 발송 제한 — {retry_after:g}초 후 재시도 ({attempt + 1}/{MAX_RETRIES})")
+                self._defer(retry_after)
+                continue
+            if response.status_code >= 500 and retry:
+                print(f"[WARN] 텔레그램 서버 오류 {response.status_code}, 재시도 ({attempt + 1}/{MAX_RETRIES})")
+                self._defer(2 ** attempt)
+                continue
 
-        except Exception as e:
-            print(f"[ERROR] 텔레그램 발송 예외: {e}")
+            print(f"[ERROR] 텔레그램 발송 실패: {response.status_code}")
+            print(f"  응답: {response.text}")
             return False
+        return False
 
     def _format_volume(self, volume: int) -> str:
         """거래량을 읽기 쉬운 형식으로 변환"""
@@ -59,10 +143,6 @@ class TelegramSender:
         else:
             return str(volume)
 
-    def _format_price(self, price: int) -> str:
-        """가격 포맷 (쉼표 구분)"""
-        return f"{price:,}"
-
     def _get_change_emoji(self, rate: float) -> str:
         """등락률에 따른 이모지"""
         if rate >= 10:
@@ -103,75 +183,49 @@ class TelegramSender:
         """네이버 파이낸스 모바일 URL 생성"""
         return f"https://m.stock.naver.com/domestic/stock/{code}/total"
 
-    def _format_stock_line_with_history(
-        self,
-        stock: Dict[str, Any],
-        history_data: Optional[Dict[str, Any]] = None,
-    ) -> str:
-        """개별 종목 라인 포맷 (가독성 개선)"""
-        rank = stock.get("rank", 0)
-        name = stock.get("name", "")
+    def _stock_record(self, stock: Dict[str, Any], history_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """순위 종목 dict → T_STOCK 레코드"""
         code = stock.get("code", "")
-        price = stock.get("current_price", 0)
         change_rate = stock.get("change_rate", 0)
-        volume = stock.get("volume", 0)
-
-        # 등락률 이모지 및 부호
-        emoji = self._get_change_emoji(change_rate)
-        rate_sign = "+" if change_rate > 0 else ""
-
-        # 네이버 파이낸스 링크
-        naver_url = self._get_naver_finance_url(code)
-
-        # 메인 라인 (종목명에 링크 추가)
-        lines = [
-            f"<b>{rank}. <a href=\"{naver_url}\">{name}</a></b> <code>{code}</code>",
-            f"   {emoji} {self._format_price(price)}원 ({rate_sign}{change_rate:.2f}%) · {self._format_volume(volume)}주",
-        ]
-
-        # 3일간 등락률
-        if history_data:
-            history_str = self._format_3day_changes(history_data)
-            if history_str:
-                lines.append(f"   └ {history_str}")
-
-        return "\n".join(lines)
+        return {
+            "rank": stock.get("rank", 0),
+            "name": stock.get("name", ""),
+            "code": code,
+            "url": self._get_naver_finance_url(code),
+            "emoji": self._get_change_emoji(change_rate),
+            "price": stock.get("current_price", 0),
+            "rate": f"{'+' if change_rate > 0 else ''}{change_rate:.2f}",
+            "volume": self._format_volume(stock.get("volume", 0)),
+            "history": self._format_3day_changes(history_data) if history_data else "",
+        }
 
     def _get_timestamp(self) -> str:
         """현재 시각 포맷"""
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    def format_start_barricade(self, exchange_data: Optional[Dict[str, Any]] = None) -> str:
+    def format_start_barricade(self, exchange_data: Optional[Dict[str, Any]] = None, mode: str = "html") -> str:
         """시작 바리케이트 메시지 (환율 정보 포함)"""
         lines = ["🚀🚀🚀 START 🚀🚀🚀"]
 
         # 환율 정보 추가
         if exchange_data and exchange_data.get("rates"):
             lines.append("")
-            lines.append("💱 <b>실시간 환율</b>")
+            lines.append(T_EXCHANGE_TITLE.render({}, mode))
 
             for rate in exchange_data["rates"]:
                 currency = rate["currency"]
-                value = rate["rate"]
-                is_100 = rate.get("is_100", False)
-
-                # 통화별 이모지
-                emoji = {
-                    "USD": "🇺🇸",
-                    "JPY": "🇯🇵",
-                    "EUR": "🇪🇺",
-                    "CNY": "🇨🇳",
-                }.get(currency, "💵")
-
-                # 100엔 단위 표시
-                unit = "(100)" if is_100 else ""
-                lines.append(f"{emoji} {currency}{unit}: <b>{value:,.2f}</b>원")
+                lines.append(T_EXCHANGE_RATE.render({
+                    "emoji": CURRENCY_EMOJI.get(currency, "💵"),
+                    "currency": currency,
+                    "unit": "(100)" if rate.get("is_100", False) else "",  # 100엔 단위 표시
+                    "rate": rate["rate"],
+                }, mode))
 
             # 기준일
             search_date = exchange_data.get("search_date", "")
             if search_date:
                 formatted_date = f"{search_date[:4]}-{search_date[4:6]}-{search_date[6:]}"
-                lines.append(f"<i>📅 기준일: {formatted_date}</i>")
+                lines.append(T_EXCHANGE_DATE.render({"date": formatted_date}, mode))
 
         return "\n".join(lines)
 
@@ -179,169 +233,105 @@ class TelegramSender:
         """종료 바리케이트 메시지"""
         return "🏁🏁🏁 END 🏁🏁🏁"
 
-    def format_rising_stocks(
+    def _format_ranking(
         self,
+        title: str,
         kospi: List[Dict[str, Any]],
         kosdaq: List[Dict[str, Any]],
-        history_data: Optional[Dict[str, Dict[str, Any]]] = None,
-        title: str = "📈 거래량 + 상승률 TOP10",
+        history_data: Optional[Dict[str, Dict[str, Any]]],
+        mode: str,
     ) -> str:
-        """상승 종목 메시지 포맷"""
+        """시장별 순위 메시지 (종목당 템플릿 1회 렌더링)"""
         history_data = history_data or {}
+        lines = [T_TITLE.render({"title": title}, mode), ""]
 
-        lines = [
-            f"<b>{title}</b>",
-            "",
-        ]
-
-        # 코스피
-        lines.append("🔵 <b>KOSPI</b>")
-        lines.append("")
-        if kospi:
-            for stock in kospi:
-                code = stock.get("code", "")
-                lines.append(self._format_stock_line_with_history(stock, history_data.get(code)))
-                lines.append("")
-        else:
-            lines.append("   해당 종목 없음")
+        for emoji, market, stocks in (("🔵", "KOSPI", kospi), ("🟢", "KOSDAQ", kosdaq)):
+            lines.append(T_MARKET.render({"emoji": emoji, "market": market}, mode))
             lines.append("")
-
-        # 코스닥
-        lines.append("🟢 <b>KOSDAQ</b>")
-        lines.append("")
-        if kosdaq:
-            for stock in kosdaq:
-                code = stock.get("code", "")
-                lines.append(self._format_stock_line_with_history(stock, history_data.get(code)))
+            if not stocks:
+                lines.append("   해당 종목 없음")
+                lines.append("")
+                continue
+            for stock in stocks:
+                record = self._stock_record(stock, history_data.get(stock.get("code", "")))
+                template = T_STOCK_WITH_HISTORY if record["history"] else T_STOCK
+                lines.append(template.render(record, mode))
                 lines.append("")
-        else:
-            lines.append("   해당 종목 없음")
-            lines.append("")
-
-        # 타임스탬프
-        lines.append(f"⏰ {self._get_timestamp()}")
 
+        lines.append(T_TIMESTAMP.render({"timestamp": self._get_timestamp()}, mode))
         return "\n".join(lines)
 
+    def format_rising_stocks(
+        self,
+        kospi: List[Dict[str, Any]],
+        kosdaq: List[Dict[str, Any]],
+        history_data: Optional[Dict[str, Dict[str, Any]]] = None,
+        title: str = "📈 거래량 + 상승률 TOP10",
+        mode: str = "html",
+    ) -> str:
+        """상승 종목 메시지 포맷 (mode="plain"이면 태그 없는 콘솔용)"""
+        return self._format_ranking(title, kospi, kosdaq, history_data, mode)
+
     def format_falling_stocks(
         self,
         kospi: List[Dict[str, Any]],
         kosdaq: List[Dict[str, Any]],
         history_data: Optional[Dict[str, Dict[str, Any]]] = None,
         title: str = "📉 거래량 + 하락률 TOP10",
+        mode: str = "html",
     ) -> str:
-        """하락 종목 메시지 포맷"""
-        history_data = history_data or {}
-
-        lines = [
-            f"<b>{title}</b>",
-            "",
-        ]
-
-        # 코스피
-        lines.append("🔵 <b>KOSPI</b>")
-        lines.append("")
-        if kospi:
-            for stock in kospi:
-                code = stock.get("code", "")
-                lines.append(self._format_stock_line_with_history(stock, history_data.get(code)))
-                lines.append("")
-        else:
-            lines.append("   해당 종목 없음")
-            lines.append("")
-
-        # 코스닥
-        lines.append("🟢 <b>KOSDAQ</b>")
-        lines.append("")
-        if kosdaq:
-            for stock in kosdaq:
-                code = stock.get("code", "")
-                lines.append(self._format_stock_line_with_history(stock, history_data.get(code)))
-                lines.append("")
-        else:
-            lines.append("   해당 종목 없음")
-            lines.append("")
-
-        # 타임스탬프
-        lines.append(f"⏰ {self._get_timestamp()}")
-
-        return "\n".join(lines)
-
-    def _escape_html(self, text: str) -> str:
-        """HTML 특수문자 이스케이프"""
-        return (
-            text.replace("&", "&amp;")
-            .replace("<", "&lt;")
-            .replace(">", "&gt;")
-        )
+        """하락 종목 메시지 포맷 (mode="plain"이면 태그 없는 콘솔용)"""
+        return self._format_ranking(title, kospi, kosdaq, history_data, mode)
 
-    def format_theme_analysis(self, theme_analysis: Dict[str, Any]) -> List[str]:
+    def format_theme_analysis(self, theme_analysis: Dict[str, Any], mode: str = "html") -> List[str]:
         """AI 테마 분석 메시지 포맷
 
         Returns:
-            메시지 리스트 (4096자 제한 분할)
+            메시지 리스트 (테마 단위로 4096자 이내 자동 분할, 이어지는 메시지는 "(계속)" 머리)
         """
         if not theme_analysis or not theme_analysis.get("themes"):
             return []
 
-        messages = []
-        current_lines = [
-            "✨ <b>AI 테마 분석</b>",
-            f"<i>{theme_analysis.get('analysis_date', '')} 분석</i>",
-            "",
-            theme_analysis.get("market_summary", ""),
-            "",
-        ]
+        builder = MessageBuilder(
+            T_THEME_HEADER.render({
+                "date": theme_analysis.get("analysis_date", ""),
+                "summary": theme_analysis.get("market_summary", ""),
+            }, mode),
+            continuation=T_THEME_CONTINUED.render({}, mode),
+            footer=T_TIMESTAMP.render({"timestamp": self._get_timestamp()}, mode),
+        )
 
         for i, theme in enumerate(theme_analysis.get("themes", []), 1):
-            theme_lines = [
-                f"━━━━━━━━━━━━━━━",
-                f"<b>테마 {i}. {theme.get('theme_name', '')}</b>",
-                f"{theme.get('theme_description', '')}",
-                "",
-            ]
+            block = [T_THEME.render({
+                "index": i,
+                "name": theme.get("theme_name", ""),
+                "description": theme.get("theme_description", ""),
+            }, mode)]
 
             # 대장주
             for stock in theme.get("leader_stocks", []):
-                name = stock.get("name", "")
                 code = stock.get("code", "")
-                reason = stock.get("reason", "")
-                url = self._get_naver_finance_url(code)
-
-                theme_lines.append(f"  🏆 <a href=\"{url}\">{name}</a> <code>{code}</code>")
-                theme_lines.append(f"     {reason}")
+                block.append(T_LEADER.render({
+                    "url": self._get_naver_finance_url(code),
+                    "name": stock.get("name", ""),
+                    "code": code,
+                    "reason": stock.get("reason", ""),
+                }, mode))
 
                 # 뉴스 근거
                 for evidence in stock.get("news_evidence", [])[:2]:
                     title_text = evidence.get("title", "")
                     if len(title_text) > 40:
                         title_text = title_text[:37] + "..."
-                    escaped = self._escape_html(title_text)
                     news_url = evidence.get("url", "")
-                    if news_url:
-                        theme_lines.append(f"     • <a href=\"{news_url}\">{escaped}</a>")
-                    else:
-                        theme_lines.append(f"     • {escaped}")
-
-                theme_lines.append("")
+                    template = T_NEWS_LINK if news_url else T_NEWS
+                    block.append(template.render({"url": news_url, "title": title_text}, mode))
 
-            # 메시지 길이 체크
-            test_message = "\n".join(current_lines + theme_lines)
-            if len(test_message) > 3800:
-                current_lines.append(f"⏰ {self._get_timestamp()}")
-                messages.append("\n".join(current_lines))
-                current_lines = [
-                    "✨ <b>AI 테마 분석</b> (계속)",
-                    "",
-                ]
+                block.append("")
 
-            current_lines.extend(theme_lines)
+            builder.add("\n".join(block))
 
-        if len(current_lines) > 2:
-            current_lines.append(f"⏰ {self._get_timestamp()}")
-            messages.append("\n".join(current_lines))
-
-        return messages
+        return builder.build()
 
     @staticmethod
     def _fmt_net(val) -> str:
@@ -356,12 +346,60 @@ class TelegramSender:
         name = member.get("name", "")
         return f"{name}*" if member.get("is_foreign") else name
 
+    def _investor_block(
+        self,
+        prefix: str,
+        name: str,
+        code: str,
+        detail: Optional[str],
+        data: Dict[str, Any],
+        member: Optional[Dict[str, Any]],
+        mode: str,
+    ) -> List[str]:
+        """종목 1개 수급 블록 (종목 줄, detail 줄(None이면 생략), 투자자별/프로그램/거래원 줄)"""
+        foreign = data.get("foreign_net", 0)
+        institution = data.get("institution_net", 0)
+        individual = data.get("individual_net")
+        program = data.get("program_net")
+
+        # 외국인/기관 동시 순매수면 강조
+        lines = [T_INVESTOR.render({
+            "hot": "🔥 " if foreign > 0 and institution > 0 else "",
+            "prefix": prefix,
+            "url": self._get_naver_finance_url(code),
+            "name": name,
+            "code": code,
+        }, mode)]
+        if detail is not None:
+            lines.append(T_DETAIL.render({"text": detail}, mode))
+
+        parts = [f"외국인 {self._fmt_net(foreign)}", f"기관 {self._fmt_net(institution)}"]
+        if individual is not None:
+            parts.append(f"개인 {self._fmt_net(individual)}")
+        lines.append(T_DETAIL.render({"text": " | ".join(parts)}, mode))
+
+        if program is not None:
+            lines.append(T_DETAIL.render({"text": f"프로그램 {self._fmt_net(program)}"}, mode))
+
+        # 거래원 (매수/매도 상위 1~3위)
+        if member:
+            buy_names = [self._format_member_line(b) for b in member.get("buy_top5", [])[:3]]
+            sell_names = [self._format_member_line(s) for s in member.get("sell_top5", [])[:3]]
+            if buy_names:
+                lines.append(T_DETAIL.render({"text": f"매수▶ {', '.join(buy_names)}"}, mode))
+            if sell_names:
+                lines.append(T_DETAIL.render({"text": f"매도▶ {', '.join(sell_names)}"}, mode))
+
+        lines.append("")
+        return lines
+
     def format_investor_data(
         self,
         investor_data: Dict[str, Dict[str, Any]],
         leader_info: Dict[str, Dict[str, Any]],
         is_estimated: bool = False,
         member_data: Optional[Dict[str, Dict[str, Any]]] = None,
+        mode: str = "html",
     ) -> str:
         """대장주 수급 데이터 텔레그램 메시지 포맷
 
@@ -370,52 +408,18 @@ class TelegramSender:
             leader_info: {code: {name, theme}}
             is_estimated: 추정치 여부
             member_data: {code: {buy_top5, sell_top5, ...}}
+            mode: "html" (발송) / "plain" (콘솔)
         """
         member_data = member_data or {}
         label = "추정" if is_estimated else "확정"
-        lines = [
-            f"📊 <b>대장주 수급 현황</b> ({label})",
-            "",
-        ]
+        lines = [T_INVESTOR_TITLE.render({"emoji": "📊", "title": "대장주 수급 현황", "label": label}, mode), ""]
 
         for code, data in investor_data.items():
             name = data.get("name", leader_info.get(code, {}).get("name", code))
             theme = leader_info.get(code, {}).get("theme", "")
-            foreign = data.get("foreign_net", 0)
-            institution = data.get("institution_net", 0)
-            individual = data.get("individual_net")
-            program = data.get("program_net")
-
-            url = self._get_naver_finance_url(code)
-
-            # 외국인/기관 동시 순매수면 강조
-            both_buy = foreign > 0 and institution > 0
-
-            lines.append(f"{'🔥 ' if both_buy else ''}<a href=\"{url}\"><b>{name}</b></a> <code>{code}</code>")
-            if theme:
-                lines.append(f"   {theme}")
-
-            parts = [f"외국인 {self._fmt_net(foreign)}", f"기관 {self._fmt_net(institution)}"]
-            if individual is not None:
-                parts.append(f"개인 {self._fmt_net(individual)}")
-            lines.append(f"   {' | '.join(parts)}")
-
-            if program is not None:
-                lines.append(f"   프로그램 {self._fmt_net(program)}")
-
-            # 거래원 (매수/매도 상위 1~3위)
-            member = member_data.get(code)
-            if member:
-                buy_names = [self._format_member_line(b) for b in member.get("buy_top5", [])[:3]]
-                sell_names = [self._format_member_line(s) for s in member.get("sell_top5", [])[:3]]
-                if buy_names:
-                    lines.append(f"   매수▶ {', '.join(buy_names)}")
-                if sell_names:
-                    lines.append(f"   매도▶ {', '.join(sell_names)}")
-
-            lines.append("")
+            lines.extend(self._investor_block("", name, code, theme or None, data, member_data.get(code), mode))
 
-        lines.append(f"⏰ {self._get_timestamp()}")
+        lines.append(T_TIMESTAMP.render({"timestamp": self._get_timestamp()}, mode))
         return "\n".join(lines)
 
     def format_top20_investor_data(
@@ -424,6 +428,7 @@ class TelegramSender:
         top20_stocks: List[Dict[str, Any]],
         is_estimated: bool = False,
         member_data: Optional[Dict[str, Dict[str, Any]]] = None,
+        mode: str = "html",
     ) -> str:
         """거래대금 TOP20 수급 데이터 텔레그램 메시지 포맷
 
@@ -432,13 +437,11 @@ class TelegramSender:
             top20_stocks: 거래대금 순 정렬된 종목 리스트 [{code, name, market, ...}]
             is_estimated: 추정치 여부
             member_data: {code: {buy_top5, sell_top5, ...}}
+            mode: "html" (발송) / "plain" (콘솔)
         """
         member_data = member_data or {}
         label = "추정" if is_estimated else "확정"
-        lines = [
-            f"💰 <b>거래대금 TOP20 수급 현황</b> ({label})",
-            "",
-        ]
+        lines = [T_INVESTOR_TITLE.render({"emoji": "💰", "title": "거래대금 TOP20 수급 현황", "label": label}, mode), ""]
 
         for i, stock in enumerate(top20_stocks, 1):
             code = stock.get("code", "")
@@ -447,39 +450,89 @@ class TelegramSender:
 
             data = investor_data[code]
             name = stock.get("name", data.get("name", code))
-            market = stock.get("market", "")
-            foreign = data.get("foreign_net", 0)
-            institution = data.get("institution_net", 0)
-            individual = data.get("individual_net")
-            program = data.get("program_net")
+            lines.extend(self._investor_block(
+                f"{i}. ", name, code, stock.get("market", ""), data, member_data.get(code), mode,
+            ))
 
-            url = self._get_naver_finance_url(code)
-
-            both_buy = foreign > 0 and institution > 0
-
-            lines.append(f"{'🔥 ' if both_buy else ''}{i}. <a href=\"{url}\"><b>{name}</b></a> <code>{code}</code>")
-            lines.append(f"   {market}")
-
-            parts = [f"외국인 {self._fmt_net(foreign)}", f"기관 {self._fmt_net(institution)}"]
-            if individual is not None:
-                parts.append(f"개인 {self._fmt_net(individual)}")
-            lines.append(f"   {' | '.join(parts)}")
-
-            if program is not None:
-                lines.append(f"   프로그램 {self._fmt_net(program)}")
-
-            # 거래원 (매수/매도 상위 1~3위)
-            member = member_data.get(code)
-            if member:
-                buy_names = [self._format_member_line(b) for b in member.get("buy_top5", [])[:3]]
-                sell_names = [self._format_member_line(s) for s in member.get("sell_top5", [])[:3]]
-                if buy_names:
-                    lines.append(f"   매수▶ {', '.join(buy_names)}")
-                if sell_names:
-                    lines.append(f"   매도▶ {', '.join(sell_names)}")
+        lines.append(T_TIMESTAMP.render({"timestamp": self._get_timestamp()}, mode))
+        return "\n".join(lines)
 
-            lines.append("")
 
-        lines.append(f"⏰ {self._get_timestamp()}")
-        return "\n".join(lines)
+class TelegramQueue:
+    """백그라운드 텔레그램 발송 큐
+
+    put()은 바로 반환하고 작업 스레드 하나가 넣은 순서대로 발송한다 (파이프라인은 발송을 기다리지 않음).
+    연속으로 쌓인 메시지는 합쳐도 MAX_MESSAGE_CHARS 이하이고 parse_mode가 같으면 한 메시지로 묶는다.
+    close()가 남은 메시지를 모두 보낸 뒤 메시지별 결과를 돌려준다 (종료 시 자동 호출).
+
+    Args:
+        sender: 발송기 (없으면 새로 생성)
+        max_chars: 묶음 메시지 최대 길이
+    """
+
+    def __init__(self, sender: Optional[TelegramSender] = None, max_chars: int = MAX_MESSAGE_CHARS):
+        self.sender = sender or TelegramSender()
+        self.max_chars = max_chars
+        self.results: List[Dict[str, Any]] = []
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._count = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="telegram-queue", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, text: str, label: str = "", parse_mode: str = "HTML") -> None:
+        """메시지 발송 예약 (빈 메시지는 무시)"""
+        if self._closed:
+            raise RuntimeError("닫힌 텔레그램 큐에 메시지를 넣을 수 없습니다")
+        if not text:
+            return
+        self._count += 1
+        self._queue.put({"text": text, "label": label or f"메시지 {self._count}", "parse_mode": parse_mode})
+
+    def close(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """남은 메시지 발송 완료까지 대기
 
+        Returns:
+            [{"label", "ok"}] (넣은 순서, 묶여 발송된 메시지는 같은 결과)
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            atexit.unregister(self.close)  # 상주 스케줄러에서 작업마다 생성돼도 핸들러가 쌓이지 않도록
+        self._thread.join(timeout)
+        return self.results
+
+    def _run(self) -> None:
+        item = self._queue.get()
+        while item is not None:
+            batch = [item]
+            size = len(item["text"])
+            deadline = time.monotonic() + LINGER_SECONDS
+            item = None
+            stop = False
+            while True:
+                try:
+                    nxt = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                packed = size + len(PACK_SEPARATOR) + len(nxt["text"])
+                if nxt["parse_mode"] != batch[0]["parse_mode"] or packed > self.max_chars:
+                    item = nxt
+                    break
+                batch.append(nxt)
+                size = packed
+
+            self._send(batch)
+            if stop:
+                return
+            if item is None:
+                item = self._queue.get()
+
+    def _send(self, batch: List[Dict[str, Any]]) -> None:
+        text = PACK_SEPARATOR.join(m["text"] for m in batch)
+        ok = self.sender.send_message(text, parse_mode=batch[0]["parse_mode"])
+        self.results.extend({"label": m["label"], "ok": ok} for m in batch)
@@ -0,0 +1,136 @@
+"""
+텔레그램 메시지 템플릿
+
+줄 형식을 HTML 마크업 템플릿으로 한 번 선언하면 모듈 로드 시 str.format 패턴 두 개로 컴파일된다.
+- html: parse_mode=HTML 발송용 (문자열 필드는 렌더링 시 이스케이프)
+- plain: 테스트 모드 콘솔 출력용 (태그 제거, 링크는 "[url] 텍스트")
+
+렌더링은 레코드(dict) 하나당 format_map 한 번이다. 템플릿 리터럴의 중괄호는 {{ }}로 쓴다.
+지원 마크업: <b> <i> <code> <a href="{필드}">
+
+메시지 길이:
+- split_message: 한도를 넘는 메시지를 블록(빈 줄) → 줄 → 글자 경계 순으로 나눔
+- MessageBuilder: 블록을 쌓다가 한도를 넘으면 이어지는 메시지(머리줄 교체)로 넘김
+"""
+import re
+from typing import Any, List, Mapping, Optional, Sequence
+
+MAX_MESSAGE_CHARS = 4096  # Bot API sendMessage 텍스트 한도 (태그 포함 길이로 보수적으로 계산)
+
+_MARKUP_RE = re.compile(r'<a href="\{(\w+)\}">|</?(?:b|i|code|a)>')
+
+
+def escape_html(text: str) -> str:
+    """HTML 특수문자 이스케이프 (Telegram이 지원하는 &amp; &lt; &gt; &quot;)"""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+class _Escaped:
+    """format_map용 매핑 — 조회 시 문자열 값만 이스케이프"""
+    __slots__ = ("record",)
+
+    def __init__(self, record: Mapping[str, Any]):
+        self.record = record
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.record[key]
+        return escape_html(value) if isinstance(value, str) else value
+
+
+class Template:
+    """HTML 마크업 템플릿 → html/plain format 패턴
+
+    Args:
+        source: 템플릿 문자열 (예: '<b>{rank}. <a href="{url}">{name}</a></b>')
+    """
+    __slots__ = ("source", "html", "plain")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.html = source
+        plain_parts = []
+        pos = 0
+        for match in _MARKUP_RE.finditer(source):
+            plain_parts.append(source[pos:match.start()])
+            if match.group(1):
+                plain_parts.append(f"[{{{match.group(1)}}}] ")
+            pos = match.end()
+        plain_parts.append(source[pos:])
+        self.plain = "".join(plain_parts)
+
+    def render(self, record: Mapping[str, Any], mode: str = "html") -> str:
+        if mode == "html":
+            return self.html.format_map(_Escaped(record))
+        return self.plain.format_map(record)
+
+    def __repr__(self) -> str:
+        return f"Template({self.source!r})"
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_CHARS, separators: Sequence[str] = ("\n\n", "\n")) -> List[str]:
+    """limit 초과 메시지를 블록(빈 줄) 경계에서 나눔
+
+    블록 하나가 limit보다 길면 줄 경계에서, 줄 하나가 길면 글자 수로 자른다.
+    템플릿 줄은 태그를 줄 안에서 닫으므로 줄 경계 분할은 HTML을 깨지 않는다.
+    """
+    if len(text) <= limit:
+        return [text]
+    if not separators:
+        return [text[i:i + limit] for i in range(0, len(text), limit)]
+
+    sep, rest = separators[0], separators[1:]
+    chunks: List[str] = []
+    current: Optional[str] = None
+    for piece in text.split(sep):
+        for part in split_message(piece, limit, rest):
+            if current is None:
+                current = part
+            elif len(current) + len(sep) + len(part) > limit:
+                chunks.append(current)
+                current = part
+            else:
+                current = f"{current}{sep}{part}"
+    if current is not None:
+        chunks.append(current)
+    return chunks
+
+
+class MessageBuilder:
+    """블록 단위 메시지 조립 + 한도 초과 시 자동 분할
+
+    Args:
+        header: 첫 메시지 머리 (렌더링된 문자열)
+        continuation: 이어지는 메시지 머리 (없으면 header 반복)
+        footer: 메시지마다 붙는 꼬리 (예: 타임스탬프)
+        limit: 메시지 최대 길이
+    """
+
+    def __init__(self, header: str, continuation: Optional[str] = None, footer: str = "", limit: int = MAX_MESSAGE_CHARS):
+        self.header = header
+        self.continuation = header if continuation is None else continuation
+        self.footer = footer
+        self.limit = limit
+        self.messages: List[str] = []
+        self._blocks: List[str] = [header]
+        self._size = len(header) + len(footer) + 1
+
+    def add(self, block: str) -> None:
+        """블록 추가 — 현재 메시지에 넣으면 한도를 넘을 때만 새 메시지로 넘김"""
+        if len(self._blocks) > 1 and self._size + len(block) + 1 > self.limit:
+            self._flush()
+            self._blocks = [self.continuation]
+            self._size = len(self.continuation) + len(self.footer) + 1
+        self._blocks.append(block)
+        self._size += len(block) + 1
+
+    def _flush(self) -> None:
+        body = "\n".join(self._blocks)
+        self.messages.extend(split_message(f"{body}\n{self.footer}" if self.footer else body, self.limit))
+
+    def build(self) -> List[str]:
+        """조립된 메시지 목록 (블록이 없으면 빈 목록)"""
+        if len(self._blocks) > 1:
+            self._flush()
+            self._blocks = [self.continuation]
+        return self.messages
+
@@ -12,15 +12,28 @@ import time
 import requests
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 
-from config.settings import GEMINI_API_KEY_1, GEMINI_API_KEY_2, GEMINI_API_KEY_3, GEMINI_API_KEY_4, GEMINI_API_KEY_5
+from config.settings import (
+    GEMINI_API_KEY_1, GEMINI_API_KEY_2, GEMINI_API_KEY_3, GEMINI_API_KEY_4, GEMINI_API_KEY_5,
+    FORECAST_CONTEXT_TOKEN_BUDGET,
+)
 from modules.utils import KST
-from modules.data_exporter import save_history_file, cleanup_old_history, update_history_index
+from modules.gemini_key_pool import get_key_pool
+from modules.prompt_context import PromptContextBuilder, rank_items
+from modules.forecast_stream import IncrementalForecastParser, THEME_CATEGORIES
+from modules import json_backend
+from modules.json_store import atomic_write_json
+from modules.data_exporter import (
+    save_history_file, record_history_file,
+    load_theme_index, THEME_INDEX_FILENAME,
+)
 
 logger = logging.getLogger(__name__)
 
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+GEMINI_STREAM_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:streamGenerateContent"
 ROOT_DIR = Path(__file__).parent.parent
 
 # Gemini responseSchema: Phase2 JSON 구조화용
@@ -73,19 +86,25 @@ FORECAST_SCHEMA = {
     "required": ["market_context", "us_market_summary", "today", "short_term", "long_term"],
 }
 
-# 세션 내 일일 할당 소진된 키 추적
-_exhausted_keys: set = set()
-
-
 class GeminiDailyQuotaExhausted(Exception):
     """429 RPD (일일 할당 초과) — 이 키의 일일 한도 소진, 다른 키로 전환 필요"""
     pass
 
 
+class GeminiStreamStalled(Exception):
+    """스트리밍 응답이 stall_timeout 동안 멈췄거나 전체 제한 시간을 초과"""
+    pass
+
+
 def _get_api_keys() -> List[str]:
-    """사용 가능한 API 키 목록 반환"""
+    """사용 가능한 API 키 목록 반환 (키 풀 기준 여유가 큰 순서)"""
     keys = [GEMINI_API_KEY_1, GEMINI_API_KEY_2, GEMINI_API_KEY_3, GEMINI_API_KEY_4, GEMINI_API_KEY_5]
-    return [k for k in keys if k]
+    return get_key_pool().ordered(keys)
+
+
+def _api_key_from_url(url: str) -> str:
+    """요청 URL의 ?key= 파라미터에서 API 키 추출"""
+    return parse_qs(urlparse(url).query).get("key", [""])[0]
 
 
 def _sanitize_json(text: str) -> str:
@@ -115,12 +134,12 @@ def _extract_json(text: str) -> Optional[Dict]:
     for raw in candidates:
         # 먼저 그대로 시도
         try:
-            return json.loads(raw)
+            return json_backend.loads(raw)
         except json.JSONDecodeError:
             pass
         # sanitize 후 재시도
         try:
-            return json.loads(_sanitize_json(raw))
+            return json_backend.loads(_sanitize_json(raw))
         except json.JSONDecodeError:
             continue
 
@@ -158,10 +177,15 @@ def _gemini_post(url: str, payload: dict, timeout: int = 180, max_retries: int =
     """requests.post + raise_for_status 대체 — 에러 코드별 재시도 로직
 
     같은 키로 최대 max_retries회 재시도. 실패 시 HTTPError 전파 → 파이프라인이 다음 키로 전환.
+    모든 호출은 키 풀에 기록되며, RPD 초과 시 해당 키를 소진 처리한다.
     """
     base_delay = 2
+    key_pool = get_key_pool()
+    api_key = _api_key_from_url(url)
 
     for attempt in range(max_retries):
+        if api_key:
+            key_pool.record_call(api_key)
         resp = requests.post(url, json=payload, timeout=timeout)
 
         if resp.ok:
@@ -176,6 +200,8 @@ def _gemini_post(url: str, payload: dict, timeout: int = 180, max_retries: int =
         # 429: 할당 초과
         if status == 429:
             if _is_daily_quota(resp):
+                if api_key:
+                    key_pool.mark_exhausted(api_key)
                 raise GeminiDailyQuotaExhausted("일일 API 할당 초과 (RPD)")
             # RPM 또는 불명: backoff 재시도
             if attempt < max_retries - 1:
@@ -206,6 +232,41 @@ def _gemini_post(url: str, payload: dict, timeout: int = 180, max_retries: int =
     return resp  # unreachable
 
 
+def _gemini_stream(api_key: str, payload: dict, stall_timeout: int = 30, total_timeout: int = 180) -> Iterator[str]:
+    """streamGenerateContent(SSE) 호출 — 텍스트 조각을 도착 순서대로 yield
+
+    stall_timeout초 동안 새 데이터가 없거나 total_timeout초를 넘기면 GeminiStreamStalled.
+    429 RPD는 GeminiDailyQuotaExhausted, 그 외 HTTP 오류는 HTTPError로 전파 (재시도 없음).
+    """
+    key_pool = get_key_pool()
+    key_pool.record_call(api_key)
+    url = f"{GEMINI_STREAM_URL}?alt=sse&key={api_key}"
+    started = time.monotonic()
+
+    try:
+        with requests.post(url, json=payload, timeout=(10, stall_timeout), stream=True) as resp:
+            if resp.status_code == 429 and _is_daily_quota(resp):
+                key_pool.mark_exhausted(api_key)
+                raise GeminiDailyQuotaExhausted("일일 API 할당 초과 (RPD)")
+            resp.raise_for_status()
+
+            for line in resp.iter_lines(decode_unicode=True):
+                if time.monotonic() - started > total_timeout:
+                    raise GeminiStreamStalled(f"전체 제한 시간 {total_timeout}초 초과")
+                if not line or not line.startswith("data:"):
+                    continue
+                try:
+                    chunk = json.loads(line[5:].strip())
+                except json.JSONDecodeError:
+                    continue
+                text = _extract_text_from_response(chunk)
+                if text:
+                    yield text
+    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+            requests.exceptions.ChunkedEncodingError) as e:
+        raise GeminiStreamStalled(f"{stall_timeout}초 이상 응답 없음 또는 연결 끊김") from e
+
+
 def _call_gemini(prompt: str, api_key: str) -> Tuple[Optional[Dict], List[Dict[str, str]]]:
     """Gemini API 호출 (Google Search grounding). (결과 dict, 뉴스 소스) 튜플 반환.
 
@@ -316,7 +377,8 @@ def _call_gemini_phase1(prompt: str, api_key: str, use_search: bool = True) -> T
 def _call_gemini_phase2(reasoning: str, api_key: str) -> Optional[Dict]:
     """Phase 2: 추론 결과 → JSON 구조화 (Google Search 없음)
 
-    response_schema 사용을 시도하고, 실패 시 기존 텍스트+regex fallback.
+    response_schema + 스트리밍을 먼저 시도하고, 실패 시 일반 호출 → 텍스트+regex fallback.
+    스트림이 멈추거나 미완결로 끝나면 그때까지 검증된 테마(today 1개 이상)로 부분 결과를 반환한다.
     """
     prompt = _build_phase2_prompt(reasoning)
     url = f"{GEMINI_API_URL}?key={api_key}"
@@ -332,6 +394,34 @@ def _call_gemini_phase2(reasoning: str, api_key: str) -> Optional[Dict]:
         },
     }
 
+    # 1차: 스트리밍 — 테마가 도착하는 대로 검증, 중간에 끊기면 부분 결과 사용
+    parser = IncrementalForecastParser()
+    try:
+        for chunk in _gemini_stream(api_key, payload, total_timeout=120):
+            for category, theme in parser.feed(chunk):
+                logger.debug("스트림 테마 수신: %s / %s", category, theme.get("theme_name"))
+        if parser.complete:
+            if parser.rejected:
+                logger.warning("Phase 2 스트림: 검증 실패로 제외된 테마 %d개", parser.rejected)
+            result = parser.result()
+        else:
+            # 닫는 괄호 없이 끝난 스트림 — 텍스트 파싱이 안 되면 검증된 부분 결과 사용
+            result = _extract_json(parser.text)
+            if not result and parser.result().get("today"):
+                print(f"  ⚠ Phase 2 스트림 미완결 — 수신 완료된 테마 {parser.theme_count}개로 부분 결과 사용")
+                result = parser.result()
+        if result and any(result.get(k) for k in THEME_CATEGORIES):
+            return result
+    except GeminiDailyQuotaExhausted:
+        raise  # fallback으로 빠지지 않도록 전파
+    except GeminiStreamStalled as e:
+        if parser.result().get("today"):
+            print(f"  ⚠ Phase 2 스트림 중단 ({e}) — 수신 완료된 테마 {parser.theme_count}개로 부분 결과 사용")
+            return parser.result()
+        logger.debug("Phase 2 스트림 중단, 수신된 테마 없음: %s", e)
+    except Exception as e:
+        logger.debug("Phase 2 스트리밍 실패, 일반 호출로 전환: %s", e)
+
     try:
         resp = _gemini_post(url, payload, timeout=120)
         text = _extract_text_from_response(resp.json())
@@ -571,9 +661,13 @@ def build_forecast_context(
     momentum_scores: Optional[List[Dict]] = None,
     rotation_data: Optional[List[Dict]] = None,
     global_news: Optional[List[Dict]] = None,
+    token_budget: Optional[int] = None,
 ) -> str:
     """Gemini 입력용 예측 컨텍스트 구성
 
+    전일 테마/시장 환경은 항상 포함하고, 나머지 섹션은 우선순위와 항목 관련도 순으로
+    token_budget(기본 FORECAST_CONTEXT_TOKEN_BUDGET) 안에 담는다.
+
     Args:
         latest_data: 전일 latest.json 데이터
         theme_history: 최근 7일간 테마 분석 이력 [{date, themes: [...]}]
@@ -582,126 +676,127 @@ def build_forecast_context(
         momentum_scores: 테마 모멘텀 분석 결과
         rotation_data: 섹터 로테이션 분석 결과
         global_news: Finnhub 글로벌 시장 뉴스
+        token_budget: 컨텍스트 토큰 예산 (0이면 무제한)
     """
-    lines = []
+    builder = PromptContextBuilder(
+        FORECAST_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget,
+        label="예측 컨텍스트",
+    )
 
-    # 1. 전일 테마 분석 결과
+    # 1. 전일 테마 분석 결과 (필수)
     theme_analysis = latest_data.get("theme_analysis")
     if theme_analysis:
-        lines.append("## 전일 테마 분석 결과")
-        lines.append(f"분석일: {theme_analysis.get('analysis_date', 'N/A')}")
-        lines.append(f"시장 요약: {theme_analysis.get('market_summary', 'N/A')}")
+        items = [
+            (1.0, f"분석일: {theme_analysis.get('analysis_date', 'N/A')}"),
+            (1.0, f"시장 요약: {theme_analysis.get('market_summary', 'N/A')}"),
+        ]
         for theme in theme_analysis.get("themes", []):
             leaders = ", ".join(
                 f"{s.get('name')}({s.get('code')})" for s in theme.get("leader_stocks", [])
             )
-            lines.append(f"- 테마: {theme.get('theme_name')} | 대장주: {leaders}")
-            lines.append(f"  설명: {theme.get('theme_description', '')}")
+            items.append((1.0, "\n".join([
+                f"- 테마: {theme.get('theme_name')} | 대장주: {leaders}",
+                f"  설명: {theme.get('theme_description', '')}",
+            ])))
+        builder.add_section("전일 테마 분석 결과", items, required=True)
 
-    # 2. 최근 7일 테마 흐름
+    # 2. 최근 7일 테마 흐름 (최신순, 최근일 우선)
     if theme_history:
-        lines.append("\n## 최근 7일 테마 흐름")
-        for entry in theme_history:
-            date = entry.get("date", "N/A")
-            themes = entry.get("themes", [])
-            theme_names = [t.get("theme_name", "") for t in themes]
-            lines.append(f"- {date}: {', '.join(theme_names)}")
-
-    # 3. 전일 시장 환경
-    lines.append("\n## 전일 시장 환경")
-
-    # 코스닥 지수
+        items = []
+        for idx, entry in enumerate(theme_history):
+            theme_names = [t.get("theme_name", "") for t in entry.get("themes", [])]
+            items.append((-idx, f"- {entry.get('date', 'N/A')}: {', '.join(theme_names)}"))
+        builder.add_section("최근 7일 테마 흐름", items, priority=2)
+
+    # 3. 전일 시장 환경 (필수)
+    items = []
     kosdaq = latest_data.get("kosdaq_index")
     if kosdaq:
-        lines.append(f"- 코스닥 지수: {kosdaq.get('current', 0):.2f} ({kosdaq.get('status', 'N/A')})")
-
-    # 환율
+        items.append((1.0, f"- 코스닥 지수: {kosdaq.get('current', 0):.2f} ({kosdaq.get('status', 'N/A')})"))
     exchange = latest_data.get("exchange")
     if exchange:
-        rates = exchange.get("rates", [])
-        for r in rates:
-            lines.append(f"- 환율 {r.get('currency', '')}: {r.get('deal_rate', 'N/A')}")
+        for r in exchange.get("rates", []):
+            items.append((1.0, f"- 환율 {r.get('currency', '')}: {r.get('deal_rate', 'N/A')}"))
+    builder.add_section("전일 시장 환경", items, required=True)
 
     # 미국 시장 정량 데이터
     if us_data:
-        lines.append("\n## 미국 시장 정량 데이터")
-        for name, info in us_data.items():
-            lines.append(f"- {name}: {info['price']:,.2f} ({info['change_pct']:+.2f}%)")
+        builder.add_section("미국 시장 정량 데이터", [
+            (abs(info["change_pct"]), f"- {name}: {info['price']:,.2f} ({info['change_pct']:+.2f}%)")
+            for name, info in us_data.items()
+        ], priority=1)
 
     # 시장 심리 지표
     if sentiment_data:
-        lines.append("\n## 시장 심리 지표")
+        items = []
         if sentiment_data.get("score") is not None:
-            lines.append(f"- VIX 공포지수: {sentiment_data['score']} ({sentiment_data['rating']})")
-            lines.append("  (VIX: 0~15 안정, 15~25 보통, 25~35 불안, 35+ 공포)")
+            items.append((2.0, "\n".join([
+                f"- VIX 공포지수: {sentiment_data['score']} ({sentiment_data['rating']})",
+                "  (VIX: 0~15 안정, 15~25 보통, 25~35 불안, 35+ 공포)",
+            ])))
         fg = sentiment_data.get("fear_greed")
         if fg:
-            lines.append(f"- CNN Fear & Greed Index: {fg['score']} ({fg['rating_kr']})")
+            fg_lines = [f"- CNN Fear & Greed Index: {fg['score']} ({fg['rating_kr']})"]
             if fg.get("previous_close") is not None:
-                lines.append(f"  (전일: {fg['previous_close']}, 1주전: {fg.get('previous_1_week', 'N/A')})")
-            lines.append("  (0~25 극도의 공포, 25~45 공포, 45~55 중립, 55~75 탐욕, 75~100 극도의 탐욕)")
+                fg_lines.append(f"  (전일: {fg['previous_close']}, 1주전: {fg.get('previous_1_week', 'N/A')})")
+            fg_lines.append("  (0~25 극도의 공포, 25~45 공포, 45~55 중립, 55~75 탐욕, 75~100 극도의 탐욕)")
+            items.append((1.0, "\n".join(fg_lines)))
+        builder.add_section("시장 심리 지표", items, priority=2)
 
     # 테마 모멘텀 분석
     if momentum_scores:
-        lines.append("\n## 테마 모멘텀 분석")
-        for m in momentum_scores[:10]:
-            lines.append(
-                f"- {m['theme_name']}: 모멘텀 {m['score']:.3f} "
-                f"(등장 {m['frequency']}일, 연속 {m['streak']}일)"
-            )
+        builder.add_section("테마 모멘텀 분석", [
+            (m["score"], f"- {m['theme_name']}: 모멘텀 {m['score']:.3f} (등장 {m['frequency']}일, 연속 {m['streak']}일)")
+            for m in momentum_scores[:10]
+        ], priority=2)
 
     # 섹터 로테이션 분석
     if rotation_data:
-        lines.append("\n## 섹터 로테이션 분석")
-        for r in rotation_data:
-            lines.append(
-                f"- {r['theme_name']}: {r['phase']} ({r['signal']}) "
-                f"활동 {r['days_active']}일, 거래대금 {r['volume_trend']}"
-            )
+        builder.add_section("섹터 로테이션 분석", [
+            (-idx, f"- {r['theme_name']}: {r['phase']} ({r['signal']}) 활동 {r['days_active']}일, 거래대금 {r['volume_trend']}")
+            for idx, r in enumerate(rotation_data)
+        ], priority=3)
 
-    # 글로벌 시장 뉴스 (Finnhub)
+    # 글로벌 시장 뉴스 (Finnhub, 최신순)
     if global_news:
-        lines.append("\n## 글로벌 시장 뉴스 (최신)")
-        for n in global_news:
-            lines.append(f"- [{n.get('source', '')}] {n.get('headline', '')} ({n.get('time', '')})")
-            summary = n.get("summary", "")
-            if summary:
-                lines.append(f"  {summary}")
+        items = []
+        for idx, n in enumerate(global_news):
+            news_lines = [f"- [{n.get('source', '')}] {n.get('headline', '')} ({n.get('time', '')})"]
+            if n.get("summary"):
+                news_lines.append(f"  {n['summary']}")
+            items.append((-idx, "\n".join(news_lines)))
+        builder.add_section("글로벌 시장 뉴스 (최신)", items, priority=4)
 
     # 4. 전일 거래대금 TOP10 + 수급
     tv_kospi = latest_data.get("trading_value", {}).get("kospi", [])[:10]
     tv_kosdaq = latest_data.get("trading_value", {}).get("kosdaq", [])[:10]
     investor_data = latest_data.get("investor_data", {})
 
-    if tv_kospi or tv_kosdaq:
-        lines.append("\n## 전일 거래대금 TOP10 + 수급")
-        for s in tv_kospi + tv_kosdaq:
-            code = s.get("code", "")
-            tv = s.get("trading_value", 0)
-            tv_str = f"{tv / 100_000_000:,.0f}억원" if tv else "N/A"
-            market = "코스피" if s in tv_kospi else "코스닥"
-            inv = investor_data.get(code, {})
-            foreign = inv.get("foreign_net")
-            institution = inv.get("institution_net")
-            inv_parts = []
-            if foreign and foreign != 0:
-                sign = "+" if foreign > 0 else ""
-                inv_parts.append(f"외국인:{sign}{foreign:,}주")
-            if institution and institution != 0:
-                sign = "+" if institution > 0 else ""
-                inv_parts.append(f"기관:{sign}{institution:,}주")
-            inv_str = f" | {' '.join(inv_parts)}" if inv_parts else ""
-            lines.append(
-                f"- {s.get('name')}({code}) {market} 등락:{s.get('change_rate', 0):+.2f}% "
-                f"거래대금:{tv_str}{inv_str}"
-            )
+    def _fmt_tv_with_investor(s: Dict, market: str) -> str:
+        code = s.get("code", "")
+        tv = s.get("trading_value", 0)
+        tv_str = f"{tv / 100_000_000:,.0f}억원" if tv else "N/A"
+        inv = investor_data.get(code, {})
+        inv_parts = []
+        for label, value in (("외국인", inv.get("foreign_net")), ("기관", inv.get("institution_net"))):
+            if value and value != 0:
+                sign = "+" if value > 0 else ""
+                inv_parts.append(f"{label}:{sign}{value:,}주")
+        inv_str = f" | {' '.join(inv_parts)}" if inv_parts else ""
+        return f"- {s.get('name')}({code}) {market} 등락:{s.get('change_rate', 0):+.2f}% 거래대금:{tv_str}{inv_str}"
+
+    builder.add_section(
+        "전일 거래대금 TOP10 + 수급",
+        rank_items([("코스피", tv_kospi), ("코스닥", tv_kosdaq)], _fmt_tv_with_investor),
+        priority=1,
+    )
 
-    # 5. 전일 테마별 대장주 상세 (대장주 선정 근거용)
+    # 5. 전일 테마별 대장주 상세 (대장주 선정 근거용, 테마 순서 우선)
     if theme_analysis:
         criteria_data = latest_data.get("criteria_data", {})
-        lines.append("\n## 전일 테마 대장주 상세 데이터")
-        for theme in theme_analysis.get("themes", []):
-            lines.append(f"\n### {theme.get('theme_name')}")
+        items = []
+        for idx, theme in enumerate(theme_analysis.get("themes", [])):
+            block = [f"\n### {theme.get('theme_name')}"]
             for stock in theme.get("leader_stocks", []):
                 code = stock.get("code", "")
                 inv = investor_data.get(code, {})
@@ -720,9 +815,13 @@ def build_forecast_context(
                 if isinstance(ma, dict) and ma.get("met"):
                     parts.append("정배열")
 
-                lines.append(f"- {' | '.join(parts)}")
+                block.append(f"- {' | '.join(parts)}")
+            items.append((-idx, "\n".join(block)))
+        builder.add_section("전일 테마 대장주 상세 데이터", items, priority=3)
 
-    return "\n".join(lines)
+    context = builder.build()
+    builder.print_report()  # 예산 초과로 제외된 섹션/항목
+    return context
 
 
 def _build_forecast_prompt(context: str) -> str:
@@ -854,43 +953,35 @@ def _build_forecast_prompt(context: str) -> str:
 def load_theme_history(history_dir: Path, days: int = 7) -> List[Dict[str, Any]]:
     """최근 N일간 테마 히스토리 로드
 
+    스냅샷 전체 대신 data_exporter가 관리하는 테마 인덱스(theme-index.jsonl)만 읽는다.
+    인덱스는 30일 히스토리 정리 대상이 아니므로 days를 수개월로 늘려도 비용이 거의 없다.
+
     Args:
-        history_dir: history 디렉토리 경로
+        history_dir: history 디렉토리 경로 (인덱스는 상위 디렉토리에 위치)
         days: 조회할 일수 (기본 7일)
 
     Returns:
         [{date: "YYYY-MM-DD", themes: [...]}] 리스트 (최신순)
     """
-    if not history_dir.exists():
+    output_dir = history_dir.parent
+    if not history_dir.exists() and not (output_dir / THEME_INDEX_FILENAME).exists():
         return []
 
-    files = sorted(history_dir.glob("*.json"), reverse=True)
     result = []
     seen_dates = set()
 
-    for f in files:
+    # 같은 날짜는 가장 늦은 스냅샷 기준
+    for entry in reversed(load_theme_index(output_dir)):
         if len(seen_dates) >= days:
             break
-        try:
-            date_str = f.stem[:10]  # YYYY-MM-DD
-            if date_str in seen_dates:
-                continue
-
-            with open(f, "r", encoding="utf-8") as fp:
-                data = json.load(fp)
-
-            theme_analysis = data.get("theme_analysis")
-            if not theme_analysis or not theme_analysis.get("themes"):
-                continue
-
-            result.append({
-                "date": date_str,
-                "themes": theme_analysis["themes"],
-            })
-            seen_dates.add(date_str)
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"  ⚠ 히스토리 파일 손상: {f.name} ({e})")
+        date_str = entry.get("date", "")
+        if not date_str or date_str in seen_dates or not entry.get("themes"):
             continue
+        result.append({
+            "date": date_str,
+            "themes": entry["themes"],
+        })
+        seen_dates.add(date_str)
 
     return result
 
@@ -1003,7 +1094,7 @@ def _run_intraday_lightweight(context: str, api_keys: List[str]) -> Optional[Dic
     phase1_prompt = _build_phase1_prompt(context)
 
     for key_idx, api_key in enumerate(api_keys):
-        if api_key in _exhausted_keys:
+        if get_key_pool().is_exhausted(api_key):
             logger.debug("키 %d 일일 할당 소진, 건너뜀", key_idx + 1)
             continue
         try:
@@ -1021,7 +1112,6 @@ def _run_intraday_lightweight(context: str, api_keys: List[str]) -> Optional[Dic
 
             logger.debug("Phase 2 실패, 다음 키로 전환")
         except GeminiDailyQuotaExhausted:
-            _exhausted_keys.add(api_key)
             logger.debug("일일 할당 초과 (키 %d), 다음 키로 전환", key_idx + 1)
             continue
         except requests.exceptions.HTTPError as e:
@@ -1052,7 +1142,7 @@ def _run_two_phase_voting(context: str, api_keys: List[str]) -> Optional[Dict]:
     phase1_prompt = _build_phase1_prompt(context)
 
     for key_idx, api_key in enumerate(api_keys):
-        if api_key in _exhausted_keys:
+        if get_key_pool().is_exhausted(api_key):
             logger.debug("키 %d 일일 할당 소진, 건너뜀", key_idx + 1)
             continue
         try:
@@ -1072,7 +1162,6 @@ def _run_two_phase_voting(context: str, api_keys: List[str]) -> Optional[Dict]:
 
             logger.debug("Phase 2 실패, 다음 키로 전환")
         except GeminiDailyQuotaExhausted:
-            _exhausted_keys.add(api_key)
             logger.debug("일일 할당 초과 (키 %d), 다음 키로 전환", key_idx + 1)
             continue
         except requests.exceptions.HTTPError as e:
@@ -1103,7 +1192,7 @@ def _run_single_call_fallback(context: str, api_keys: List[str]) -> Optional[Dic
     prompt = _build_forecast_prompt(context)
 
     for key_idx, api_key in enumerate(api_keys):
-        if api_key in _exhausted_keys:
+        if get_key_pool().is_exhausted(api_key):
             logger.debug("키 %d 일일 할당 소진, 건너뜀", key_idx + 1)
             continue
         try:
@@ -1114,7 +1203,6 @@ def _run_single_call_fallback(context: str, api_keys: List[str]) -> Optional[Dic
                 return result
             logger.warning("Gemini 응답이 비어있습니다")
         except GeminiDailyQuotaExhausted:
-            _exhausted_keys.add(api_key)
             logger.debug("일일 할당 초과 (키 %d), 다음 키로 전환", key_idx + 1)
             continue
         except requests.exceptions.HTTPError as e:
@@ -1141,12 +1229,14 @@ def _run_single_call_fallback(context: str, api_keys: List[str]) -> Optional[Dic
 
 
 def save_forecast_to_supabase(forecast: Dict[str, Any], mode: str = "full") -> bool:
-    """예측 결과를 Supabase theme_predictions 테이블에 저장 + 스냅샷 보존"""
+    """예측 결과를 Supabase theme_predictions 테이블에 저장 + 스냅샷 보존
+
+    요청: 스냅샷 수 조회 → 스냅샷 INSERT → (당일 첫 실행이면) 기존 행 조회 1회 + upsert 1회 + stale delete 1회
+    """
     try:
-        from modules.supabase_client import get_supabase_manager
-        manager = get_supabase_manager()
-        client = manager._get_client()
-        if not client:
+        from modules.prediction_store import get_prediction_store
+        store = get_prediction_store()
+        if not store:
             print("  ⚠ Supabase 연결 불가, 저장 건너뜀")
             return False
 
@@ -1163,85 +1253,34 @@ def save_forecast_to_supabase(forecast: Dict[str, Any], mode: str = "full") -> b
                     "catalyst": theme.get("catalyst", ""),
                     "confidence": theme.get("confidence", ""),
                     "target_period": theme.get("target_period"),
-                    "leader_stocks": json.dumps(
-                        theme.get("leader_stocks", []), ensure_ascii=False
-                    ),
+                    "leader_stocks": json_backend.dumps(theme.get("leader_stocks", [])),
                     "status": "active",
                 })
 
+        # 당일 첫 실행 여부 확인 (이번 스냅샷 저장 전 0건이면 첫 실행)
+        is_first_run = True
+        try:
+            is_first_run = store.count_snapshots(prediction_date) == 0
+        except Exception:
+            pass  # 조회 실패 시 첫 실행으로 간주
+
         # 스냅샷 INSERT (항상)
         try:
-            snapshot_row = {
+            store.insert_snapshot({
                 "prediction_date": prediction_date,
                 "generated_at": forecast.get("generated_at", datetime.now(KST).isoformat()),
                 "mode": mode,
-                "forecast_data": json.dumps(forecast, ensure_ascii=False),
-            }
-            client.table("forecast_snapshots").insert(snapshot_row).execute()
+                "forecast_data": json_backend.dumps(forecast),
+            })
             print(f"  ✓ 스냅샷 저장 완료 (mode={mode})")
         except Exception as e:
             print(f"  ⚠ 스냅샷 저장 실패: {e}")
 
-        # 당일 첫 실행 여부 확인
-        is_first_run = True
-        try:
-            snap_count = client.table("forecast_snapshots").select(
-                "id", count="exact"
-            ).eq("prediction_date", prediction_date).execute()
-            is_first_run = (snap_count.count or 0) <= 1
-        except Exception:
-            pass  # 조회 실패 시 첫 실행으로 간주
-
         if rows and is_first_run:
-            # 이미 평가된(hit/missed) 행은 덮어쓰지 않도록 보호
-            evaluated = set()
-            try:
-                existing = client.table("theme_predictions").select(
-                    "prediction_date, category, theme_name"
-                ).eq(
-                    "prediction_date", prediction_date
-                ).in_(
-                    "status", ["hit", "missed"]
-                ).execute()
-                for r in (existing.data or []):
-                    evaluated.add((r["prediction_date"], r["category"], r["theme_name"]))
-            except Exception:
-                pass  # 조회 실패 시 전체 UPSERT 진행
-
-            safe_rows = [
-                r for r in rows
-                if (r["prediction_date"], r["category"], r["theme_name"]) not in evaluated
-            ]
-            skipped = len(rows) - len(safe_rows)
-
-            if safe_rows:
-                client.table("theme_predictions").upsert(
-                    safe_rows,
-                    on_conflict="prediction_date,category,theme_name",
-                ).execute()
-
-            # 현재 forecast에 없는 stale 행 삭제 (평가완료 포함)
-            current_themes = {(r["category"], r["theme_name"]) for r in rows}
-            stale_deleted = 0
-            try:
-                all_rows = client.table("theme_predictions").select(
-                    "id, category, theme_name, status"
-                ).eq(
-                    "prediction_date", prediction_date
-                ).execute()
-                stale_ids = [
-                    r["id"] for r in (all_rows.data or [])
-                    if (r["category"], r["theme_name"]) not in current_themes
-                ]
-                if stale_ids:
-                    client.table("theme_predictions").delete().in_(
-                        "id", stale_ids
-                    ).execute()
-                    stale_deleted = len(stale_ids)
-            except Exception as e:
-                print(f"  ⚠ stale 행 삭제 실패: {e}")
-
-            print(f"  ✓ Supabase 저장 완료 ({len(safe_rows)}건 저장, {skipped}건 평가완료 보호, {stale_deleted}건 stale 삭제)")
+            # 이미 평가된(hit/missed) 행은 덮어쓰지 않고, 현재 forecast에 없는 stale 행은 삭제
+            result = store.replace_predictions(prediction_date, rows)
+            print(f"  ✓ Supabase 저장 완료 ({result['saved']}건 저장, {result['skipped']}건 평가완료 보호, "
+                  f"{result['stale_deleted']}건 stale 삭제, 요청 {store.round_trips}회)")
             return True
         elif rows and not is_first_run:
             print(f"  ✓ 스냅샷만 저장 (theme_predictions 미변경)")
@@ -1263,16 +1302,14 @@ def export_forecast_json(forecast: Dict[str, Any], output_dir: str = "frontend/p
     output_path.mkdir(parents=True, exist_ok=True)
 
     file_path = output_path / "theme-forecast.json"
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(forecast, f, ensure_ascii=False, indent=2)
+    atomic_write_json(file_path, forecast)
 
     print(f"  ✓ 예측 결과 저장: {file_path}")
 
     # 히스토리 저장
     history_dir = output_path / "forecast-history"
-    save_history_file(forecast, history_dir)
-    cleanup_old_history(history_dir, days=30)
-    update_history_index(output_path, "forecast-history", "forecast-history-index.json")
+    filename = save_history_file(forecast, history_dir)
+    record_history_file(output_path, filename, "forecast-history", "forecast-history-index.json")
     print(f"  ✓ 예측 히스토리 저장: {history_dir}")
 
     return str(file_path)
@@ -0,0 +1,146 @@
+"""
+KRX 거래일 달력
+
+config/krx_holidays.json의 휴장일로 여러 해의 거래일(세션) 배열과 일자별 누적 거래일 수를
+미리 계산해 두고, 영업일 계산을 반복 없이 처리한다.
+- is_session / sessions_between / add_sessions: O(1) (일자 → 배열 위치는 날짜 차이로 계산)
+- session_on_or_before / previous_session / next_session: O(1)
+
+휴장일 파일에 없는 연도는 주말만 휴장으로 계산한다 (경고 로그 1회).
+새 연도 휴장일은 코드 수정 없이 JSON 파일에 "YYYY" 키로 추가한다.
+"""
+import json
+import logging
+from array import array
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+HOLIDAYS_PATH = Path(__file__).parent.parent / "config" / "krx_holidays.json"
+
+# 달력 범위: 휴장일 파일 연도 ∪ [MIN_YEAR, 올해 + FUTURE_YEARS]
+MIN_YEAR = 2020
+FUTURE_YEARS = 2
+
+DateLike = Union[date, datetime, str]
+
+
+def to_date(value: DateLike) -> date:
+    """date/datetime/"YYYY-MM-DD"/"YYYYMMDD" → date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = value.strip()
+    if len(text) == 8 and text.isdigit():
+        return datetime.strptime(text, "%Y%m%d").date()
+    return datetime.strptime(text[:10], "%Y-%m-%d").date()
+
+
+class TradingCalendar:
+    """거래일 배열 + 누적 거래일 수 기반 영업일 계산
+
+    Args:
+        holidays: 휴장일 목록 (주말 제외분만 있으면 됨)
+        start_year, end_year: 달력 범위 (양 끝 포함)
+    """
+
+    def __init__(self, holidays: Iterable[DateLike], start_year: int, end_year: int):
+        self.start = date(start_year, 1, 1)
+        self.end = date(end_year, 12, 31)
+        self.holidays = frozenset(to_date(h) for h in holidays)
+
+        total_days = (self.end - self.start).days + 1
+        # _cum[i]: start ~ (start + i일) 사이 거래일 수 (해당 일 포함)
+        self._cum = array("l", [0]) * total_days
+        self.sessions: List[date] = []
+        count = 0
+        d = self.start
+        for i in range(total_days):
+            if d.weekday() < 5 and d not in self.holidays:
+                count += 1
+                self.sessions.append(d)
+            self._cum[i] = count
+            d += timedelta(days=1)
+
+    def _offset(self, value: DateLike) -> int:
+        d = to_date(value)
+        if not (self.start <= d <= self.end):
+            raise ValueError(f"거래일 달력 범위 밖: {d} ({self.start} ~ {self.end})")
+        return (d - self.start).days
+
+    def _count(self, value: DateLike) -> int:
+        """해당 일까지(포함) 누적 거래일 수"""
+        return self._cum[self._offset(value)]
+
+    def is_session(self, value: DateLike) -> bool:
+        i = self._offset(value)
+        return self._cum[i] - (self._cum[i - 1] if i > 0 else 0) == 1
+
+    def sessions_between(self, start: DateLike, end: DateLike) -> int:
+        """start 다음 날 ~ end(포함) 사이 거래일 수 (start > end이면 음수)"""
+        return self._count(end) - self._count(start)
+
+    def session_on_or_before(self, value: DateLike) -> Optional[date]:
+        """해당 일 또는 그 이전 가장 가까운 거래일"""
+        k = self._count(value)
+        return self.sessions[k - 1] if k > 0 else None
+
+    def previous_session(self, value: DateLike) -> Optional[date]:
+        """해당 일 이전(미포함) 가장 가까운 거래일"""
+        return self.session_on_or_before(to_date(value) - timedelta(days=1))
+
+    def next_session(self, value: DateLike) -> Optional[date]:
+        """해당 일 이후(미포함) 가장 가까운 거래일"""
+        k = self._count(value)
+        return self.sessions[k] if k < len(self.sessions) else None
+
+    def add_sessions(self, value: DateLike, n: int) -> date:
+        """n거래일 후(n < 0이면 전) 거래일
+
+        n=0이면 해당 일이 거래일일 때 그대로, 아니면 다음 거래일.
+        기준일이 휴장일이면 n=1은 다음 거래일, n=-1은 직전 거래일이다.
+        """
+        k = self._count(value)
+        if n > 0 or (n == 0 and not self.is_session(value)):
+            idx = k - 1 + max(n, 1)
+        else:
+            idx = k - 1 + n if self.is_session(value) else k + n
+        if not (0 <= idx < len(self.sessions)):
+            raise ValueError(f"거래일 달력 범위 밖: {to_date(value)} {n:+d}거래일")
+        return self.sessions[idx]
+
+
+def load_holidays(path: Path = HOLIDAYS_PATH) -> Dict[int, List[str]]:
+    """휴장일 파일 → {연도: [YYYY-MM-DD, ...]} (파일이 없거나 깨져 있으면 빈 dict)"""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning("KRX 휴장일 파일 로드 실패, 주말만 휴장으로 계산: %s (%s)", path, e)
+        return {}
+    return {int(year): sorted(days) for year, days in data.get("holidays", {}).items()}
+
+
+@lru_cache(maxsize=1)
+def get_calendar() -> TradingCalendar:
+    """프로세스 공용 거래일 달력 (최초 호출 시 1회 생성)"""
+    holidays = load_holidays()
+    this_year = datetime.now().year
+    start_year = min([MIN_YEAR, *holidays])
+    end_year = max([this_year + FUTURE_YEARS, *holidays])
+    missing = [y for y in range(max(start_year, this_year - 1), this_year + 1) if y not in holidays]
+    if missing:
+        logger.warning("KRX 휴장일 미등록 연도 %s — 주말만 휴장으로 계산 (%s)", missing, HOLIDAYS_PATH)
+    return TradingCalendar(
+        (day for days in holidays.values() for day in days),
+        start_year,
+        end_year,
+    )
+
+
+def is_session(value: DateLike) -> bool:
+    """KRX 거래일 여부"""
+    return get_calendar().is_session(value)
@@ -0,0 +1,71 @@
+"""
+상주 스케줄러 — 메인 실행 스크립트
+
+장전 예측, 테마 분석, 장중 수급 라운드, 모의투자 수집, 장마감 후 백테스트를
+워크플로우와 같은 시각(KST, 거래일)에 한 프로세스에서 실행합니다.
+KIS 토큰·거래일 달력·Supabase 연결을 작업 간에 재사용하고, 한 작업이 실패해도 다음 작업은 계속됩니다.
+
+Usage:
+    python scheduler_main.py                               # 상주 실행
+    python scheduler_main.py --plan                        # 다음 실행 일정만 출력
+    python scheduler_main.py --only investor,paper_trading # 일부 작업만
+    python scheduler_main.py --once investor               # 작업 1개 즉시 실행 후 종료
+    python scheduler_main.py --after "sh sync.sh"          # 작업 성공 후 셸 명령 실행 (git 커밋/푸시 등)
+"""
+import argparse
+import sys
+
+from config.settings import *  # noqa: F401,F403 — 환경변수 로드
+from modules.scheduler import default_jobs, next_slot, now_kst, run_forever, run_hook, run_job, warm_up
+
+PLAN_SLOTS = 12
+
+
+def print_plan(jobs):
+    after = now_kst()
+    print(f"[스케줄러] 다음 실행 일정 (기준: {after:%Y-%m-%d %H:%M})")
+    for _ in range(PLAN_SLOTS):
+        slot, due = next_slot(jobs, after)
+        print(f"  {slot:%Y-%m-%d %H:%M}  {', '.join(job['name'] for job in due)}")
+        after = slot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상주 스케줄러")
+    parser.add_argument("--plan", action="store_true", help="다음 실행 일정만 출력")
+    parser.add_argument("--only", type=str, help="실행할 작업 이름 (쉼표 구분)")
+    parser.add_argument("--once", type=str, help="작업 1개 즉시 실행 후 종료")
+    parser.add_argument("--after", type=str, help="작업 성공 후 실행할 셸 명령")
+    args = parser.parse_args()
+
+    jobs = default_jobs()
+    names = [job["name"] for job in jobs]
+    selected = args.once or args.only
+    if selected:
+        wanted = [n.strip() for n in selected.split(",") if n.strip()]
+        unknown = [n for n in wanted if n not in names]
+        if unknown:
+            print(f"알 수 없는 작업: {', '.join(unknown)} (가능: {', '.join(names)})")
+            sys.exit(1)
+        jobs = [job for job in jobs if job["name"] in wanted]
+
+    if args.plan:
+        print_plan(jobs)
+        return
+
+    if args.once:
+        results = [run_job(job) for job in jobs]
+        if args.after and all(r["ok"] for r in results):
+            run_hook(args.after)
+        sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+    print(f"[스케줄러] 시작 — 작업 {len(jobs)}개: {', '.join(job['name'] for job in jobs)}")
+    warm_up()
+    try:
+        run_forever(jobs, hook=args.after)
+    except KeyboardInterrupt:
+        print("\n[스케줄러] 종료")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""데이터 포맷/경로 성능 측정 유틸리티
+
+Usage:
+    python scripts/benchmark.py snapshot-format   # 히스토리 스냅샷: 기존 indent=2 vs compact-v2 (인코딩 시간, 파일 크기, 전송 크기)
+    python scripts/benchmark.py json-backend      # JSON 백엔드별 (json / orjson / msgspec) 로드·저장 시간
+    python scripts/benchmark.py import-time       # 진입점별 모듈 임포트 시간 (python -X importtime, 콜드 스타트)
+    python scripts/benchmark.py import-time --budget-ms 300   # 예산 초과 진입점이 있으면 종료 코드 1
+"""
+import argparse
+import gzip
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+DATA_DIR = ROOT_DIR / "frontend" / "public" / "data"
+
+# cron/워크플로우가 새 프로세스로 실행하는 진입점
+ENTRY_POINTS = ("main", "forecast_main", "collect_investor_data", "collect_paper_trading", "backtest_main")
+
+
+def _timeit(fn, repeat: int) -> float:
+    """fn을 repeat회 실행한 최소 소요 시간 (ms)"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def _fmt_kb(n: int) -> str:
+    return f"{n / 1024:,.0f}KB"
+
+
+def bench_snapshot_format(args) -> None:
+    from modules.snapshot_format import dumps_compact, encode_snapshot, expand_snapshot, load_snapshot
+
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    files = sorted((DATA_DIR / "history").glob("*.json"))[-args.limit:]
+    if not files:
+        print("히스토리 파일이 없습니다")
+        return
+
+    totals = {key: 0.0 for key in (
+        "old_ms", "new_ms", "decode_ms", "old_size", "new_size", "old_gz", "new_gz", "old_br", "new_br",
+    )}
+    for path in files:
+        data = load_snapshot(path)
+
+        old_bytes = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        new_bytes = dumps_compact(encode_snapshot(data)).encode("utf-8")
+        totals["old_ms"] += _timeit(lambda: json.dumps(data, ensure_ascii=False, indent=2), args.repeat)
+        totals["new_ms"] += _timeit(lambda: dumps_compact(encode_snapshot(data)), args.repeat)
+        totals["decode_ms"] += _timeit(lambda: expand_snapshot(json.loads(new_bytes)), args.repeat)
+        totals["old_size"] += len(old_bytes)
+        totals["new_size"] += len(new_bytes)
+        # 프론트엔드 전송 크기: 정적 호스팅의 gzip 응답 기준 (brotli 설치 시 br도 함께)
+        totals["old_gz"] += len(gzip.compress(old_bytes, compresslevel=6))
+        totals["new_gz"] += len(gzip.compress(new_bytes, compresslevel=6))
+        if brotli:
+            totals["old_br"] += len(brotli.compress(old_bytes, quality=11))
+            totals["new_br"] += len(brotli.compress(new_bytes, quality=11))
+
+    n = len(files)
+    print(f"\n히스토리 스냅샷 {n}개 (파일당 평균, 인코딩 {args.repeat}회 중 최소)")
+    print(f"{'':<16}{'indent=2':>12}{'compact-v2':>12}{'비율':>8}")
+
+    def row(label, old, new, fmt):
+        ratio = f"{new / old:.0%}" if old else "-"
+        print(f"{label:<16}{fmt(old / n):>12}{fmt(new / n):>12}{ratio:>8}")
+
+    row("인코딩 시간", totals["old_ms"], totals["new_ms"], lambda v: f"{v:.1f}ms")
+    row("파일 크기", totals["old_size"], totals["new_size"], lambda v: _fmt_kb(int(v)))
+    row("전송 크기(gzip)", totals["old_gz"], totals["new_gz"], lambda v: _fmt_kb(int(v)))
+    if brotli:
+        row("전송 크기(br)", totals["old_br"], totals["new_br"], lambda v: _fmt_kb(int(v)))
+    print(f"{'복원 시간':<16}{'-':>12}{totals['decode_ms'] / n:>10.1f}ms")
+    print(f"\n전체 디스크: {_fmt_kb(int(totals['old_size']))} → {_fmt_kb(int(totals['new_size']))}")
+
+
+def bench_json_backend(args) -> None:
+    import modules.json_backend as json_backend
+
+    # 실제 데이터 파일: 히스토리 최근 N개 + 그 외 최상위 JSON (인덱스, 예측, 모의투자 인덱스)
+    files = sorted((DATA_DIR / "history").glob("*.json"))[-args.limit:]
+    files += sorted(p for p in DATA_DIR.glob("*.json"))
+    files += sorted((DATA_DIR / "forecast-history").glob("*.json"))[-5:]
+    if not files:
+        print("데이터 파일이 없습니다")
+        return
+    raws = [p.read_bytes() for p in files]
+    docs = [json.loads(raw) for raw in raws]
+    total_kb = sum(len(raw) for raw in raws) / 1024
+
+    results = {}
+    for backend in ("stdlib", "orjson", "msgspec"):
+        os.environ["JSON_BACKEND"] = backend
+        importlib.reload(json_backend)
+        if backend != "stdlib" and json_backend.BACKEND != backend:
+            print(f"  {backend}: 미설치 — 건너뜀")
+            continue
+        results[backend] = (
+            _timeit(lambda: [json_backend.loads(raw) for raw in raws], args.repeat),
+            _timeit(lambda: [json_backend.dumps_bytes(doc, indent=2) for doc in docs], args.repeat),
+            _timeit(lambda: [json_backend.dumps_bytes(doc) for doc in docs], args.repeat),
+        )
+    os.environ.pop("JSON_BACKEND", None)
+    importlib.reload(json_backend)
+
+    print(f"\n데이터 파일 {len(files)}개, {total_kb:,.0f}KB (전체 1회 처리 시간, {args.repeat}회 중 최소)")
+    print(f"{'':<10}{'load':>10}{'dump(indent=2)':>16}{'dump(compact)':>16}")
+    base = results["stdlib"]
+    for backend, timings in results.items():
+        cells = [f"{t:.1f}ms" + ("" if backend == "stdlib" else f" x{b / t:.1f}") for t, b in zip(timings, base)]
+        print(f"{backend:<10}{cells[0]:>10}{cells[1]:>16}{cells[2]:>16}")
+    print(f"\n현재 선택된 백엔드: {json_backend.BACKEND}")
+
+
+def _import_profile(module: str) -> List[Tuple[str, int, int, int]]:
+    """새 인터프리터에서 module 임포트 → module 하위 트리 [(이름, 깊이, self µs, 누적 µs)]
+
+    -X importtime은 하위 모듈을 부모보다 먼저 출력하므로, module 줄 직전의 최상위(깊이 0) 줄 이후가
+    module 하위 트리다 (site 등 인터프리터 시작 시 임포트는 제외).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"{module} 임포트 실패")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # 헤더 줄
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+
+    end = max(i for i, row in enumerate(rows) if row[0] == module and row[1] == 0)
+    start = max((i for i, row in enumerate(rows[:end]) if row[1] == 0), default=-1) + 1
+    return rows[start:end + 1]
+
+
+def bench_import_time(args) -> None:
+    modules = args.modules or list(ENTRY_POINTS)
+    stdlib = getattr(sys, "stdlib_module_names", frozenset())
+    over_budget = []
+
+    for module in modules:
+        best: Dict[str, Tuple[int, int, int]] = {}
+        try:
+            for _ in range(args.repeat):
+                for name, depth, self_us, cumulative_us in _import_profile(module):
+                    if name not in best or cumulative_us < best[name][2]:
+                        best[name] = (depth, self_us, cumulative_us)
+        except RuntimeError as e:
+            print(f"\n{module}: 측정 실패 — {e}")
+            continue
+
+        total_ms = best[module][2] / 1000
+        print(f"\n{module}: {total_ms:,.0f}ms ({args.repeat}회 중 최소)")
+
+        direct = sorted(
+            ((name, cum) for name, (depth, _, cum) in best.items() if depth == 1),
+            key=lambda item: -item[1],
+        )[:args.top]
+        print("  직접 임포트: " + ", ".join(f"{name} {cum / 1000:,.0f}ms" for name, cum in direct))
+
+        packages = sorted(
+            (
+                (name, cum) for name, (_, _, cum) in best.items()
+                if "." not in name and name not in stdlib and not name.startswith("_")
+                and name not in ("modules", "config", "site", *ENTRY_POINTS)
+            ),
+            key=lambda item: -item[1],
+        )[:args.top]
+        print("  외부 패키지: " + (", ".join(f"{name} {cum / 1000:,.0f}ms" for name, cum in packages) or "없음"))
+
+        if args.budget_ms and total_ms > args.budget_ms:
+            over_budget.append(f"{module} {total_ms:,.0f}ms")
+
+    if args.budget_ms:
+        if over_budget:
+            print(f"\n✗ 임포트 예산 {args.budget_ms}ms 초과: {', '.join(over_budget)}")
+            sys.exit(1)
+        print(f"\n✓ 모든 진입점이 임포트 예산 {args.budget_ms}ms 이내")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="데이터 포맷/경로 성능 측정")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("snapshot-format", help="히스토리 스냅샷 포맷 비교")
+    p.add_argument("--limit", type=int, default=50, help="최근 N개 파일만 측정 (기본 50)")
+    p.add_argument("--repeat", type=int, default=3, help="인코딩 반복 횟수 (기본 3)")
+    p.set_defaults(func=bench_snapshot_format)
+
+    p = sub.add_parser("json-backend", help="JSON 백엔드 로드/저장 속도 비교")
+    p.add_argument("--limit", type=int, default=50, help="히스토리 최근 N개 파일 (기본 50)")
+    p.add_argument("--repeat", type=int, default=5, help="반복 횟수 (기본 5)")
+    p.set_defaults(func=bench_json_backend)
+
+    p = sub.add_parser("import-time", help="진입점 콜드 스타트 임포트 시간 (-X importtime)")
+    p.add_argument("modules", nargs="*", help=f"측정할 모듈 (기본: {', '.join(ENTRY_POINTS)})")
+    p.add_argument("--repeat", type=int, default=3, help="반복 횟수 (기본 3, 모듈별 최소값)")
+    p.add_argument("--top", type=int, default=5, help="표시할 상위 임포트 수 (기본 5)")
+    p.add_argument("--budget-ms", type=float, default=0, help="진입점별 임포트 예산 ms (초과 시 종료 코드 1)")
+    p.set_defaults(func=bench_import_time)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
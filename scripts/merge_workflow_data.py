@@ -7,10 +7,19 @@ Usage:
     python scripts/merge_workflow_data.py merge-investor  # daily-theme-analysis용: 저장된 investor 필드 병합
     python scripts/merge_workflow_data.py save-main       # collect-investor-data용: 원격의 main 필드 저장
     python scripts/merge_workflow_data.py merge-main      # collect-investor-data용: 저장된 main 필드 병합
+    python scripts/merge_workflow_data.py sync-sections   # 복원·병합된 latest.json 기준으로 data/latest/ 섹션 파일 갱신
+    python scripts/merge_workflow_data.py log-snapshot    # 최종 latest.json을 data/snapshot-log/ 일자별 로그에 추가 (모의투자용)
+    python scripts/merge_workflow_data.py merge-theme-index <backup>  # 백업한 theme-index.jsonl을 원격 인덱스와 합집합 병합
 """
-import json
-import os
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.data_exporter import merge_theme_index  # noqa: E402
+from modules.json_store import atomic_write_json, file_lock, read_json  # noqa: E402
+from modules.latest_sections import sync_sections  # noqa: E402
+from modules.snapshot_log import append_snapshot  # noqa: E402
 
 LATEST_PATH = "frontend/public/data/latest.json"
 INVESTOR_CACHE = "/tmp/remote_investor.json"
@@ -21,24 +30,26 @@ MAIN_KEYS = ["timestamp", "exchange", "theme_analysis", "kospi_index", "kosdaq_i
 
 
 def save_fields(keys, cache_path):
-    if not os.path.exists(LATEST_PATH):
+    remote = read_json(LATEST_PATH)
+    if not remote:
         return
-    with open(LATEST_PATH) as f:
-        remote = json.load(f)
     preserved = {k: remote[k] for k in keys if k in remote}
     if preserved:
-        with open(cache_path, "w") as f:
-            json.dump(preserved, f, ensure_ascii=False)
+        atomic_write_json(cache_path, preserved, indent=None)
 
 
 def merge_investor():
-    if not os.path.exists(INVESTOR_CACHE):
+    remote = read_json(INVESTOR_CACHE)
+    if not remote:
         return
-    with open(INVESTOR_CACHE) as f:
-        remote = json.load(f)
-    with open(LATEST_PATH) as f:
-        data = json.load(f)
+    with file_lock(LATEST_PATH):
+        data = read_json(LATEST_PATH, default={})
+        if _merge_investor(remote, data):
+            atomic_write_json(LATEST_PATH, data)
+
 
+def _merge_investor(remote: dict, data: dict) -> bool:
+    """원격 investor 필드를 data에 병합, 변경 여부 반환"""
     changed = False
 
     # investor_intraday: round 기준 합집합 병합
@@ -64,27 +75,22 @@ def merge_investor():
                 data[key] = remote[key]
         changed = True
 
-    if changed:
-        with open(LATEST_PATH, "w") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    return changed
 
 
 def merge_main():
-    if not os.path.exists(MAIN_CACHE):
+    remote = read_json(MAIN_CACHE)
+    if not remote:
         return
-    with open(MAIN_CACHE) as f:
-        remote = json.load(f)
-    with open(LATEST_PATH) as f:
-        data = json.load(f)
-
-    rt = remote.get("timestamp", "")
-    lt = data.get("timestamp", "")
-    if rt and rt > lt:
-        for key in MAIN_KEYS:
-            if key in remote:
-                data[key] = remote[key]
-        with open(LATEST_PATH, "w") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    with file_lock(LATEST_PATH):
+        data = read_json(LATEST_PATH, default={})
+        rt = remote.get("timestamp", "")
+        lt = data.get("timestamp", "")
+        if rt and rt > lt:
+            for key in MAIN_KEYS:
+                if key in remote:
+                    data[key] = remote[key]
+            atomic_write_json(LATEST_PATH, data)
 
 
 if __name__ == "__main__":
@@ -97,3 +103,13 @@ if __name__ == "__main__":
         save_fields(MAIN_KEYS, MAIN_CACHE)
     elif cmd == "merge-main":
         merge_main()
+    elif cmd == "sync-sections":
+        changed = sync_sections(Path(LATEST_PATH).parent)
+        print(f"섹션 갱신: {', '.join(changed) if changed else '변경 없음'}")
+    elif cmd == "log-snapshot":
+        data = read_json(LATEST_PATH)
+        added = bool(data) and append_snapshot(Path(LATEST_PATH).parent, data)
+        print(f"스냅샷 로그: {'추가' if added else '변경 없음'}")
+    elif cmd == "merge-theme-index":
+        count = merge_theme_index(Path(LATEST_PATH).parent, Path(sys.argv[2]))
+        print(f"테마 인덱스 병합: {count}개 항목")